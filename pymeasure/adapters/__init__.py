@@ -23,7 +23,9 @@
 #
 import logging
 
-from .adapter import Adapter, FakeAdapter
+from .adapter import Adapter, FakeAdapter, parse_binary_block, parse_numbers
+from .asynchronous import AsyncAdapter, AsyncSerialAdapter, AsyncSocketAdapter, ThreadAdapter
+from .recording import RecordingAdapter, ReplayAdapter
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -35,7 +37,7 @@ except ImportError:
 
 try:
     from pymeasure.adapters.serial import SerialAdapter
-    from pymeasure.adapters.prologix import PrologixAdapter
+    from pymeasure.adapters.prologix import PrologixAdapter, PrologixController
 except ImportError:
     log.warning("PySerial library could not be loaded")
 
@@ -44,4 +46,9 @@ try:
 except ImportError:
     log.warning("VXI-11 library could not be loaded")
 
-from pymeasure.adapters.telnet import TelnetAdapter
+from pymeasure.adapters.socket import SocketAdapter
+
+try:
+    from pymeasure.adapters.telnet import TelnetAdapter
+except ImportError:
+    log.warning("telnetlib could not be loaded, use the SocketAdapter instead")
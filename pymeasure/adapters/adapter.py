@@ -22,8 +22,19 @@
 # THE SOFTWARE.
 #
 
-import numpy as np
+import re
+import sys
+import time
+from contextlib import contextmanager
 from copy import copy
+from functools import lru_cache
+from threading import RLock
+
+import numpy as np
+
+
+# Request service bit of the status byte, which is set during a service request
+STATUS_REQUEST = 0x40
 
 
 class Adapter(object):
@@ -33,13 +44,40 @@ class Adapter(object):
 
     This class should only be inherited from.
 
+    Queries, i.e. a write and the following read, hold the :attr:`lock` of
+    the adapter, so that replies do not get mixed up when several threads use
+    the instrument. Use :meth:`transaction` for longer sequences.
+
     :param preprocess_reply: optional callable used to preprocess strings
         received from the instrument. The callable returns the processed string.
     :param kwargs: all other keyword arguments are ignored.
+
+    :ivar lock: :class:`threading.RLock` held during an exchange with the instrument
     """
     def __init__(self, preprocess_reply=None, **kwargs):
         self.preprocess_reply = preprocess_reply
         self.connection = None
+        self.lock = RLock()
+
+    @contextmanager
+    def transaction(self):
+        """ Context manager holding the :attr:`lock` for a sequence of commands,
+        which other threads can not interrupt.
+
+        .. code-block:: python
+
+            with adapter.transaction():
+                adapter.write("INIT")
+                data = adapter.values("FETCH?")
+        """
+        with self.lock:
+            yield self
+
+    def close(self):
+        """ Closes the connection to the instrument """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
 
     def __del__(self):
         """Close connection upon garbage collection of the device"""
@@ -60,8 +98,9 @@ class Adapter(object):
         :param command: SCPI command string to be sent to the instrument
         :returns: String ASCII response of the instrument
         """
-        self.write(command)
-        return self.read()
+        with self.lock:
+            self.write(command)
+            return self.read()
 
     def read(self):
         """ Reads until the buffer is empty and returns the resulting
@@ -71,7 +110,8 @@ class Adapter(object):
         """
         raise NameError("Adapter (sub)class has not implemented reading")
 
-    def values(self, command, separator=',', cast=float, preprocess_reply=None):
+    def values(self, command, separator=',', cast=float, preprocess_reply=None,
+               container=list):
         """ Writes a command to the instrument and returns a list of formatted
         values from the result 
 
@@ -82,25 +122,18 @@ class Adapter(object):
             received from the instrument. The callable returns the processed string.
             If not specified, the Adapter default is used if available, otherwise no
             preprocessing is done.
+        :param container: :code:`list` (default) or :code:`np.ndarray`. With
+            :code:`np.ndarray` and a numeric cast (float, int or bool) the whole reply
+            is parsed by NumPy at once and returned as an array, which is much
+            faster for long traces. Replies that are not purely numeric are
+            returned as a list, as without this option.
         :returns: A list of the desired type, or strings where the casting fails
         """
-        results = str(self.ask(command)).strip()
-        if callable(preprocess_reply):
-            results = preprocess_reply(results)
-        elif callable(self.preprocess_reply):
-            results = self.preprocess_reply(results)
-        results = results.split(separator)
-        for i, result in enumerate(results):
-            try:
-                if cast == bool:
-                    # Need to cast to float first since results are usually
-                    # strings and bool of a non-empty string is always True
-                    results[i] = bool(float(result))
-                else:
-                    results[i] = cast(result)
-            except Exception:
-                pass  # Keep as string
-        return results
+        with self.lock:
+            results = str(self.ask(command)).strip()
+        if not callable(preprocess_reply):
+            preprocess_reply = self.preprocess_reply
+        return format_values(results, separator, cast, preprocess_reply, container)
 
     def binary_values(self, command, header_bytes=0, dtype=np.float32):
         """ Returns a numpy array from a query for binary data 
@@ -113,6 +146,268 @@ class Adapter(object):
         raise NameError("Adapter (sub)class has not implemented the "
                         "binary_values method")
 
+    def read_binary_block(self, dtype=np.float32, is_big_endian=False, out=None,
+                          expect_termination=True):
+        """ Reads an IEEE 488.2 definite length arbitrary block (``#<n><length><data>``)
+        and returns its content as a NumPy array.
+
+        The length is taken from the block header, so no header size has to be
+        guessed. The data are read straight into the memory of the returned
+        array, which is allocated once or supplied by the caller with ``out``.
+
+        .. code-block:: python
+
+            adapter.write("CURV?")
+            trace = adapter.read_binary_block(dtype=np.int16, is_big_endian=True)
+
+        :param dtype: The NumPy data type of the values in the block
+        :param is_big_endian: True if the instrument sends the most significant byte first
+        :param out: optional contiguous NumPy array to read the values into, which
+            is reused across calls to avoid allocations. Its dtype replaces
+            :code:`dtype` and it must be large enough to hold the block.
+        :param expect_termination: if True, a line feed (and carriage return)
+            following the block is consumed as well
+        :returns: NumPy array of values, a view of :code:`out` if given
+        """
+        length = self._read_block_header()
+        dtype, out = _block_buffer(length, dtype, out)
+        if length:
+            self._readinto(memoryview(out.view(np.uint8)))
+        if expect_termination:
+            self._read_block_termination()
+        return _block_values(out, dtype, is_big_endian)
+
+    def wait_for_srq(self, timeout=25, delay=0.1):
+        """ Blocks until the instrument requests service and returns its status
+        byte, in which the request bit (64) is set.
+
+        Adapters which can not wait for the service request event of the
+        connection poll the status byte with :code:`*STB?` instead.
+
+        :param timeout: Timeout duration in seconds
+        :param delay: Time delay between polling the status byte in seconds
+        :returns: The status byte
+        :raises TimeoutError: If there was no service request within the timeout
+        """
+        end = time.monotonic() + timeout
+        while True:
+            status = int(self.ask("*STB?"))
+            if status & STATUS_REQUEST:
+                return status
+            if time.monotonic() > end:
+                raise TimeoutError("No service request within %g s" % timeout)
+            time.sleep(delay)
+
+    def _read_until(self, termination):
+        """ Reads until :code:`termination`, which is not returned, and keeps
+        any further bytes in :code:`_received` for the next read. Adapters
+        reading terminated replies from a byte stream keep the
+        :code:`_received` buffer and implement :meth:`_receive`.
+
+        :param termination: Bytes terminating the reply
+        :returns: Bytes of the reply
+        """
+        received = self._received
+        start = 0
+        while True:
+            index = received.find(termination, start)
+            if index >= 0:
+                reply = bytes(received[:index])
+                del received[:index + len(termination)]
+                return reply
+            # The termination may straddle the bytes received next
+            start = max(0, len(received) - len(termination) + 1)
+            received += self._receive()
+
+    def _receive(self):
+        """ Returns the next bytes received from the connection, waiting for
+        at least one, which is used by :meth:`_read_until`
+
+        :raises ConnectionError: If nothing was received within the timeout
+        """
+        raise NameError("Adapter (sub)class has not implemented receiving")
+
+    def _read_bytes(self, size):
+        """ Reads exactly :code:`size` bytes from the connection, which is used to read
+        binary blocks. Adapters supporting :meth:`.read_binary_block` implement it.
+
+        :param size: Number of bytes to read
+        :returns: Bytes-like object of length :code:`size`
+        """
+        raise NameError("Adapter (sub)class has not implemented reading binary data")
+
+    def _readinto(self, buffer):
+        """ Fills the writable :code:`buffer` with bytes read from the connection.
+
+        Adapters that can read into an existing buffer override this method
+        to avoid the copy made here.
+
+        :param buffer: writable memoryview of bytes
+        """
+        buffer[:] = self._read_bytes(len(buffer))
+
+    def _read_block_header(self):
+        """ Reads the header of a definite length arbitrary block, skipping
+        anything sent before the ``#``, and returns the length of the data.
+        """
+        start = self._read_bytes(1)
+        while start != b"#":
+            if not start:
+                raise ConnectionError("Timeout while waiting for a binary block")
+            start = self._read_bytes(1)
+        digits = self._read_bytes(1)
+        if not digits.isdigit() or digits == b"0":
+            raise ValueError("Invalid or indefinite length binary block header: #%s"
+                             % digits.decode(errors="replace"))
+        length = self._read_bytes(int(digits))
+        if not bytes(length).isdigit():
+            raise ValueError("Invalid binary block length: %r" % bytes(length))
+        return int(length)
+
+    def _read_block_termination(self):
+        """ Consumes the line termination following a binary block """
+        if self._read_bytes(1) == b"\r":
+            self._read_bytes(1)
+
+
+def format_values(results, separator=',', cast=float, preprocess_reply=None,
+                  container=list):
+    """ Splits a reply into values and casts them, which is shared by the
+    :meth:`values <Adapter.values>` methods of all adapters.
+
+    :param results: String reply of the instrument
+    :param separator: A separator character to split the string into a list
+    :param cast: A type to cast the result
+    :param preprocess_reply: optional callable used to preprocess the reply
+    :param container: :code:`list` or :code:`np.ndarray`, see :meth:`Adapter.values`
+    :returns: A list of the desired type, or strings where the casting fails,
+        or a NumPy array
+    """
+    if callable(preprocess_reply):
+        results = preprocess_reply(results)
+    if container is np.ndarray and cast in (float, int, bool):
+        array = parse_numbers(results, separator, cast)
+        if array is not None:
+            return array
+    results = results.split(separator)
+    for i, result in enumerate(results):
+        try:
+            if cast == bool:
+                # Need to cast to float first since results are usually
+                # strings and bool of a non-empty string is always True
+                results[i] = bool(float(result))
+            else:
+                results[i] = cast(result)
+        except Exception:
+            pass  # Keep as string
+    return results
+
+
+_INTEGER = r"[+-]?\d+"
+_FLOAT = r"[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|inf(?:inity)?|nan)"
+
+
+@lru_cache(maxsize=32)
+def _numbers_pattern(separator, cast):
+    """ Returns a compiled pattern which matches a whole string of numbers """
+    number = _INTEGER if cast is int else _FLOAT
+    separator = r"\s*%s\s*" % re.escape(separator)
+    return re.compile(r"\s*%s(?:%s%s)*\s*" % (number, separator, number), re.IGNORECASE)
+
+
+def parse_numbers(text, separator=',', cast=float):
+    """ Parses a string of numbers with NumPy's C parser and returns them as
+    an array, or None if :code:`text` contains anything else.
+
+    :param text: String of numbers, e.g. a reply to a :code:`TRAC:DATA?` query
+    :param separator: The separator between the numbers
+    :param cast: float, int or bool, which is parsed as a float that is not zero
+    :returns: NumPy array of the desired type or None
+    """
+    if not separator:
+        return None  # NumPy would parse binary data
+    if _numbers_pattern(separator, cast).fullmatch(text) is None:
+        return None  # NumPy silently stops at the first unmatched character
+    dtype = np.int64 if cast is int else np.float64
+    try:
+        array = np.fromstring(text, dtype=dtype, sep=separator)
+    except ValueError:
+        return None
+    if array.size != text.count(separator) + 1:
+        return None
+    return array.astype(bool) if cast is bool else array
+
+
+def parse_binary_block(data, dtype=np.float32, is_big_endian=False, out=None):
+    """ Returns the content of an IEEE 488.2 definite length arbitrary block
+    contained in :code:`data` as a NumPy array.
+
+    Without :code:`out`, and if no byte swapping is needed, the array is a
+    read-only view of :code:`data` and nothing is copied.
+
+    :param data: bytes-like object starting with the block header; anything
+        before the ``#`` and after the block is ignored
+    :param dtype: The NumPy data type of the values in the block
+    :param is_big_endian: True if the instrument sends the most significant byte first
+    :param out: optional contiguous NumPy array to copy the values into
+    :returns: NumPy array of values
+    """
+    data = memoryview(data).cast("B")
+    start = bytes(data[:64]).find(b"#")  # leading echo or whitespace
+    if start < 0 or not chr(data[start + 1]).isdigit() or data[start + 1] == ord("0"):
+        raise ValueError("Invalid or indefinite length binary block header")
+    digits = data[start + 1] - ord("0")
+    offset = start + 2 + digits
+    length = int(bytes(data[start + 2:offset]))
+    if len(data) < offset + length:
+        raise ValueError("Binary block is truncated: %d of %d bytes"
+                         % (len(data) - offset, length))
+    block = data[offset:offset + length]
+    if out is None and not _needs_swap(np.dtype(dtype), is_big_endian):
+        dtype = np.dtype(dtype)
+        if length % dtype.itemsize:
+            raise ValueError("Binary block of %d bytes does not hold %s values"
+                             % (length, dtype))
+        return np.frombuffer(block, dtype=dtype)
+    dtype, out = _block_buffer(length, dtype, out)
+    out.view(np.uint8)[:] = block
+    return _block_values(out, dtype, is_big_endian)
+
+
+def _block_buffer(length, dtype, out):
+    """ Returns the dtype of the values and a flat uint8-viewable array of
+    :code:`length` bytes to read them into """
+    if out is not None:
+        dtype = out.dtype
+        if not out.flags.c_contiguous:
+            raise ValueError("The output array must be contiguous")
+        if out.nbytes < length:
+            raise ValueError("The output array holds %d bytes, but the block has %d"
+                             % (out.nbytes, length))
+    dtype = np.dtype(dtype)
+    if length % dtype.itemsize:
+        raise ValueError("Binary block of %d bytes does not hold %s values"
+                         % (length, dtype))
+    count = length // dtype.itemsize
+    if out is None:
+        out = np.empty(count, dtype=dtype)
+    return dtype, out.reshape(-1)[:count]
+
+
+def _needs_swap(dtype, is_big_endian):
+    """ Returns True if values of a native :code:`dtype` sent with the given byte
+    order have to be swapped. Dtypes with an explicit byte order never do. """
+    return (dtype.itemsize > 1 and dtype.byteorder == "="
+            and is_big_endian != (sys.byteorder == "big"))
+
+
+def _block_values(values, dtype, is_big_endian):
+    """ Swaps the bytes of the values in place if the instrument's byte order
+    differs from the native one """
+    if _needs_swap(dtype, is_big_endian):
+        values.byteswap(inplace=True)
+    return values
+
 
 class FakeAdapter(Adapter):
     """Provides a fake adapter for debugging purposes,
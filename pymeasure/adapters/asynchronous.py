@@ -0,0 +1,327 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .adapter import format_values
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+try:
+    import serial
+except ImportError:
+    log.warning('Failed to import serial package, which is required for the AsyncSerialAdapter')
+
+
+class AsyncAdapter(object):
+    """ Base class of the asyncio adapters, whose communication methods are
+    coroutines. Many instruments, possibly on different interfaces, can then
+    be served concurrently by one event loop.
+
+    .. code-block:: python
+
+        async def read_rack(adapters):
+            return await asyncio.gather(*(a.values("MEAS:VOLT?") for a in adapters))
+
+    An exchange with the instrument, e.g. :meth:`ask`, is protected by a lock, so
+    that concurrent coroutines do not mix up their commands and replies.
+
+    :param preprocess_reply: optional callable used to preprocess strings
+        received from the instrument. The callable returns the processed string.
+    :param timeout: Time in seconds to wait for a reply, None waits forever
+    """
+
+    def __init__(self, preprocess_reply=None, timeout=None):
+        self.preprocess_reply = preprocess_reply
+        self.timeout = timeout
+        self._lock = None
+
+    @property
+    def lock(self):
+        """ The :class:`asyncio.Lock` held during an exchange with the instrument """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def write(self, command):
+        """ Writes a command to the instrument
+
+        :param command: SCPI command string to be sent to the instrument
+        """
+        async with self.lock:
+            await self._write(command)
+
+    async def read(self):
+        """ Reads a reply of the instrument
+
+        :returns: String ASCII response of the instrument.
+        """
+        async with self.lock:
+            return await self._read()
+
+    async def ask(self, command):
+        """ Writes the command to the instrument and returns the resulting
+        ASCII response
+
+        :param command: SCPI command string to be sent to the instrument
+        :returns: String ASCII response of the instrument
+        """
+        async with self.lock:
+            await self._write(command)
+            return await self._read()
+
+    async def values(self, command, separator=',', cast=float, preprocess_reply=None,
+                     container=list):
+        """ Writes a command to the instrument and returns a list of formatted
+        values from the result. See :meth:`Adapter.values <pymeasure.adapters.Adapter.values>`.
+
+        :returns: A list of the desired type, or strings where the casting fails
+        """
+        results = str(await self.ask(command)).strip()
+        if not callable(preprocess_reply):
+            preprocess_reply = self.preprocess_reply
+        return format_values(results, separator, cast, preprocess_reply, container)
+
+    async def run(self, function, *args, **kwargs):
+        """ Calls a blocking function in a thread while holding the lock and
+        returns its result, e.g. to use synchronous code for the same instrument.
+
+        :param function: Callable to run
+        :param args: Positional arguments of the callable
+        :param kwargs: Key-word arguments of the callable
+        """
+        async with self.lock:
+            return await self._run(partial(function, *args, **kwargs))
+
+    async def _run(self, function):
+        return await asyncio.get_event_loop().run_in_executor(None, function)
+
+    async def close(self):
+        """ Closes the connection """
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _write(self, command):
+        raise NameError("AsyncAdapter (sub)class has not implemented writing")
+
+    async def _read(self):
+        raise NameError("AsyncAdapter (sub)class has not implemented reading")
+
+
+class ThreadAdapter(AsyncAdapter):
+    """ Runs the calls of a synchronous :class:`Adapter <pymeasure.adapters.Adapter>`
+    in a thread of its own, so that they can be awaited. This is the async
+    adapter for PyVISA and VXI-11 instruments, whose libraries are blocking.
+
+    .. code-block:: python
+
+        adapter = ThreadAdapter(VISAAdapter("GPIB0::12::INSTR"))
+        voltage = await adapter.values("MEAS:VOLT?")
+
+    :param adapter: The synchronous adapter
+    """
+
+    def __init__(self, adapter):
+        super().__init__(preprocess_reply=adapter.preprocess_reply)
+        self.adapter = adapter
+        self._executor = None
+
+    async def ask(self, command):
+        """ Writes the command to the instrument and returns the resulting
+        ASCII response, using the :meth:`ask` method of the adapter
+
+        :param command: SCPI command string to be sent to the instrument
+        :returns: String ASCII response of the instrument
+        """
+        return await self.run(self.adapter.ask, command)
+
+    async def values(self, command, **kwargs):
+        """ Writes a command to the instrument and returns a list of formatted
+        values from the result, using the :meth:`values` method of the adapter
+
+        :param command: SCPI command to be sent to the instrument
+        :param kwargs: Key-word arguments of :meth:`Adapter.values <pymeasure.adapters.Adapter.values>`
+        """
+        return await self.run(self.adapter.values, command, **kwargs)
+
+    async def _write(self, command):
+        await self._run(partial(self.adapter.write, command))
+
+    async def _read(self):
+        return await self._run(self.adapter.read)
+
+    async def _run(self, function):
+        if self._executor is None:
+            # One thread per instrument keeps a rack from queueing for the
+            # default executor, and keeps each session on a single thread
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, function)
+
+    async def close(self):
+        """ Stops the thread, the synchronous adapter stays open """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __repr__(self):
+        return "<ThreadAdapter(adapter=%r)>" % self.adapter
+
+
+class AsyncSocketAdapter(AsyncAdapter):
+    """ Adapter communicating with an instrument through a TCP socket, e.g.
+    the raw SCPI port 5025 of many instruments or a telnet port, using
+    asyncio streams. The connection is opened with the first exchange, and
+    opened again after a read timed out.
+
+    :param host: host address of the instrument
+    :param port: TCPIP port
+    :param read_termination: String terminating the replies of the instrument,
+        which is removed from the returned string
+    :param write_termination: String appended to each command
+    :param timeout: Time in seconds to wait for a reply, None waits forever
+    :param preprocess_reply: optional callable used to preprocess strings
+        received from the instrument. The callable returns the processed string.
+    """
+
+    def __init__(self, host, port, read_termination="\n", write_termination="\n",
+                 timeout=2, preprocess_reply=None):
+        super().__init__(preprocess_reply=preprocess_reply, timeout=timeout)
+        self.host = host
+        self.port = port
+        self.read_termination = read_termination
+        self.write_termination = write_termination
+        self._reader = self._writer = None
+
+    async def connect(self):
+        """ Opens the connection, if it is not open yet """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+
+    async def _write(self, command):
+        await self.connect()
+        self._writer.write((command + self.write_termination).encode())
+        await self._writer.drain()
+
+    async def _read(self):
+        await self.connect()
+        termination = self.read_termination.encode()
+        try:
+            reply = await asyncio.wait_for(self._reader.readuntil(termination), self.timeout)
+        except asyncio.TimeoutError:
+            # The partial reply, and the rest if it arrives late, would be
+            # returned with the next reply, so start over with a new connection
+            await self.close()
+            raise
+        return reply[:len(reply) - len(termination)].decode()
+
+    async def close(self):
+        """ Closes the connection """
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    def __repr__(self):
+        return "<AsyncSocketAdapter(host=%s, port=%d)>" % (self.host, self.port)
+
+
+class AsyncSerialAdapter(AsyncAdapter):
+    """ Adapter for serial instruments, which waits for replies with the event
+    loop watching the file descriptor of the port instead of blocking a thread.
+    It requires an event loop supporting :meth:`add_reader`, which is not the
+    case for the default loop on Windows; use a :class:`ThreadAdapter` of a
+    :class:`SerialAdapter <pymeasure.adapters.SerialAdapter>` there.
+
+    :param port: Serial port or a serial.Serial object
+    :param read_termination: String terminating the replies of the instrument,
+        which is removed from the returned string
+    :param write_termination: String appended to each command
+    :param timeout: Time in seconds to wait for a reply, None waits forever
+    :param preprocess_reply: optional callable used to preprocess strings
+        received from the instrument. The callable returns the processed string.
+    :param kwargs: Any valid key-word argument for serial.Serial
+    """
+
+    def __init__(self, port, read_termination="\n", write_termination="",
+                 timeout=2, preprocess_reply=None, **kwargs):
+        super().__init__(preprocess_reply=preprocess_reply, timeout=timeout)
+        if isinstance(port, serial.SerialBase):
+            self.connection = port
+        else:
+            self.connection = serial.Serial(port, **kwargs)
+        self.connection.timeout = 0  # Reads return what has been received
+        self.read_termination = read_termination
+        self.write_termination = write_termination
+        self._received = bytearray()
+
+    async def _write(self, command):
+        # Commands are short, so that they fit into the output buffer
+        self.connection.write((command + self.write_termination).encode())
+
+    async def _read(self):
+        termination = self.read_termination.encode()
+        return (await asyncio.wait_for(self._read_until(termination), self.timeout)).decode()
+
+    async def _read_until(self, termination):
+        start = 0
+        while True:
+            index = self._received.find(termination, start)
+            if index >= 0:
+                reply = bytes(self._received[:index])
+                del self._received[:index + len(termination)]
+                return reply
+            start = max(0, len(self._received) - len(termination) + 1)
+            await self._readable()
+            self._received += self.connection.read(self.connection.in_waiting or 1)
+
+    async def _readable(self):
+        loop = asyncio.get_event_loop()
+        readable = loop.create_future()
+        fd = self.connection.fileno()
+        loop.add_reader(fd, _set_result, readable)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+
+    async def close(self):
+        """ Closes the serial port """
+        self.connection.close()
+
+    def __repr__(self):
+        return "<AsyncSerialAdapter(port='%s')>" % self.connection.port
+
+
+def _set_result(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,330 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import bisect
+import json
+import logging
+import threading
+from time import perf_counter
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+           0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+# Adapter methods which are measured
+OPERATIONS = ('write', 'read', 'ask', 'values', 'binary_values', 'read_binary_block')
+
+
+class Statistics(object):
+    """ Count, latency histogram and transferred bytes of one kind of call
+
+    :ivar count: Number of calls
+    :ivar errors: Number of calls raising an exception
+    :ivar total: Total duration of the calls in seconds
+    :ivar maximum: Longest duration of a call in seconds
+    :ivar bytes_in: Number of bytes received
+    :ivar bytes_out: Number of bytes sent
+    :ivar buckets: Number of calls per bucket of :data:`BUCKETS`
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.
+        self.maximum = 0.
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, duration, bytes_in=0, bytes_out=0, error=False):
+        self.count += 1
+        self.errors += error
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.buckets[bisect.bisect_left(BUCKETS, duration)] += 1
+
+    @property
+    def mean(self):
+        """ Mean duration of a call in seconds """
+        return self.total / self.count if self.count else 0.
+
+    def to_dict(self):
+        return {'count': self.count, 'errors': self.errors, 'total': self.total,
+                'mean': self.mean, 'maximum': self.maximum,
+                'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out,
+                'buckets': dict(zip((str(b) for b in BUCKETS), self.buckets))}
+
+
+class Metrics(object):
+    """ Opt-in measurement of the communication with instruments, which shows
+    where the time goes: counts, transferred bytes and latency histograms
+    of the adapter calls per command, and the duration of the
+    :meth:`control <pymeasure.instruments.Instrument.control>`,
+    :meth:`measurement <pymeasure.instruments.Instrument.measurement>` and
+    :meth:`setting <pymeasure.instruments.Instrument.setting>` properties.
+
+    .. code-block:: python
+
+        metrics = Metrics()
+        metrics.attach(sourcemeter)  # or an adapter
+        metrics.start_reporting(interval=60, filename="metrics.prom")
+        ...
+        print(metrics.summary())
+
+    Only attached objects are measured, others run without any overhead.
+    A call of an adapter method by another one, e.g. of :code:`ask` by
+    :code:`values`, is accounted to the outer call.
+
+    :ivar calls: Dictionary of the :class:`Statistics` of the adapter calls
+        by (adapter, operation, command), where the command is its first word
+    :ivar properties: Dictionary of the :class:`Statistics` of the property
+        accesses by (instrument, property, "get" or "set")
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.properties = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._property_names = {}  # accessor function: (property name, "get" or "set")
+        self._reporter = None
+
+    def attach(self, obj):
+        """ Starts measuring an adapter, or an instrument and its adapter
+
+        :param obj: An :class:`Adapter <pymeasure.adapters.Adapter>` or
+            :class:`Instrument <pymeasure.instruments.Instrument>`
+        """
+        adapter = getattr(obj, 'adapter', None)
+        if adapter is not None:
+            self._name_properties(type(obj))
+            obj._metrics = self
+            self.attach(adapter)
+            return
+        label = repr(obj)
+        for operation in OPERATIONS:
+            if operation not in vars(obj) and hasattr(obj, operation):
+                setattr(obj, operation, self._measured(label, operation, getattr(obj, operation)))
+
+    def detach(self, obj):
+        """ Stops measuring an adapter or instrument attached before
+
+        :param obj: An :class:`Adapter <pymeasure.adapters.Adapter>` or
+            :class:`Instrument <pymeasure.instruments.Instrument>`
+        """
+        adapter = getattr(obj, 'adapter', None)
+        if adapter is not None:
+            obj._metrics = None
+            self.detach(adapter)
+            return
+        for operation in OPERATIONS:
+            if getattr(vars(obj).get(operation), '_metrics', None) is self:
+                delattr(obj, operation)
+
+    def clear(self):
+        """ Drops the statistics collected so far """
+        with self._lock:
+            self.calls = {}
+            self.properties = {}
+
+    def record_property(self, instrument, accessor, duration, error=False):
+        """ Adds the access of a property to the statistics
+
+        :param instrument: The instrument
+        :param accessor: The getter or setter function of the property
+        :param duration: Duration of the access in seconds
+        :param error: True if the access raised an exception
+        """
+        name, kind = self._property_names.get(accessor, (accessor.__name__, "get"))
+        self._record(self.properties, (instrument.name, name, kind), duration, error=error)
+
+    # Reports
+    def to_dict(self):
+        """ Returns the statistics as dictionary of the lists of the adapter
+        :code:`calls` and the :code:`properties` """
+        with self._lock:
+            tables = (('calls', ('adapter', 'operation', 'command'), self.calls),
+                      ('properties', ('instrument', 'property', 'kind'), self.properties))
+            return {name: [dict(zip(labels, key), **statistics.to_dict())
+                           for key, statistics in table.items()]
+                    for name, labels, table in tables}
+
+    def to_json(self):
+        """ Returns the statistics of :meth:`to_dict` as JSON string """
+        return json.dumps(self.to_dict(), indent=1)
+
+    def to_prometheus(self):
+        """ Returns the statistics in the text format of Prometheus, with the
+        adapter calls as :code:`pymeasure_adapter_*` and the properties as
+        :code:`pymeasure_property_*` metrics. """
+        with self._lock:
+            tables = (('adapter', ('adapter', 'operation', 'command'), list(self.calls.items())),
+                      ('property', ('instrument', 'property', 'kind'),
+                       list(self.properties.items())))
+        lines = []
+        for group, names, entries in tables:
+            if not entries:
+                continue
+            prefix = "pymeasure_%s_" % group
+            lines.append("# TYPE %sseconds histogram" % prefix)
+            for key, statistics in entries:
+                labels = _labels(names, key)
+                cumulative = 0
+                for bound, count in zip(BUCKETS, statistics.buckets):
+                    cumulative += count
+                    lines.append('%sseconds_bucket{%s,le="%s"} %d' % (
+                        prefix, labels, "+Inf" if bound == float('inf') else bound, cumulative))
+                lines.append("%sseconds_sum{%s} %r" % (prefix, labels, statistics.total))
+                lines.append("%sseconds_count{%s} %d" % (prefix, labels, statistics.count))
+            counters = ('errors', 'bytes_in', 'bytes_out') if group == 'adapter' else ('errors',)
+            for counter in counters:
+                lines.append("# TYPE %s%s_total counter" % (prefix, counter))
+                lines.extend("%s%s_total{%s} %d" % (prefix, counter, _labels(names, key),
+                                                    getattr(statistics, counter))
+                             for key, statistics in entries)
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename):
+        """ Writes the statistics to a file, as JSON if the name ends with
+        ".json" and in the text format of Prometheus otherwise
+
+        :param filename: Name of the file, which is replaced
+        """
+        text = self.to_json() if filename.endswith(".json") else self.to_prometheus()
+        with open(filename, 'w') as file:
+            file.write(text)
+
+    def summary(self, limit=10):
+        """ Returns a text table of the adapter calls and property accesses
+        taking the most time in total
+
+        :param limit: Maximum number of lines per table
+        """
+        lines = []
+        with self._lock:
+            tables = (("adapter call", self.calls), ("property", self.properties))
+            for title, table in tables:
+                lines.append("%-50s %8s %10s %10s %10s" % (
+                    title, "count", "total/s", "mean/ms", "max/ms"))
+                for key, statistics in sorted(table.items(), key=lambda item: -item[1].total)[:limit]:
+                    lines.append("%-50s %8d %10.3f %10.3f %10.3f" % (
+                        " ".join(str(k) for k in key if k)[:50], statistics.count,
+                        statistics.total, statistics.mean * 1e3, statistics.maximum * 1e3))
+        return "\n".join(lines)
+
+    def start_reporting(self, interval=60, filename=None):
+        """ Logs the :meth:`summary` every :code:`interval` seconds at the INFO
+        level, and exports the statistics to a file if a name is given
+
+        :param interval: Time between reports in seconds
+        :param filename: Name of the file for :meth:`export` or None
+        """
+        self.stop_reporting()
+        stop = self._reporter = threading.Event()
+
+        def report():
+            while not stop.wait(interval):
+                log.info("Instrument communication:\n%s", self.summary())
+                if filename is not None:
+                    self.export(filename)
+
+        threading.Thread(target=report, name="Metrics report", daemon=True).start()
+
+    def stop_reporting(self):
+        """ Stops the reports started by :meth:`start_reporting` """
+        if self._reporter is not None:
+            self._reporter.set()
+            self._reporter = None
+
+    def _record(self, table, key, duration, bytes_in=0, bytes_out=0, error=False):
+        with self._lock:
+            statistics = table.get(key)
+            if statistics is None:
+                statistics = table[key] = Statistics()
+            statistics.add(duration, bytes_in, bytes_out, error)
+
+    def _name_properties(self, cls):
+        for klass in cls.__mro__:
+            for name, attribute in vars(klass).items():
+                if isinstance(attribute, property):
+                    for accessor, kind in ((attribute.fget, "get"), (attribute.fset, "set")):
+                        if accessor is not None:
+                            self._property_names.setdefault(accessor, (name, kind))
+
+    def _measured(self, label, operation, method):
+        """ Returns a wrapper of an adapter method recording its calls """
+        local = self._local
+
+        def measured(*args, **kwargs):
+            frames = getattr(local, 'frames', None)
+            if frames is None:
+                frames = local.frames = []
+            frame = [0, 0]  # bytes in and out of nested calls
+            frames.append(frame)
+            result, error = None, True
+            start = perf_counter()
+            try:
+                result = method(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                duration = perf_counter() - start
+                frames.pop()
+                command = args[0] if args and isinstance(args[0], str) else ""
+                if frame == [0, 0]:  # no nested call transferred the data
+                    frame = _transferred(operation, command, result)
+                if frames:  # a nested call, which the outer one accounts for
+                    frames[-1][0] += frame[0]
+                    frames[-1][1] += frame[1]
+                else:
+                    words = command.split(None, 1)
+                    self._record(self.calls, (label, operation, words[0] if words else ""),
+                                 duration, bytes_in=frame[0], bytes_out=frame[1], error=error)
+
+        measured._metrics = self
+        return measured
+
+
+def _transferred(operation, command, result):
+    """ Returns the bytes in and out of a call, as far as they are known """
+    if operation == 'write':
+        return [0, len(command)]
+    if isinstance(result, (str, bytes)):
+        bytes_in = len(result)
+    else:
+        bytes_in = getattr(result, 'nbytes', 0)
+    return [bytes_in, len(command)]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join('%s="%s"' % (name, _escape(value)) for name, value in zip(names, values))
@@ -21,12 +21,183 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 #
+import logging
+import re
 import time
+import weakref
+from contextlib import contextmanager
+from threading import Event, Lock, RLock, Thread
 
+import numpy as np
 import serial
 
+from .adapter import STATUS_REQUEST
 from .serial import SerialAdapter
 
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# Characters of binary data which are escaped with ESC for the controller
+_SPECIAL_CHARACTERS = re.compile(rb'([\x0d\x0a\x1b\x2b])')
+
+
+class PrologixController(object):
+    """ Bus state shared by all :class:`PrologixAdapter` objects using the same
+    serial connection, which is obtained with :meth:`of`.
+
+    It remembers the GPIB address the controller currently talks to, so that
+    :code:`++addr` is only sent when another device is addressed, and holds the
+    lock of the bus. Each exchange of an adapter holds the lock, so that
+    instruments on one controller can be used from several threads; the others
+    wait for their turn.
+
+    The controller also serves the :meth:`wait_for_srq` calls of its adapters
+    with a single thread, which checks the SRQ line and serial polls only the
+    devices waited for, releasing the bus in between.
+
+    :param connection: The serial connection to the controller
+
+    :ivar address: GPIB address currently selected on the controller, or None
+    :ivar lock: :class:`threading.RLock` held during an exchange on the bus
+    :ivar adapters: :class:`weakref.WeakSet` of the open adapters using the controller
+    """
+
+    _controllers = weakref.WeakKeyDictionary()
+    _controllers_lock = Lock()
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.address = None
+        self.lock = RLock()
+        self.adapters = weakref.WeakSet()
+        self.received = bytearray()  # received after the last reply
+        self._requests = {}  # GPIB address: list of _ServiceRequest waiting
+        self._requests_lock = Lock()
+        self._watcher = None
+
+    @classmethod
+    def of(cls, connection):
+        """ Returns the controller of a serial connection, which is created
+        with the first adapter using it
+
+        :param connection: The serial connection to the controller
+        """
+        with cls._controllers_lock:
+            controller = cls._controllers.get(connection)
+            if controller is None:
+                controller = cls._controllers[connection] = cls(connection)
+            return controller
+
+    def select(self, address):
+        """ Addresses a GPIB device, unless it is addressed already.
+        Bytes left over from the previous device are discarded.
+
+        :param address: Integer GPIB address or None to keep the current one
+        """
+        if address is None or address == self.address:
+            return
+        if self.received:
+            log.debug("Discarding %r left over from GPIB address %s",
+                      bytes(self.received), self.address)
+            self.received.clear()
+        self.connection.write(("++addr %d\n" % address).encode())
+        self.address = address
+
+    def reset(self):
+        """ Forgets the addressed device, e.g. after the controller was
+        addressed by another program """
+        with self.lock:
+            self.address = None
+
+    def query(self, command):
+        """ Sends a command to the controller itself, e.g. :code:`++srq`, and
+        returns its reply
+
+        :param command: Prologix command string, starting with "++"
+        :returns: The stripped reply line
+        """
+        with self.lock:
+            if self.received:
+                log.debug("Discarding %r left over from GPIB address %s",
+                          bytes(self.received), self.address)
+                self.received.clear()
+            self.connection.write((command + "\n").encode())
+            reply = self.connection.read_until(b"\n")
+            if not reply.endswith(b"\n"):
+                raise ConnectionError("Timeout while waiting for the reply to '%s', "
+                                      "received %r" % (command, reply))
+            return reply.decode().strip()
+
+    def wait_for_srq(self, address, timeout=25, delay=0.1):
+        """ Blocks until the device requests service and returns its status
+        byte, which is read by a serial poll and clears the request.
+
+        :param address: Integer GPIB address of the device
+        :param timeout: Timeout duration in seconds
+        :param delay: Time delay between checking the SRQ line in seconds
+        :returns: The status byte
+        :raises TimeoutError: If there was no service request within the timeout
+        """
+        request = _ServiceRequest(delay)
+        with self._requests_lock:
+            self._requests.setdefault(address, []).append(request)
+            if self._watcher is None:
+                self._watcher = Thread(target=self._watch_srq, daemon=True,
+                                       name="Prologix SRQ %s" % self.connection.port)
+                self._watcher.start()
+        if not request.event.wait(timeout):
+            with self._requests_lock:
+                waiting = self._requests.get(address, [])
+                if request in waiting:
+                    waiting.remove(request)
+                    if not waiting:
+                        del self._requests[address]
+            if not request.event.is_set():
+                raise TimeoutError("No service request of GPIB address %d within %g s"
+                                   % (address, timeout))
+        if request.error is not None:
+            raise request.error
+        return request.status
+
+    def _watch_srq(self):
+        """ Serves the waiting service requests until there are none left """
+        while True:
+            with self._requests_lock:
+                if not self._requests:
+                    self._watcher = None
+                    return
+                addresses = list(self._requests)
+                delay = min(r.delay for rs in self._requests.values() for r in rs)
+            try:
+                with self.lock:
+                    if int(self.query("++srq")):
+                        for address in addresses:
+                            status = int(self.query("++spoll %d" % address))
+                            if status & STATUS_REQUEST:
+                                self._dispatch(address, status=status)
+            except Exception as exc:
+                log.exception("Checking the service requests failed")
+                for address in addresses:
+                    self._dispatch(address, error=exc)
+            time.sleep(delay)
+
+    def _dispatch(self, address, status=None, error=None):
+        with self._requests_lock:
+            for request in self._requests.pop(address, []):
+                request.status = status
+                request.error = error
+                request.event.set()
+
+
+class _ServiceRequest(object):
+    """ A call of :meth:`PrologixController.wait_for_srq` waiting for its device """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.event = Event()
+        self.status = None
+        self.error = None
+
 
 class PrologixAdapter(SerialAdapter):
     """ Encapsulates the additional commands necessary
@@ -37,15 +208,26 @@ class PrologixAdapter(SerialAdapter):
     connection and the GPIB address to be communicated to.
     Serial connection sharing is achieved by using the :meth:`.gpib`
     method to spawn new PrologixAdapters for different GPIB addresses.
+    The adapters of one connection share a :class:`PrologixController`, so
+    that they can be used from several threads and :code:`++addr` is only sent
+    when switching between instruments.
 
     :param port: The Serial port name or a serial.Serial object
     :param address: Integer GPIB address of the desired instrument
     :param rw_delay: An optional delay to set between a write and read call for slow to respond instruments.
     :param preprocess_reply: optional callable used to preprocess strings
         received from the instrument. The callable returns the processed string.
+    :param read_termination: optional string terminating the replies of the
+        instrument, e.g. "\\n". If given, reads return as soon as it is received
+        instead of waiting for :code:`serial_timeout`, see
+        :class:`SerialAdapter <pymeasure.adapters.SerialAdapter>`. For
+        instruments signalling the end of a reply with EOI only, the controller
+        can append a character with :code:`++eot_enable 1` and :code:`++eot_char`.
     :param kwargs: Key-word arguments if constructing a new serial object
 
     :ivar address: Integer GPIB address of the desired instrument
+    :ivar controller: The :class:`PrologixController` of the connection
+    :ivar lock: The lock of the controller, shared by its adapters
 
     To allow user access to the Prologix adapter in Linux, create the file:
     :code:`/etc/udev/rules.d/51-prologix.rules`, with contents:
@@ -64,14 +246,48 @@ class PrologixAdapter(SerialAdapter):
     """
 
     def __init__(self, port, address=None, rw_delay=None, serial_timeout=0.5,
-                 preprocess_reply=None, **kwargs):
-        super().__init__(port, timeout=serial_timeout,
-                         preprocess_reply=preprocess_reply, **kwargs)
+                 preprocess_reply=None, read_termination=None, **kwargs):
+        super().__init__(port, timeout=serial_timeout, preprocess_reply=preprocess_reply,
+                         read_termination=read_termination, **kwargs)
         self.address = address
         self.rw_delay = rw_delay
+        self.controller = PrologixController.of(self.connection)
+        self.lock = self.controller.lock  # shared by the adapters of the controller
+        self.controller.adapters.add(self)
+        self._received = self.controller.received
         if not isinstance(port, serial.Serial):
             self.set_defaults()
 
+    @contextmanager
+    def transaction(self):
+        """ Context manager holding the bus for a sequence of commands to this
+        instrument, which other threads can not interrupt.
+
+        .. code-block:: python
+
+            with adapter.transaction():
+                adapter.write("INIT")
+                data = adapter.values("FETCH?")
+
+        Do not call :meth:`wait_for_srq` inside, as the controller needs the
+        bus to check the service requests.
+        """
+        with self.lock:
+            self.controller.select(self.address)
+            yield self
+
+    def close(self):
+        """ Closes the adapter. The serial connection, which the adapters of
+        the other GPIB addresses share, is only closed with the last open
+        adapter of the controller.
+        """
+        with self.lock:
+            self.controller.adapters.discard(self)
+            if self.controller.adapters:
+                self.connection = None
+            else:
+                super().close()
+
     def set_defaults(self):
         """ Sets up the default behavior of the Prologix-GPIB
         adapter
@@ -86,10 +302,11 @@ class PrologixAdapter(SerialAdapter):
         :param command: SCPI command string to be sent to instrument
         """
 
-        self.write(command)
-        if self.rw_delay is not None:
-            time.sleep(self.rw_delay)
-        return self.read()
+        with self.transaction():
+            self.write(command)
+            if self.rw_delay is not None:
+                time.sleep(self.rw_delay)
+            return self.read()
 
     def write(self, command):
         """ Writes the command to the GPIB address stored in the
@@ -97,11 +314,9 @@ class PrologixAdapter(SerialAdapter):
 
         :param command: SCPI command string to be sent to the instrument
         """
-        if self.address is not None:
-            address_command = "++addr %d\n" % self.address
-            self.connection.write(address_command.encode())
-        command += "\n"
-        self.connection.write(command.encode())
+        with self.transaction():
+            command += "\n"
+            self.connection.write(command.encode())
 
     def _format_binary_values(self, values, datatype='f', is_big_endian=False, header_fmt = "ieee"):
         """Format values in binary format, used internally in :meth:`.write_binary_values`.
@@ -120,15 +335,7 @@ class PrologixAdapter(SerialAdapter):
         # following characters occur in the binary data -- CR (ASCII 13), LF (ASCII 10), ESC
         # (ASCII 27), '+' (ASCII 43) - they must be escaped by preceding them with an ESC
         # character.
-        special_chars = b'\x0d\x0a\x1b\x2b'
-        new_block = b''
-        for b in block:
-            escape = b''
-            if b in special_chars:
-                escape = b'\x1b'
-            new_block += (escape + bytes((b,)))
-
-        return new_block
+        return _SPECIAL_CHARACTERS.sub(b'\x1b\\1', block)
 
     def write_binary_values(self, command, values, **kwargs):
         """ Write binary data to the instrument, e.g. waveform for signal generators.
@@ -141,19 +348,39 @@ class PrologixAdapter(SerialAdapter):
         :param kwargs: Key-word arguments to pass onto :meth:`._format_binary_values`
         :returns: number of bytes written
         """
-        if self.address is not None:
-            address_command = "++addr %d\n" % self.address
-            self.connection.write(address_command.encode())
-        super().write_binary_values(command, values, **kwargs)
-        self.connection.write('\n'.encode())
+        with self.transaction():
+            super().write_binary_values(command, values, **kwargs)
+            self.connection.write('\n'.encode())
 
     def read(self):
-        """ Reads the response of the instrument until timeout
+        """ Reads the response of the instrument until the read termination,
+        or without a :code:`read_termination` until timeout
 
         :returns: String ASCII response of the instrument
         """
-        self.write("++read eoi")
-        return b"\n".join(self.connection.readlines()).decode()
+        with self.transaction():
+            self.write("++read eoi")
+            return super().read()
+
+    def read_bytes(self, size):
+        """ Reads the specified number of bytes of the response of the instrument
+
+        :param size: Number of bytes to read
+        :returns: Bytes read
+        """
+        with self.transaction():
+            self.write("++read eoi")
+            return super().read_bytes(size)
+
+    def read_binary_block(self, dtype=np.float32, is_big_endian=False, out=None,
+                          expect_termination=True):
+        """ Reads an IEEE 488.2 definite length arbitrary block from the instrument.
+        See :meth:`Adapter.read_binary_block <pymeasure.adapters.Adapter.read_binary_block>`.
+        """
+        with self.transaction():
+            self.write("++read eoi")
+            return super().read_binary_block(dtype=dtype, is_big_endian=is_big_endian,
+                                             out=out, expect_termination=expect_termination)
 
     def gpib(self, address, rw_delay=None):
         """ Returns and PrologixAdapter object that references the GPIB
@@ -165,16 +392,22 @@ class PrologixAdapter(SerialAdapter):
         :returns: PrologixAdapter for specific GPIB address
         """
         rw_delay = rw_delay or self.rw_delay
-        return PrologixAdapter(self.connection, address, rw_delay=rw_delay)
+        return PrologixAdapter(self.connection, address, rw_delay=rw_delay,
+                               read_termination=self.read_termination)
 
     def wait_for_srq(self, timeout=25, delay=0.1):
-        """ Blocks until a SRQ, and leaves the bit high
+        """ Blocks until the instrument requests service and returns its status
+        byte, which is read by a serial poll and clears the request. The
+        :class:`PrologixController` checks the SRQ line for all instruments
+        waiting, and releases the bus in between, so that other instruments
+        can be used meanwhile.
 
         :param timeout: Timeout duration in seconds
         :param delay: Time delay between checking SRQ in seconds
+        :returns: The status byte
+        :raises TimeoutError: If there was no service request within the timeout
         """
-        while int(self.ask("++srq")) != 1:  # TODO: Include timeout!
-            time.sleep(delay)
+        return self.controller.wait_for_srq(self.address, timeout=timeout, delay=delay)
 
     def __repr__(self):
         if self.address is not None:
@@ -0,0 +1,270 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import base64
+import builtins
+import json
+import logging
+import time
+
+import numpy as np
+
+from .adapter import Adapter
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+FORMAT = "pymeasure-transcript"
+VERSION = 1
+
+
+class RecordingAdapter(Adapter):
+    """ Wraps an adapter and records every command, reply and duration to a
+    transcript file, which a :class:`ReplayAdapter` plays back without the
+    instrument, e.g. to benchmark procedures offline.
+
+    .. code-block:: python
+
+        adapter = RecordingAdapter(VISAAdapter("GPIB::4"), "sourcemeter.jsonl")
+        sourcemeter = Keithley2400(adapter)
+        ...
+        adapter.close()
+
+    The transcript has one JSON object per line: a header, followed by an
+    entry per call with the time since the start :code:`t` and the duration
+    :code:`dt` in seconds, the operation :code:`op`, the command :code:`cmd`,
+    and the reply or the raised error. Binary replies are stored base64 encoded,
+    along with the data type and shape of arrays.
+    Methods not listed below, e.g. those of the :code:`connection` of the
+    wrapped adapter, are not recorded.
+
+    :param adapter: The :class:`Adapter` to record
+    :param filename: Name of the transcript file, which is replaced
+    :param flush: If True, every entry is flushed to the file at once, so that
+        the transcript is complete even if the process crashes. Disable it
+        to reduce the overhead at high call rates.
+    """
+
+    def __init__(self, adapter, filename, flush=True):
+        super().__init__(preprocess_reply=adapter.preprocess_reply)
+        self.adapter = adapter
+        self.lock = adapter.lock
+        self.filename = filename
+        self._flush = flush
+        self._file = open(filename, 'w')
+        self._start = time.perf_counter()
+        self._dump({'format': FORMAT, 'version': VERSION, 'adapter': repr(adapter)})
+
+    def write(self, command):
+        """ Writes a command to the instrument and records it """
+        self._call('write', self.adapter.write, command)
+
+    def read(self):
+        """ Reads and records a reply of the instrument """
+        return self._call('read', self.adapter.read)
+
+    def ask(self, command):
+        """ Writes a command to the instrument and reads and records the reply """
+        return self._call('ask', self.adapter.ask, command)
+
+    def read_bytes(self, size):
+        """ Reads and records a number of bytes of the reply """
+        return self._call('read_bytes', self.adapter.read_bytes, size)
+
+    def binary_values(self, command, header_bytes=0, dtype=np.float32):
+        """ Returns and records a numpy array from a query for binary data """
+        return self._call('binary_values', self.adapter.binary_values, command,
+                          header_bytes, dtype)
+
+    def read_binary_block(self, dtype=np.float32, is_big_endian=False, out=None,
+                          expect_termination=True):
+        """ Reads and records an IEEE 488.2 definite length arbitrary block """
+        return self._call('read_binary_block', self.adapter.read_binary_block, None,
+                          dtype=dtype, is_big_endian=is_big_endian, out=out,
+                          expect_termination=expect_termination)
+
+    def write_binary_values(self, command, values, **kwargs):
+        """ Writes binary data to the instrument and records the command """
+        return self._call('write_binary_values', self.adapter.write_binary_values, command,
+                          values, **kwargs)
+
+    def wait_for_srq(self, timeout=25, delay=0.1):
+        """ Waits for a service request and records the status byte """
+        return self._call('wait_for_srq', self.adapter.wait_for_srq, None,
+                          timeout=timeout, delay=delay)
+
+    def transaction(self):
+        """ Holds the bus of the wrapped adapter, see :meth:`Adapter.transaction` """
+        return self.adapter.transaction()
+
+    def close(self):
+        """ Closes the transcript file, but not the wrapped adapter """
+        file = getattr(self, '_file', None)
+        if file is not None and not file.closed:
+            file.close()
+
+    def __del__(self):
+        self.close()
+
+    def __repr__(self):
+        return "<RecordingAdapter(%r, filename='%s')>" % (self.adapter, self.filename)
+
+    def _call(self, operation, method, command=None, *args, **kwargs):
+        start = time.perf_counter()
+        entry = {'t': round(start - self._start, 6), 'op': operation}
+        if command is not None:
+            entry['cmd'] = command
+        try:
+            if command is None:
+                reply = method(*args, **kwargs)
+            else:
+                reply = method(command, *args, **kwargs)
+        except Exception as exc:
+            entry.update(dt=round(time.perf_counter() - start, 6),
+                         error=type(exc).__name__, message=str(exc))
+            self._dump(entry)
+            raise
+        entry['dt'] = round(time.perf_counter() - start, 6)
+        if reply is not None:
+            entry.update(_encode(reply))
+        self._dump(entry)
+        return reply
+
+    def _dump(self, entry):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        if self._flush:
+            self._file.flush()
+
+
+class ReplayAdapter(Adapter):
+    """ Plays back a transcript recorded by :class:`RecordingAdapter`: each
+    call returns the recorded reply, if it is the recorded call. The calls
+    of an instrument are thereby reproduced without the instrument.
+
+    .. code-block:: python
+
+        sourcemeter = Keithley2400(ReplayAdapter("sourcemeter.jsonl", latency=1))
+
+    :param filename: Name of the transcript file
+    :param latency: Factor of the recorded durations of the calls to wait,
+        e.g. 1 to reproduce the timing of the instrument, 0 not to wait
+    :param strict: If True, a command differing from the recorded one raises
+        a ValueError, otherwise it is logged
+    :param preprocess_reply: optional callable used to preprocess strings
+        received from the instrument. The callable returns the processed string.
+    """
+
+    def __init__(self, filename, latency=0, strict=True, preprocess_reply=None):
+        super().__init__(preprocess_reply=preprocess_reply)
+        self.filename = filename
+        self.latency = latency
+        self.strict = strict
+        with open(filename) as file:
+            header = json.loads(file.readline())
+            if header.get('format') != FORMAT:
+                raise ValueError("'%s' is not a transcript of a RecordingAdapter" % filename)
+            self.entries = [json.loads(line) for line in file if line.strip()]
+        self.position = 0
+
+    @property
+    def remaining(self):
+        """ Number of recorded calls, which were not played back yet """
+        return len(self.entries) - self.position
+
+    def write(self, command):
+        self._replay('write', command)
+
+    def read(self):
+        return self._replay('read')
+
+    def ask(self, command):
+        return self._replay('ask', command)
+
+    def read_bytes(self, size):
+        return self._replay('read_bytes', size)
+
+    def binary_values(self, command, header_bytes=0, dtype=np.float32):
+        return self._replay('binary_values', command)
+
+    def read_binary_block(self, dtype=np.float32, is_big_endian=False, out=None,
+                          expect_termination=True):
+        values = self._replay('read_binary_block')
+        if out is None:
+            return values
+        out[:len(values)] = values
+        return out[:len(values)]
+
+    def write_binary_values(self, command, values, **kwargs):
+        return self._replay('write_binary_values', command)
+
+    def wait_for_srq(self, timeout=25, delay=0.1):
+        return self._replay('wait_for_srq')
+
+    def __repr__(self):
+        return "<ReplayAdapter(filename='%s')>" % self.filename
+
+    def _replay(self, operation, command=None):
+        if self.position >= len(self.entries):
+            raise ConnectionError("The transcript '%s' ended before %s(%r)"
+                                  % (self.filename, operation, command))
+        entry = self.entries[self.position]
+        self.position += 1
+        if entry['op'] != operation or entry.get('cmd') != command:
+            message = ("Call %d of '%s' is %s(%r), but %s(%r) was recorded" % (
+                self.position, self.filename, operation, command, entry['op'],
+                entry.get('cmd')))
+            if self.strict:
+                raise ValueError(message)
+            log.warning(message)
+        if self.latency:
+            time.sleep(entry['dt'] * self.latency)
+        if 'error' in entry:
+            error = getattr(builtins, entry['error'], None)
+            if not (isinstance(error, type) and issubclass(error, Exception)):
+                error = RuntimeError
+            raise error(entry['message'])
+        return _decode(entry)
+
+
+def _encode(reply):
+    """ Returns the JSON representation of a reply """
+    if isinstance(reply, np.ndarray):
+        return {'data': base64.b64encode(reply.tobytes()).decode(), 'dtype': reply.dtype.str,
+                'shape': list(reply.shape)}
+    if isinstance(reply, (bytes, bytearray)):
+        return {'data': base64.b64encode(bytes(reply)).decode()}
+    if isinstance(reply, np.generic):
+        return {'reply': reply.item()}
+    return {'reply': reply}
+
+
+def _decode(entry):
+    """ Returns the reply of a transcript entry """
+    if 'data' not in entry:
+        return entry.get('reply')
+    data = base64.b64decode(entry['data'])
+    if 'dtype' in entry:
+        array = np.frombuffer(data, dtype=entry['dtype']).copy()
+        return array.reshape(entry['shape']) if 'shape' in entry else array
+    return data
@@ -40,15 +40,22 @@ class SerialAdapter(Adapter):
     :param port: Serial port
     :param preprocess_reply: optional callable used to preprocess strings
         received from the instrument. The callable returns the processed string.
+    :param read_termination: optional string terminating the replies of the
+        instrument. If given, :meth:`read` returns as soon as it is received
+        instead of waiting for the timeout of the port, and the termination is
+        removed from the returned string. Bytes received after it are kept
+        for the next read.
     :param kwargs: Any valid key-word argument for serial.Serial
     """
 
-    def __init__(self, port, preprocess_reply=None, **kwargs):
+    def __init__(self, port, preprocess_reply=None, read_termination=None, **kwargs):
         super().__init__(preprocess_reply=preprocess_reply)
         if isinstance(port, serial.SerialBase):
             self.connection = port
         else:
             self.connection = serial.Serial(port, **kwargs)
+        self.read_termination = read_termination
+        self._received = bytearray()  # received after the last reply
 
     def write(self, command):
         """ Writes a command to the instrument
@@ -58,12 +65,40 @@ class SerialAdapter(Adapter):
         self.connection.write(command.encode())  # encode added for Python 3
 
     def read(self):
-        """ Reads until the buffer is empty and returns the resulting
-        ASCII respone
+        """ Reads until the read termination is received, or without a
+        :code:`read_termination` until the timeout of the port expires, and
+        returns the resulting ASCII response
 
         :returns: String ASCII response of the instrument.
         """
-        return b"\n".join(self.connection.readlines()).decode()
+        if self.read_termination is None:
+            return (self._take_received() + b"\n".join(self.connection.readlines())).decode()
+        return self._read_until(self.read_termination.encode()).decode()
+
+    def read_bytes(self, size):
+        """ Reads specified number of bytes from the buffer and returns
+        the resulting ASCII response
+
+        :param size: Number of bytes to read from the buffer
+        :returns: Bytes read
+        """
+        return self._read_bytes(size)
+
+    def _receive(self):
+        """ Returns the bytes available on the port, waiting for at least one """
+        # Returns as soon as a byte arrives, or at the timeout of the port
+        data = self.connection.read(max(1, self.connection.in_waiting))
+        if not data:
+            partial = self._take_received()
+            raise ConnectionError("Timeout while waiting for the read termination %r, "
+                                  "received %r" % (self.read_termination, partial))
+        return data
+
+    def _take_received(self):
+        """ Returns and clears the bytes received after the last reply """
+        received = bytes(self._received)
+        self._received.clear()
+        return received
 
     def binary_values(self, command, header_bytes=0, dtype=np.float32):
         """ Returns a numpy array from a query for binary data 
@@ -73,10 +108,40 @@ class SerialAdapter(Adapter):
         :param dtype: The NumPy data type to format the values with
         :returns: NumPy array of values
         """
-        self.connection.write(command.encode())
-        binary = self.connection.read().decode()
+        with self.lock:
+            self.connection.write(command.encode())
+            binary = self._take_received() + b"".join(self.connection.readlines())
         header, data = binary[:header_bytes], binary[header_bytes:]
-        return np.fromstring(data, dtype=dtype)
+        return np.frombuffer(data, dtype=dtype)
+
+    def _read_bytes(self, size):
+        """ Reads exactly :code:`size` bytes from the serial port
+
+        :param size: Number of bytes to read
+        :returns: Bytes read
+        """
+        data = self._received[:size]
+        del self._received[:size]
+        if len(data) < size:
+            data += self.connection.read(size - len(data))
+        if len(data) < size:
+            raise ConnectionError("Timeout after reading %d of %d bytes" % (len(data), size))
+        return bytes(data)
+
+    def _readinto(self, buffer):
+        """ Fills the writable :code:`buffer` with bytes read from the serial port
+
+        :param buffer: writable memoryview of bytes
+        """
+        received = min(len(buffer), len(self._received))
+        buffer[:received] = self._received[:received]
+        del self._received[:received]
+        while received < len(buffer):
+            count = self.connection.readinto(buffer[received:])
+            if not count:
+                raise ConnectionError("Timeout after reading %d of %d bytes"
+                                      % (received, len(buffer)))
+            received += count
 
     def _format_binary_values(self, values, datatype='f', is_big_endian=False, header_fmt = "ieee"):
         """Format values in binary format, used internally in :meth:`.write_binary_values`.
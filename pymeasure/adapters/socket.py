@@ -0,0 +1,135 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import logging
+import socket
+
+from .adapter import Adapter
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class SocketAdapter(Adapter):
+    """ Adapter class for instruments connected via a plain TCP socket, e.g.
+    the raw SCPI port 5025 of LAN instruments.
+
+    Replies are read until the read termination, or for binary data by byte
+    count, so that a query returns as soon as the reply is complete. Bytes
+    received beyond a reply are kept for the next read.
+
+    :param host: host address of the instrument
+    :param port: TCPIP port
+    :param read_termination: String terminating the replies of the instrument,
+        which is removed from the returned string
+    :param write_termination: String appended to each command
+    :param timeout: Time in seconds to wait for the connection and replies
+    :param keepalive: If True, TCP keepalive packets detect a broken connection
+        to an idle instrument
+    :param preprocess_reply: optional callable used to preprocess strings
+        received from the instrument. The callable returns the processed string.
+    """
+
+    def __init__(self, host, port, read_termination="\n", write_termination="\n",
+                 timeout=2, keepalive=False, preprocess_reply=None):
+        super().__init__(preprocess_reply=preprocess_reply)
+        self.host = host
+        self.port = port
+        self.read_termination = read_termination
+        self.write_termination = write_termination
+        self.connection = socket.create_connection((host, port), timeout=timeout)
+        # Commands are small, send them without waiting for more data
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if keepalive:
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._received = bytearray()  # received after the last reply
+
+    def write(self, command):
+        """ Writes a command to the instrument
+
+        :param command: command string to be sent to the instrument
+        """
+        self.connection.sendall((command + self.write_termination).encode())
+
+    def read(self):
+        """ Reads until the read termination and returns the resulting ASCII
+        response without the termination
+
+        :returns: String ASCII response of the instrument.
+        """
+        return self._read_until(self.read_termination.encode()).decode()
+
+    def read_bytes(self, size):
+        """ Reads specified number of bytes
+
+        :param size: Number of bytes to read
+        :returns: Bytes read
+        """
+        return self._read_bytes(size)
+
+    def _receive(self):
+        """ Returns the bytes available on the socket, waiting for at least one """
+        try:
+            data = self.connection.recv(65536)
+        except socket.timeout:
+            partial = bytes(self._received)
+            self._received.clear()
+            raise ConnectionError("Timeout while waiting for a reply, received %r" % partial)
+        if not data:
+            raise ConnectionError("Connection closed by the instrument")
+        return data
+
+    def _read_bytes(self, size):
+        """ Reads exactly :code:`size` bytes
+
+        :param size: Number of bytes to read
+        :returns: Bytes read
+        """
+        while len(self._received) < size:
+            self._received += self._receive()
+        data = bytes(self._received[:size])
+        del self._received[:size]
+        return data
+
+    def _readinto(self, buffer):
+        """ Fills the writable :code:`buffer` with received bytes, receiving
+        directly into it
+
+        :param buffer: writable memoryview of bytes
+        """
+        size = min(len(buffer), len(self._received))
+        buffer[:size] = self._received[:size]
+        del self._received[:size]
+        while size < len(buffer):
+            try:
+                count = self.connection.recv_into(buffer[size:])
+            except socket.timeout:
+                raise ConnectionError("Timeout after reading %d of %d bytes"
+                                      % (size, len(buffer)))
+            if not count:
+                raise ConnectionError("Connection closed by the instrument")
+            size += count
+
+    def __repr__(self):
+        return "<SocketAdapter(host=%s, port=%d)>" % (self.host, self.port)
@@ -40,12 +40,17 @@ class TelnetAdapter(Adapter):
         received from the instrument. The callable returns the processed string.
     :param kwargs: Valid keyword arguments for telnetlib.Telnet, currently
         this is only 'timeout'
+
+    The telnetlib package is removed in Python 3.13. New code should use the
+    :class:`SocketAdapter <pymeasure.adapters.SocketAdapter>`, which also
+    returns replies without a fixed :code:`query_delay`.
     """
 
     def __init__(self, host, port=0, query_delay=0, preprocess_reply=None,
                  **kwargs):
         super().__init__(preprocess_reply=preprocess_reply)
         self.query_delay = query_delay
+        self._received = bytearray()  # received before a binary block
         safe_keywords = ['timeout']
         for kw in kwargs:
             if kw not in safe_keywords:
@@ -67,19 +72,44 @@ class TelnetAdapter(Adapter):
 
         :returns: String ASCII response of the instrument.
         """
+        if self._received:
+            received, self._received = self._received, bytearray()
+            return received.decode() + self.connection.read_very_eager().decode()
         return self.connection.read_some().decode() + \
                 self.connection.read_very_eager().decode()
 
-    def ask(self, command):
-        """ Writes a command to the instrument and returns the resulting ASCII
-        response
+    def _read_bytes(self, size):
+        """ Reads exactly :code:`size` bytes from the socket
 
-        :param command: command string to be sent to the instrument
-        :returns: String ASCII response of the instrument
+        :param size: Number of bytes to read
+        :returns: Bytes read
+        """
+        data = bytearray(size)
+        self._readinto(memoryview(data))
+        return bytes(data)
+
+    def _readinto(self, buffer):
+        """ Fills the writable :code:`buffer` with bytes received on the socket.
+
+        The data bypass the telnet processing of telnetlib, which would drop
+        bytes of the binary data that look like telnet commands.
+
+        :param buffer: writable memoryview of bytes
         """
-        self.write(command)
-        time.sleep(self.query_delay)
-        return self.read()
+        connection = self.connection
+        # Data already received by telnetlib, processed and raw
+        self._received += connection.cookedq + connection.rawq[connection.irawq:]
+        connection.cookedq, connection.rawq, connection.irawq = b"", b"", 0
+        size = min(len(buffer), len(self._received))
+        buffer[:size] = self._received[:size]
+        del self._received[:size]
+        sock = connection.get_socket()
+        while size < len(buffer):
+            count = sock.recv_into(buffer[size:])
+            if not count:
+                raise ConnectionError("Connection closed after reading %d of %d bytes"
+                                      % (size, len(buffer)))
+            size += count
 
     def __repr__(self):
         return "<TelnetAdapter(host=%s, port=%d)>" % (self.connection.host, self.connection.port)
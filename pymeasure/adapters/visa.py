@@ -25,15 +25,46 @@
 import logging
 
 import copy
+import time
+from threading import Lock
+
 import pyvisa
 import numpy as np
 from pkg_resources import parse_version
 
-from .adapter import Adapter
+from .adapter import Adapter, STATUS_REQUEST
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+# Resource managers by VISA library specification, shared by all adapters
+_resource_managers = {}
+_resource_managers_lock = Lock()
+
+
+def resource_manager(visa_library=''):
+    """ Returns the PyVISA ResourceManager of a VISA library, which is opened
+    once per process and shared by all :class:`VISAAdapter` objects.
+
+    :param visa_library: VisaLibrary Instance, path of the VISA library or
+        VisaLibrary spec string (@py or @ni)
+    """
+    if not isinstance(visa_library, str):
+        return pyvisa.ResourceManager(visa_library)
+    with _resource_managers_lock:
+        manager = _resource_managers.get(visa_library)
+        if manager is None or not _is_open(manager):
+            manager = _resource_managers[visa_library] = pyvisa.ResourceManager(visa_library)
+        return manager
+
+
+def _is_open(manager):
+    """ Returns False if the resource manager was closed """
+    try:
+        return manager.session is not None
+    except pyvisa.errors.InvalidSession:
+        return False
+
 
 # noinspection PyPep8Naming,PyUnresolvedReferences
 class VISAAdapter(Adapter):
@@ -56,7 +87,7 @@ class VISAAdapter(Adapter):
         if isinstance(resource_name, int):
             resource_name = "GPIB0::%d::INSTR" % resource_name
         self.resource_name = resource_name
-        self.manager = pyvisa.ResourceManager(visa_library)
+        self.manager = resource_manager(visa_library)
         safeKeywords = [
             'resource_name', 'timeout', 'chunk_size', 'lock', 'query_delay', 'send_end',
             'read_termination', 'write_termination'
@@ -109,7 +140,8 @@ class VISAAdapter(Adapter):
         :param command: SCPI command string to be sent to the instrument
         :returns: String ASCII response of the instrument
         """
-        return self.connection.query(command)
+        with self.lock:
+            return self.connection.query(command)
 
     def ask_values(self, command, **kwargs):
         """ Writes a command to the instrument and returns a list of formatted
@@ -120,7 +152,8 @@ class VISAAdapter(Adapter):
         :param kwargs: Key-word arguments to pass onto `query_ascii_values`
         :returns: Formatted response of the instrument.
         """
-        return self.connection.query_ascii_values(command, **kwargs)
+        with self.lock:
+            return self.connection.query_ascii_values(command, **kwargs)
 
     def binary_values(self, command, header_bytes=0, dtype=np.float32):
         """ Returns a numpy array from a query for binary data
@@ -130,10 +163,30 @@ class VISAAdapter(Adapter):
         :param dtype: The NumPy data type to format the values with
         :returns: NumPy array of values
         """
-        self.connection.write(command)
-        binary = self.connection.read_raw()
+        with self.lock:
+            self.connection.write(command)
+            binary = self.connection.read_raw()
         header, data = binary[:header_bytes], binary[header_bytes:]
-        return np.fromstring(data, dtype=dtype)
+        return np.frombuffer(data, dtype=dtype)
+
+    def _read_bytes(self, size):
+        """ Reads exactly :code:`size` bytes, ignoring the termination character
+
+        :param size: Number of bytes to read
+        :returns: Bytes read
+        """
+        return self.connection.read_bytes(size, break_on_termchar=False)
+
+    def _readinto(self, buffer):
+        """ Fills the writable :code:`buffer` chunk by chunk, so that large blocks
+        are not joined in an intermediate bytes object first
+
+        :param buffer: writable memoryview of bytes
+        """
+        chunk_size = self.connection.chunk_size
+        for start in range(0, len(buffer), chunk_size):
+            stop = min(start + chunk_size, len(buffer))
+            buffer[start:stop] = self._read_bytes(stop - start)
 
     def write_binary_values(self, command, values, **kwargs):
         """ Write binary data to the instrument, e.g. waveform for signal generators
@@ -147,12 +200,35 @@ class VISAAdapter(Adapter):
         return self.connection.write_binary_values(command, values, **kwargs)
 
     def wait_for_srq(self, timeout=25, delay=0.1):
-        """ Blocks until a SRQ, and leaves the bit high
+        """ Blocks until the instrument requests service and returns its status
+        byte. It waits for the service request event of VISA instead of polling,
+        and reads the status byte by a serial poll, which clears the request.
 
         :param timeout: Timeout duration in seconds
-        :param delay: Time delay between checking SRQ in seconds
+        :param delay: Not used, as no polling is necessary
+        :returns: The status byte
+        :raises TimeoutError: If there was no service request within the timeout
         """
-        self.connection.wait_for_srq(timeout * 1000)
+        event = pyvisa.constants.VI_EVENT_SERVICE_REQ
+        mechanism = pyvisa.constants.VI_QUEUE
+        self.connection.enable_event(event, mechanism)
+        try:
+            end = time.monotonic() + timeout
+            # A request before enabling the event does not create one
+            status = self.connection.read_stb()
+            while not status & STATUS_REQUEST:
+                remaining = end - time.monotonic()
+                try:
+                    self.connection.wait_on_event(event, max(0, int(remaining * 1000)))
+                except pyvisa.errors.VisaIOError as exc:
+                    if exc.error_code != pyvisa.constants.StatusCode.error_timeout:
+                        raise
+                    raise TimeoutError("No service request within %g s" % timeout) from exc
+                status = self.connection.read_stb()
+            return status
+        finally:
+            self.connection.disable_event(event, mechanism)
+            self.connection.discard_events(event, mechanism)
 
     def __repr__(self):
         return "<VISAAdapter(resource='%s')>" % self.connection.resource_name
@@ -24,6 +24,8 @@
 
 import logging
 
+import numpy as np
+
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
@@ -32,7 +34,7 @@ try:
 except ImportError:
     log.warning('Failed to import vxi11 package, which is required for the VXI11Adapter')
 
-from .adapter import Adapter
+from .adapter import Adapter, parse_binary_block
 
 
 class VXI11Adapter(Adapter):
@@ -82,7 +84,8 @@ class VXI11Adapter(Adapter):
 
         :returns string containing a response from the device.
         """
-        return self.connection.ask(command)
+        with self.lock:
+            return self.connection.ask(command)
 
     def write_raw(self, command):
         """ Wrapper function for the write_raw command using the
@@ -110,7 +113,21 @@ class VXI11Adapter(Adapter):
 
         :returns binary string containing the response from the device.
         """
-        return self.connection.ask_raw(command)
+        with self.lock:
+            return self.connection.ask_raw(command)
+
+    def read_binary_block(self, dtype=np.float32, is_big_endian=False, out=None,
+                          expect_termination=True):
+        """ Reads an IEEE 488.2 definite length arbitrary block from the instrument.
+
+        The whole VXI-11 message is read at once and the returned array is a
+        view of it unless :code:`out` is given or the bytes have to be swapped.
+        The termination is part of the message, so
+        :code:`expect_termination` has no effect.
+        See :meth:`Adapter.read_binary_block <pymeasure.adapters.Adapter.read_binary_block>`.
+        """
+        return parse_binary_block(self.connection.read_raw(), dtype=dtype,
+                                  is_big_endian=is_big_endian, out=out)
 
     def __repr__(self):
         return '<VXI11Adapter(host={})>'.format(self.connection.host)
@@ -38,8 +38,12 @@ except ImportError:
 from .Qt import QtCore
 
 def _greyscale_colormap(x):
-    """Simple greyscale colormap. Assumes x is already normalized."""
-    return np.array([x,x,x,1])
+    """Simple greyscale colormap. Assumes x is already normalized and
+    maps NaN values to transparent pixels."""
+    x = np.asarray(x, dtype=float)
+    rgba = np.stack([x, x, x, np.ones_like(x)], axis=-1)
+    rgba[np.isnan(x)] = 0
+    return rgba
 
 class ResultsCurve(pg.PlotDataItem):
     """ Creates a curve loaded dynamically from a file through the Results
@@ -58,15 +62,23 @@ class ResultsCurve(pg.PlotDataItem):
         if xerr or yerr:
             self._errorBars = pg.ErrorBarItem(pen=kwargs.get('pen', None))
             self.xerr, self.yerr = xerr, yerr
+        self._plotted = None
 
     def update(self):
-        """Updates the data by polling the results"""
+        """Updates the data by polling the results. The curve is only
+        redrawn if new data has arrived or the axes have changed."""
         if self.force_reload:
             self.results.reload()
+            self._plotted = None
         data = self.results.data  # get the current snapshot
 
+        plotted = (len(data), self.x, self.y)
+        if plotted == self._plotted:
+            return
+        self._plotted = plotted
+
         # Set x-y data
-        self.setData(data[self.x], data[self.y])
+        self.setData(data[self.x].to_numpy(), data[self.y].to_numpy())
 
         # Set error bars if enabled at construction
         if hasattr(self, '_errorBars'):
@@ -101,6 +113,7 @@ class ResultsImage(pg.ImageItem):
         self.ysize = int(np.ceil((self.yend - self.ystart) / self.ystep)) + 1
         self.img_data = np.zeros((self.ysize,self.xsize,4))
         self.force_reload = force_reload
+        self._reset_pixels()
         if 'matplotlib.cm' in sys.modules:
             self.colormap = viridis
         else:
@@ -114,24 +127,67 @@ class ResultsImage(pg.ImageItem):
         self.translate(int(self.xstart/self.xstep)-0.5,
                        int(self.ystart/self.ystep)-0.5) # 0.5 so pixels centered
 
+    def _reset_pixels(self):
+        """ Clears the z values of the pixels, so that all the data is
+        processed again on the next update """
+        self._z_values = np.full((self.ysize, self.xsize), np.nan)
+        self.img_data[:] = 0
+        self._zrange = (np.nan, np.nan)
+        self._rows = 0
+        self._axes = (self.x, self.y, self.z)
+
     def update_img(self):
+        """ Updates the image by only placing the rows of data which have
+        arrived since the previous update. The colors of all pixels are only
+        recomputed if the range of z values has changed.
+        """
         if self.force_reload:
             self.results.reload()
+            self._reset_pixels()
+        if self._axes != (self.x, self.y, self.z):
+            self._reset_pixels()
 
         data = self.results.data
-        zmin = data[self.z].min()
-        zmax = data[self.z].max()
-
-        # populate the image array with the new data
-        for idx, row in data.iterrows():
-            xdat = row[self.x]
-            ydat = row[self.y]
-            xidx, yidx = self.find_img_index(xdat, ydat)
-            self.img_data[yidx,xidx,:] = self.colormap((row[self.z] - zmin)/(zmax-zmin))
+        if len(data) < self._rows:
+            self._reset_pixels()
+        new_data = data.iloc[self._rows:]
+        if len(new_data) == 0:
+            return
+        self._rows = len(data)
+
+        # populate the pixels with the new data
+        xidx = self.find_img_indices(new_data[self.x].to_numpy(dtype=float),
+                                     self.xstart, self.xend, self.xstep, self.xsize)
+        yidx = self.find_img_indices(new_data[self.y].to_numpy(dtype=float),
+                                     self.ystart, self.yend, self.ystep, self.ysize)
+        z = new_data[self.z].to_numpy(dtype=float)
+        self._z_values[yidx, xidx] = z
+
+        zrange = (np.nanmin([self._zrange[0], z.min()]),
+                  np.nanmax([self._zrange[1], z.max()]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if zrange == self._zrange:
+                # only the new pixels need to be colored
+                normalized = (z - zrange[0]) / (zrange[1] - zrange[0])
+                self.img_data[yidx, xidx, :] = self.colormap(normalized)
+            else:
+                measured = ~np.isnan(self._z_values)
+                normalized = (self._z_values[measured] - zrange[0]) / (zrange[1] - zrange[0])
+                self.img_data[measured] = self.colormap(normalized)
+        self._zrange = zrange
 
         # set image data, need to transpose since pyqtgraph assumes column-major order
         self.setImage(image=np.transpose(self.img_data,axes=(1,0,2)))
 
+    def find_img_indices(self, values, start, end, step, size):
+        """ Finds the integer image indices along one axis for an array of
+        data values, analogous to :meth:`find_img_index`.
+        """
+        indices = np.full(len(values), size - 1)  # default to the final pixel
+        in_range = (start <= values) & (values <= end)
+        indices[in_range] = np.floor((values[in_range] - start) / step + 0.5)
+        return indices
+
     def find_img_index(self, x, y):
         """ Finds the integer image indices corresponding to the
         closest x and y points of the data given some x and y data.
@@ -177,30 +233,35 @@ class BufferCurve(pg.PlotDataItem):
         self._ptr = 0
 
     def append(self, x, y, xError=None, yError=None):
-        """ Appends data to the curve with optional errors """
+        """ Appends data to the curve with optional errors. The values are
+        either scalars, or arrays to append a block of points at once """
         if self._buffer is None:
             raise Exception("BufferCurve buffer must be prepared")
-        if len(self._buffer) <= self._ptr:
+        x, y = np.atleast_1d(x), np.atleast_1d(y)
+        end = self._ptr + len(x)
+        if len(self._buffer) < end:
             raise Exception("BufferCurve overflow")
 
         # Set x-y data
-        self._buffer[self._ptr, :2] = [x, y]
-        self.setData(self._buffer[:self._ptr, :2])
+        self._buffer[self._ptr:end, 0] = x
+        self._buffer[self._ptr:end, 1] = y
+        self.setData(self._buffer[:end, :2])
 
         # Set error bars if enabled at construction
         if hasattr(self, '_errorBars'):
-            self._buffer[self._ptr, 2:] = [xError, yError]
+            self._buffer[self._ptr:end, 2] = xError
+            self._buffer[self._ptr:end, 3] = yError
             self._errorBars.setOpts(
-                x=self._buffer[:self._ptr, 0],
-                y=self._buffer[:self._ptr, 1],
-                top=self._buffer[:self._ptr, 3],
-                bottom=self._buffer[:self._ptr, 3],
-                left=self._buffer[:self._ptr, 2],
-                right=self._buffer[:self._ptr, 2],
-                beam=np.max(self._buffer[:self._ptr, 2:])
+                x=self._buffer[:end, 0],
+                y=self._buffer[:end, 1],
+                top=self._buffer[:end, 3],
+                bottom=self._buffer[:end, 3],
+                left=self._buffer[:end, 2],
+                right=self._buffer[:end, 2],
+                beam=np.max(self._buffer[:end, 2:])
             )
 
-        self._ptr += 1
+        self._ptr = end
         self.data_updated.emit()
 
 
@@ -23,9 +23,11 @@
 #
 
 import logging
+from collections import deque
 
 from .Qt import QtCore
 from .thread import StoppableQThread
+from ..experiment.messages import decode_message
 from ..experiment.procedure import Procedure
 
 log = logging.getLogger(__name__)
@@ -33,31 +35,41 @@ log.addHandler(logging.NullHandler())
 
 try:
     import zmq
-    import cloudpickle
 except ImportError:
     zmq = None
-    cloudpickle = None
-    log.warning("ZMQ and cloudpickle are required for TCP communication")
+    log.warning("ZMQ is required for TCP communication")
 
 
 class QListener(StoppableQThread):
     """Base class for QThreads that need to listen for messages
     on a ZMQ TCP port and can be stopped by a thread- and process-safe
     method call
+
+    By default, the QListener runs an event loop in which a
+    :class:`QSocketNotifier` watches the ZMQ socket, and emits the
+    :attr:`message` signal with the topic and record of each message as
+    soon as it arrives, without polling. Subclasses may instead implement
+    their own loop with :meth:`message_waiting` and :meth:`receive`.
     """
 
-    def __init__(self, port, topic='', timeout=0.01):
+    message = QtCore.QSignal(str, object)
+
+    def __init__(self, port, topic='', timeout=0.01, allow_pickle=False):
         """ Constructs the Listener object with a subscriber port
         over which to listen for messages
 
         :param port: TCP port to listen on
         :param topic: Topic to listen on
         :param timeout: Timeout in seconds to recheck stop flag
+        :param allow_pickle: Accept pickled records, which is unsafe if the
+                             publisher is not trusted
         """
         super().__init__()
 
         self.port = port
         self.topic = topic
+        self.allow_pickle = allow_pickle
+        self._pending = deque()  # Records of the last message
         self.context = zmq.Context()
         log.debug("%s has ZMQ Context: %r" % (self.__class__.__name__, self.context))
         self.subscriber = self.context.socket(zmq.SUB)
@@ -71,14 +83,48 @@ class QListener(StoppableQThread):
         self.timeout = timeout
 
     def receive(self, flags=0):
-        topic, record = self.subscriber.recv_serialized(
-            deserialize=lambda msg: (msg[0].decode(), cloudpickle.loads(msg[1])),
-            flags=flags
-        )
-        return topic, record
+        """ Returns the topic and the record of the next message. A message
+        may carry a batch of records, which are returned one by one.
+
+        :raises ValueError: if the message can not be decoded
+        """
+        if not self._pending:
+            frames = self.subscriber.recv_multipart(flags, copy=False)
+            topic, records = decode_message(frames, self.allow_pickle)
+            self._pending.extend((topic, record) for record in records)
+        return self._pending.popleft()
 
     def message_waiting(self):
-        return self.poller.poll(self.timeout)
+        if self._pending:
+            return True
+        return self.poller.poll(self.timeout * 1000)  # poll timeout is in ms
+
+    def _receive_all(self):
+        """ Emits all messages which are waiting. The notifier only signals
+        that the state of the socket changed, so the socket has to be
+        drained each time.
+        """
+        while self._pending or self.subscriber.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+            try:
+                topic, record = self.receive(zmq.NOBLOCK)
+            except ValueError:
+                log.exception("%s received an invalid message", self.__class__.__name__)
+                continue
+            self.message.emit(topic, record)
+
+    def run(self):
+        notifier = QtCore.QSocketNotifier(self.subscriber.getsockopt(zmq.FD),
+                                          QtCore.QSocketNotifier.Read)
+        notifier.activated.connect(lambda *args: self._receive_all())
+        self._receive_all()  # Messages may have arrived before the notifier
+        # Quit if the QListener was stopped before the event loop started
+        QtCore.QTimer.singleShot(0, lambda: self.quit() if self.should_stop() else None)
+        self.exec_()
+        notifier.setEnabled(False)
+
+    def stop(self):
+        super().stop()
+        self.quit()
 
     def __repr__(self):
         return "<%s(port=%s,topic=%s,should_stop=%s)>" % (
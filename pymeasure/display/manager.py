@@ -24,12 +24,13 @@
 
 import logging
 
+from functools import partial
 from os.path import basename
 
 from .Qt import QtCore
 from .listeners import Monitor
 from ..experiment import Procedure
-from ..experiment.workers import Worker
+from ..experiment.workers import PersistentWorker, Worker
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -43,7 +44,11 @@ class Experiment(QtCore.QObject):
     :param results: :class:`.Results` object
     :param curve: :class:`.ResultsCurve` object
     :param browser_item: :class:`.BrowserItem` object
+    :ivar worker_class: class of the worker which runs this experiment, which
+                        overrides the worker class of the :class:`.Manager`
+                        unless it is None (default)
     """
+    worker_class = None
 
     def __init__(self, results, curve, browser_item, parent=None):
         super().__init__(parent)
@@ -119,6 +124,25 @@ class Manager(QtCore.QObject):
     aborted. When instantiated, the Manager is linked to a :class:`.Browser`
     and a PyQtGraph `PlotItem` within the user interface, which are updated
     in accordance with the execution status of the Experiments.
+
+    The Experiments are run by a :class:`.Worker` thread by default. A
+    :class:`.ProcessWorker` runs them in a child process instead, which keeps
+    the user interface responsive during CPU-intensive procedures. The
+    worker class can also be chosen per :class:`.Experiment`.
+
+    Up to `max_concurrent` Experiments are run at the same time, as long as
+    the resources of their procedures (see :meth:`.Procedure.resources`) do
+    not overlap. Procedures which do not declare their resources are run
+    exclusively. An Experiment does not start before an earlier queued
+    Experiment whose resources overlap with its own, so that the order of
+    conflicting Experiments is preserved. Only one running Worker at a time
+    publishes over the TCP port.
+
+    If `persistent` is True, the Experiments are run by
+    :class:`.PersistentWorker` threads, which are kept along with their
+    Monitors and run one Experiment after the other. This avoids the setup
+    cost of a Worker per Experiment for long sequences of short procedures.
+    The worker class is not used in this mode.
     """
     _is_continuous = True
     _start_on_add = True
@@ -130,13 +154,18 @@ class Manager(QtCore.QObject):
     abort_returned = QtCore.QSignal(object)
     log = QtCore.QSignal(object)
 
-    def __init__(self, plot, browser, port=5888, log_level=logging.INFO, parent=None):
+    def __init__(self, plot, browser, port=5888, log_level=logging.INFO, parent=None,
+                 worker_class=Worker, max_concurrent=1, persistent=False):
         super().__init__(parent)
 
         self.experiments = ExperimentQueue()
-        self._worker = None
-        self._running_experiment = None
-        self._monitor = None
+        self.worker_class = worker_class
+        self.max_concurrent = max_concurrent
+        self.persistent = persistent
+        self._workers = {}  # Worker and Monitor of each running Experiment
+        self._persistent_workers = []
+        self._running_experiments = []
+        self._publishing_experiment = None
         self.log_level = log_level
 
         self.plot = plot
@@ -147,22 +176,29 @@ class Manager(QtCore.QObject):
     def is_running(self):
         """ Returns True if a procedure is currently running
         """
-        return self._running_experiment is not None
+        return len(self._running_experiments) > 0
 
     def running_experiment(self):
+        """ Returns the running Experiment, which is the Experiment that
+        started first if several are running
+        """
         if self.is_running():
-            return self._running_experiment
+            return self._running_experiments[0]
         else:
             raise Exception("There is no Experiment running")
 
-    def _update_progress(self, progress):
-        if self.is_running():
-            self._running_experiment.browser_item.setProgress(progress)
+    def running_experiments(self):
+        """ Returns a list of the running Experiments """
+        return list(self._running_experiments)
 
-    def _update_status(self, status):
-        if self.is_running():
-            self._running_experiment.procedure.status = status
-            self._running_experiment.browser_item.setStatus(status)
+    def _update_progress(self, experiment, progress):
+        if experiment in self._running_experiments:
+            experiment.browser_item.setProgress(progress)
+
+    def _update_status(self, experiment, status):
+        if experiment in self._running_experiments:
+            experiment.procedure.status = status
+            experiment.browser_item.setStatus(status)
 
     def _update_log(self, record):
         self.log.emit(record)
@@ -179,7 +215,7 @@ class Manager(QtCore.QObject):
         """
         self.load(experiment)
         self.queued.emit(experiment)
-        if self._start_on_add and not self.is_running():
+        if self._start_on_add and self._can_start():
             self.next()
 
     def remove(self, experiment):
@@ -196,66 +232,151 @@ class Manager(QtCore.QObject):
         for experiment in self.experiments[:]:
             self.remove(experiment)
 
+    def _can_start(self):
+        return len(self._running_experiments) < self.max_concurrent
+
+    @staticmethod
+    def _overlap(experiment, other):
+        """ Returns True if the resources of two Experiments overlap """
+        resources = experiment.procedure.resources()
+        other_resources = other.procedure.resources()
+        if resources is None or other_resources is None:
+            return True
+        return not set(resources).isdisjoint(other_resources)
+
+    def _startable_experiments(self):
+        """ Returns the queued Experiments which can be started now, in
+        the order of the queue
+        """
+        startable = []
+        blocked = list(self._running_experiments)
+        for experiment in self.experiments:
+            if experiment in self._running_experiments:
+                continue  # Started, but possibly still QUEUED in its worker
+            if experiment.procedure.status != Procedure.QUEUED:
+                continue
+            if not any(self._overlap(experiment, other) for other in blocked):
+                startable.append(experiment)
+            # Later Experiments may not overtake conflicting ones
+            blocked.append(experiment)
+        return startable
+
     def next(self):
-        """ Initiates the start of the next experiment in the queue as long
-        as no other experiments are currently running and there is a procedure
-        in the queue.
+        """ Initiates the start of the next experiments in the queue as long
+        as fewer than `max_concurrent` experiments are currently running and
+        there are procedures in the queue whose resources do not overlap with
+        those of the running procedures.
         """
-        if self.is_running():
+        if not self._can_start():
             raise Exception("Another procedure is already running")
-        else:
-            if self.experiments.has_next():
-                log.debug("Manager is initiating the next experiment")
-                experiment = self.experiments.next()
-                self._running_experiment = experiment
-
-                self._worker = Worker(experiment.results, port=self.port, log_level=self.log_level)
-
-                self._monitor = Monitor(self._worker.monitor_queue)
-                self._monitor.worker_running.connect(self._running)
-                self._monitor.worker_failed.connect(self._failed)
-                self._monitor.worker_abort_returned.connect(self._abort_returned)
-                self._monitor.worker_finished.connect(self._finish)
-                self._monitor.progress.connect(self._update_progress)
-                self._monitor.status.connect(self._update_status)
-                self._monitor.log.connect(self._update_log)
-
-                self._monitor.start()
-                self._worker.start()
-
-    def _running(self):
-        if self.is_running():
-            self.running.emit(self._running_experiment)
-
-    def _clean_up(self):
-        self._worker.join()
-        del self._worker
-        self._monitor.wait()
-        del self._monitor
-        self._worker = None
-        self._running_experiment = None
+        for experiment in self._startable_experiments():
+            if not self._can_start():
+                break
+            self._start(experiment)
+
+    def _start(self, experiment):
+        log.debug("Manager is initiating the next experiment")
+        self._running_experiments.append(experiment)
+
+        if self.persistent:
+            worker, monitor = self._persistent_worker()
+            self._workers[experiment] = (worker, monitor)
+            worker.submit(experiment.results)
+            return
+
+        port = None
+        if self._publishing_experiment is None:
+            self._publishing_experiment = experiment
+            port = self.port
+        worker_class = experiment.worker_class or self.worker_class
+        worker = worker_class(experiment.results, port=port, log_level=self.log_level)
+
+        monitor = Monitor(worker.monitor_queue)
+        self._connect(monitor, lambda: experiment)
+        self._workers[experiment] = (worker, monitor)
+
+        monitor.start()
+        worker.start()
+
+    def _persistent_worker(self):
+        """ Returns an idle PersistentWorker and its Monitor, which are
+        created if all existing ones are busy
+        """
+        busy = [worker for worker, monitor in self._workers.values()]
+        for worker, monitor in self._persistent_workers:
+            if worker not in busy:
+                return worker, monitor
+
+        port = None if self._persistent_workers else self.port
+        worker = PersistentWorker(port=port, log_level=self.log_level)
+        monitor = Monitor(worker.monitor_queue)
+        self._connect(monitor, partial(self._experiment_of, worker))
+        self._persistent_workers.append((worker, monitor))
+
+        monitor.start()
+        worker.start()
+        return worker, monitor
+
+    def _experiment_of(self, worker):
+        for experiment, (experiment_worker, monitor) in self._workers.items():
+            if experiment_worker is worker:
+                return experiment
+        return None
+
+    def _connect(self, monitor, experiment_of):
+        """ Connects the signals of a Monitor to the slots of the Manager,
+        which are called with the Experiment returned by experiment_of
+        """
+        monitor.worker_running.connect(partial(self._dispatch, experiment_of, self._running))
+        monitor.worker_failed.connect(partial(self._dispatch, experiment_of, self._failed))
+        monitor.worker_abort_returned.connect(
+            partial(self._dispatch, experiment_of, self._abort_returned))
+        monitor.worker_finished.connect(partial(self._dispatch, experiment_of, self._finish))
+        monitor.progress.connect(partial(self._dispatch, experiment_of, self._update_progress))
+        monitor.status.connect(partial(self._dispatch, experiment_of, self._update_status))
+        monitor.log.connect(self._update_log)
+
+    @staticmethod
+    def _dispatch(experiment_of, slot, *args):
+        experiment = experiment_of()
+        if experiment is not None:
+            slot(experiment, *args)
+
+    def _running(self, experiment):
+        if experiment in self._running_experiments:
+            self.running.emit(experiment)
+
+    def _clean_up(self, experiment):
+        worker, monitor = self._workers.pop(experiment)
+        if not self.persistent:
+            worker.join()
+            monitor.wait()
+        self._running_experiments.remove(experiment)
+        if self._publishing_experiment is experiment:
+            self._publishing_experiment = None
         log.debug("Manager has cleaned up after the Worker")
 
-    def _failed(self):
+    def _failed(self, experiment):
         log.debug("Manager's running experiment has failed")
-        experiment = self._running_experiment
-        self._clean_up()
+        self._clean_up(experiment)
         self.failed.emit(experiment)
 
-    def _abort_returned(self):
+    def _abort_returned(self, experiment):
         log.debug("Manager's running experiment has returned after an abort")
-        experiment = self._running_experiment
-        self._clean_up()
+        self._clean_up(experiment)
         self.abort_returned.emit(experiment)
 
-    def _finish(self):
+    def _finish(self, experiment):
         log.debug("Manager's running experiment has finished")
-        experiment = self._running_experiment
-        self._clean_up()
+        self._clean_up(experiment)
         experiment.browser_item.setProgress(100.)
         experiment.curve.update()
         self.finished.emit(experiment)
-        if self._is_continuous:  # Continue running procedures
+        self._continue()
+
+    def _continue(self):
+        """ Starts the next experiments if the queue is continuously processed """
+        if self._is_continuous and self._can_start():
             self.next()
 
     def resume(self):
@@ -265,9 +386,19 @@ class Manager(QtCore.QObject):
         self._is_continuous = True
         self.next()
 
-    def abort(self):
-        """ Aborts the currently running Experiment, but raises an exception if
-        there is no running experiment
+    def close(self):
+        """ Stops the persistent Workers, which are otherwise kept running
+        """
+        for worker, monitor in self._persistent_workers:
+            worker.stop()
+        for worker, monitor in self._persistent_workers:
+            worker.join()
+            monitor.wait()
+        self._persistent_workers = []
+
+    def abort(self, experiment=None):
+        """ Aborts a running Experiment, or all running Experiments if none
+        is given, but raises an exception if there is no running experiment
         """
         if not self.is_running():
             raise Exception("Attempting to abort when no experiment "
@@ -276,9 +407,13 @@ class Manager(QtCore.QObject):
             self._start_on_add = False
             self._is_continuous = False
 
-            self._worker.stop()
-
-            self.aborted.emit(self._running_experiment)
+            if experiment is None:
+                experiments = self.running_experiments()
+            else:
+                experiments = [experiment]
+            for experiment in experiments:
+                self._workers[experiment][0].abort()
+                self.aborted.emit(experiment)
 
 
 class ImageExperiment(Experiment):
@@ -326,8 +461,11 @@ class ImageManager(Manager):
     abort_returned = QtCore.QSignal(object)
     log = QtCore.QSignal(object)
 
-    def __init__(self, plot, im_plot, browser, port=5888, log_level=logging.INFO, parent=None):
-        super().__init__(plot, browser, port=5888, log_level=logging.INFO, parent=None)
+    def __init__(self, plot, im_plot, browser, port=5888, log_level=logging.INFO, parent=None,
+                 worker_class=Worker, max_concurrent=1, persistent=False):
+        super().__init__(plot, browser, port=port, log_level=log_level, parent=parent,
+                         worker_class=worker_class, max_concurrent=max_concurrent,
+                         persistent=persistent)
         # overrides necessary variables to make image features work
         self.experiments = ImageExperimentQueue()
 
@@ -346,13 +484,11 @@ class ImageManager(Manager):
         super().load(experiment)
         self.im_plot.addItem(experiment.image)
 
-    def _finish(self):
+    def _finish(self, experiment):
         log.debug("Manager's running experiment has finished")
-        experiment = self._running_experiment
-        self._clean_up()
+        self._clean_up(experiment)
         experiment.browser_item.setProgress(100.)
         experiment.image.update_img()
         experiment.curve.update()
         self.finished.emit(experiment)
-        if self._is_continuous:  # Continue running procedures
-            self.next()
+        self._continue()
@@ -310,7 +310,7 @@ class ImageFrame(QtGui.QFrame):
                     if item.results.procedure.status == Procedure.RUNNING:
                         item.update_img()
                 else:
-                    item.update()
+                    item.update_img()
 
     def parse_axis(self, axis):
         """ Returns the units of an axis by searching the string
@@ -45,6 +45,7 @@ from .widgets import (
     DirectoryLineEdit,
 )
 from ..experiment.results import Results
+from ..experiment.workers import Worker
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -135,7 +136,8 @@ class ManagedWindow(QtGui.QMainWindow):
 
     The ManagedWindow uses a Manager to control Workers in a Queue,
     and provides a simple interface. The :meth:`~.queue` method must be
-    overridden by the child class.
+    overridden by the child class. The `worker_class`, `max_concurrent` and
+    `persistent` arguments are passed on to the :class:`.Manager`.
 
     .. seealso::
 
@@ -155,7 +157,8 @@ class ManagedWindow(QtGui.QMainWindow):
 
     def __init__(self, procedure_class, inputs=(), displays=(), x_axis=None, y_axis=None,
                  log_channel='', log_level=logging.INFO, parent=None, sequencer=False,
-                 sequencer_inputs=None, sequence_file=None, inputs_in_scrollarea=False, directory_input=False):
+                 sequencer_inputs=None, sequence_file=None, inputs_in_scrollarea=False, directory_input=False,
+                 worker_class=Worker, max_concurrent=1, persistent=False):
         super().__init__(parent)
         app = QtCore.QCoreApplication.instance()
         app.aboutToQuit.connect(self.quit)
@@ -169,6 +172,9 @@ class ManagedWindow(QtGui.QMainWindow):
         self.directory_input = directory_input
         self.log = logging.getLogger(log_channel)
         self.log_level = log_level
+        self.worker_class = worker_class
+        self.max_concurrent = max_concurrent
+        self.persistent = persistent
         log.setLevel(log_level)
         self.log.setLevel(log_level)
         self.x_axis, self.y_axis = x_axis, y_axis
@@ -218,7 +224,10 @@ class ManagedWindow(QtGui.QMainWindow):
             parent=self
         )
 
-        self.manager = Manager(self.plot, self.browser, log_level=self.log_level, parent=self)
+        self.manager = Manager(self.plot, self.browser, log_level=self.log_level, parent=self,
+                               worker_class=self.worker_class,
+                               max_concurrent=self.max_concurrent,
+                               persistent=self.persistent)
         self.manager.abort_returned.connect(self.abort_returned)
         self.manager.queued.connect(self.queued)
         self.manager.running.connect(self.running)
@@ -303,6 +312,7 @@ class ManagedWindow(QtGui.QMainWindow):
     def quit(self, evt=None):
         if self.manager.is_running():
             self.abort()
+        self.manager.close()  # Stops the persistent workers
 
         self.close()
 
@@ -343,9 +353,8 @@ class ManagedWindow(QtGui.QMainWindow):
             # Remove
             action_remove = QtGui.QAction(menu)
             action_remove.setText("Remove Graph")
-            if self.manager.is_running():
-                if self.manager.running_experiment() == experiment:  # Experiment running
-                    action_remove.setEnabled(False)
+            if experiment in self.manager.running_experiments():  # Experiment running
+                action_remove.setEnabled(False)
             action_remove.triggered.connect(lambda: self.remove_experiment(experiment))
             menu.addAction(action_remove)
 
@@ -534,7 +543,7 @@ class ManagedWindow(QtGui.QMainWindow):
             self.browser_widget.clear_button.setEnabled(True)
 
     def finished(self, experiment):
-        if not self.manager.experiments.has_next():
+        if not self.manager.experiments.has_next() and not self.manager.is_running():
             self.abort_button.setEnabled(False)
             self.browser_widget.clear_button.setEnabled(True)
 
@@ -556,7 +565,8 @@ class ManagedImageWindow(QtGui.QMainWindow):
 
     The MangedImageWindow uses a Manager to control Workers in a Queue,
     and provides a simple interface. The :meth:`~.queue` method must be
-    overridden by the child class.
+    overridden by the child class. The `worker_class`, `max_concurrent` and
+    `persistent` arguments are passed on to the :class:`.ImageManager`.
 
     .. seealso::
 
@@ -575,7 +585,8 @@ class ManagedImageWindow(QtGui.QMainWindow):
     """
 
     def __init__(self, procedure_class, x_axis, y_axis, z_axis=None, inputs=(), displays=(),
-                 log_channel='', log_level=logging.INFO, parent=None):
+                 log_channel='', log_level=logging.INFO, parent=None,
+                 worker_class=Worker, max_concurrent=1, persistent=False):
         super().__init__(parent)
         app = QtCore.QCoreApplication.instance()
         app.aboutToQuit.connect(self.quit)
@@ -584,6 +595,9 @@ class ManagedImageWindow(QtGui.QMainWindow):
         self.displays = displays
         self.log = logging.getLogger(log_channel)
         self.log_level = log_level
+        self.worker_class = worker_class
+        self.max_concurrent = max_concurrent
+        self.persistent = persistent
         log.setLevel(log_level)
         self.log.setLevel(log_level)
         self.x_axis, self.y_axis, self.z_axis = x_axis, y_axis, z_axis
@@ -631,7 +645,10 @@ class ManagedImageWindow(QtGui.QMainWindow):
             parent=self
         )
 
-        self.manager = ImageManager(self.plot, self.im_plot, self.browser, log_level=self.log_level, parent=self)
+        self.manager = ImageManager(self.plot, self.im_plot, self.browser, log_level=self.log_level,
+                                    parent=self, worker_class=self.worker_class,
+                                    max_concurrent=self.max_concurrent,
+                                    persistent=self.persistent)
         self.manager.abort_returned.connect(self.abort_returned)
         self.manager.queued.connect(self.queued)
         self.manager.running.connect(self.running)
@@ -684,6 +701,7 @@ class ManagedImageWindow(QtGui.QMainWindow):
     def quit(self, evt=None):
         if self.manager.is_running():
             self.abort()
+        self.manager.close()  # Stops the persistent workers
 
         self.close()
 
@@ -729,9 +747,8 @@ class ManagedImageWindow(QtGui.QMainWindow):
             # Remove
             action_remove = QtGui.QAction(menu)
             action_remove.setText("Remove Graph")
-            if self.manager.is_running():
-                if self.manager.running_experiment() == experiment:  # Experiment running
-                    action_remove.setEnabled(False)
+            if experiment in self.manager.running_experiments():  # Experiment running
+                action_remove.setEnabled(False)
             action_remove.triggered.connect(lambda: self.remove_experiment(experiment))
             menu.addAction(action_remove)
 
@@ -939,6 +956,6 @@ class ManagedImageWindow(QtGui.QMainWindow):
             self.browser_widget.clear_button.setEnabled(True)
 
     def finished(self, experiment):
-        if not self.manager.experiments.has_next():
+        if not self.manager.experiments.has_next() and not self.manager.is_running():
             self.abort_button.setEnabled(False)
             self.browser_widget.clear_button.setEnabled(True)
@@ -25,8 +25,9 @@
 from .parameters import (Parameter, IntegerParameter, FloatParameter,
                         VectorParameter, ListParameter, BooleanParameter, Measurable)
 from .procedure import Procedure, UnknownProcedure
-from .results import Results, unique_filename
-from .workers import Worker
+from .results import Results, SharedDataBuffer, unique_filename
+from .storage import CSVStorage, ColumnStorage
+from .workers import Worker, PersistentWorker, ProcessWorker
 from .listeners import Listener, Recorder
 from .config import get_config
 from .experiment import Experiment, get_array, get_array_steps, get_array_zero
@@ -111,6 +111,7 @@ class Experiment(object):
         self.plots = []
         self.figs = []
         self._data = []
+        self._data_length = None
         self.analyse = analyse
         self._data_timeout = 10
 
@@ -139,8 +140,12 @@ class Experiment(object):
     @property
     def data(self):
         """Data property which returns analysed data, if an analyse function
-        is defined, otherwise returns the raw data."""
-        self._data = self.analyse(self.results.data.copy())
+        is defined, otherwise returns the raw data. The analysis is only
+        repeated when new data has arrived."""
+        data = self.results.data
+        if len(data) != self._data_length:
+            self._data_length = len(data)
+            self._data = self.analyse(data.copy())
         return self._data
 
     def wait_for_data(self):
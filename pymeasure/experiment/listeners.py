@@ -23,8 +23,14 @@
 #
 
 import logging
-from logging import StreamHandler, FileHandler
+from collections import deque
+from logging import StreamHandler
+from queue import Empty
+from threading import Lock, Thread
+from time import time
 
+from .messages import decode_message
+from .storage import record_rows
 from ..log import QueueListener
 from ..thread import StoppableThread
 
@@ -33,11 +39,9 @@ log.addHandler(logging.NullHandler())
 
 try:
     import zmq
-    import cloudpickle
 except ImportError:
     zmq = None
-    cloudpickle = None
-    log.warning("ZMQ and cloudpickle are required for TCP communication")
+    log.warning("ZMQ is required for TCP communication")
 
 
 class Monitor(QueueListener):
@@ -51,20 +55,31 @@ class Monitor(QueueListener):
 class Listener(StoppableThread):
     """Base class for Threads that need to listen for messages on
     a ZMQ TCP port and can be stopped by a thread-safe method call
+
+    By default, the Listener blocks until a message arrives and passes
+    each message to :meth:`handle`, which is meant to be overridden. Stopping
+    the Listener wakes it up through an internal socket, so that neither
+    receiving nor stopping requires polling. Subclasses may instead
+    implement their own loop with :meth:`message_waiting` and
+    :meth:`receive`.
     """
 
-    def __init__(self, port, topic='', timeout=0.01):
+    def __init__(self, port, topic='', timeout=0.01, allow_pickle=False):
         """ Constructs the Listener object with a subscriber port
         over which to listen for messages
 
         :param port: TCP port to listen on
         :param topic: Topic to listen on
         :param timeout: Timeout in seconds to recheck stop flag
+        :param allow_pickle: Accept pickled records, which is unsafe if the
+                             publisher is not trusted
         """
         super().__init__()
 
         self.port = port
         self.topic = topic
+        self.allow_pickle = allow_pickle
+        self._pending = deque()  # Records of the last message
         self.context = zmq.Context()
         log.debug("%s has ZMQ Context: %r" % (self.__class__.__name__, self.context))
         self.subscriber = self.context.socket(zmq.SUB)
@@ -73,20 +88,82 @@ class Listener(StoppableThread):
         log.info("%s connected to '%s' topic on tcp://localhost:%d" % (
             self.__class__.__name__, topic, port))
 
+        # The stop signal is sent over a pair of sockets to wake up the poller
+        address = 'inproc://%s-stop-%x' % (self.__class__.__name__, id(self))
+        self._stop_receiver = self.context.socket(zmq.PAIR)
+        self._stop_receiver.bind(address)
+        self._stop_sender = self.context.socket(zmq.PAIR)
+        self._stop_sender.connect(address)
+        self._stop_lock = Lock()
+
         self.poller = zmq.Poller()
         self.poller.register(self.subscriber, zmq.POLLIN)
+        self.poller.register(self._stop_receiver, zmq.POLLIN)
         self.timeout = timeout
 
     def receive(self, flags=0):
-        topic, record = self.subscriber.recv_serialized(
-            deserialize=lambda msg: (msg[0].decode(), cloudpickle.loads(msg[1])),
-            flags=flags
-        )
-        return topic, record
+        """ Returns the topic and the record of the next message. A message
+        may carry a batch of records, which are returned one by one.
+
+        :raises ValueError: if the message can not be decoded
+        """
+        if not self._pending:
+            frames = self.subscriber.recv_multipart(flags, copy=False)
+            topic, records = decode_message(frames, self.allow_pickle)
+            self._pending.extend((topic, record) for record in records)
+        return self._pending.popleft()
+
+    def message_waiting(self, timeout=None):
+        """Check if we have a message, wait at most until timeout, or until
+        the Listener is stopped.
+
+        :param timeout: Timeout in seconds, which defaults to the timeout of
+                        the Listener, or a negative value to wait indefinitely
+        """
+        if self._pending:
+            return True
+        if timeout is None:
+            timeout = self.timeout
+        events = dict(self.poller.poll(timeout * 1000 if timeout >= 0 else None))  # in ms
+        return events.get(self.subscriber, 0) & zmq.POLLIN != 0
+
+    def handle(self, topic, record):
+        """ Handles a message received by :meth:`run`. Does nothing by
+        default, but can be overridden by the child class.
+
+        :param topic: topic of the message
+        :param record: the received record
+        """
+        pass
+
+    def run(self):
+        while not self.should_stop():
+            if self.message_waiting(timeout=-1):
+                try:
+                    topic, record = self.receive()
+                except ValueError:
+                    log.exception("%s received an invalid message", self.__class__.__name__)
+                    continue
+                self.handle(topic, record)
+
+    def stop(self):
+        super().stop()
+        with self._stop_lock:
+            if not self._stop_sender.closed:
+                try:
+                    self._stop_sender.send(b'', zmq.NOBLOCK)
+                except zmq.Again:
+                    pass  # The Listener has already been woken up
 
-    def message_waiting(self):
-        """Check if we have a message, wait at most until timeout."""
-        return self.poller.poll(self.timeout * 1000)  # poll timeout is in ms
+    def close(self):
+        """ Stops the Listener if it is running and closes its sockets """
+        if self.is_alive():
+            self.stop()
+            Thread.join(self)
+        with self._stop_lock:
+            for socket in (self.subscriber, self._stop_receiver, self._stop_sender):
+                socket.close(linger=0)
+        self.context.term()
 
     def __repr__(self):
         return "<%s(port=%s,topic=%s,should_stop=%s)>" % (
@@ -97,23 +174,98 @@ class Recorder(QueueListener):
     """ Recorder loads the initial Results for a filepath and
     appends data by listening for it over a queue. The queue
     ensures that no data is lost between the Recorder and Worker.
+
+    In the buffered mode, which is meant for high data rates, the
+    Recorder drains the queue in batches and writes each batch to the
+    storage in one pass, instead of writing every record separately.
+    The accumulated records are written when either :code:`flush_rows`
+    rows are pending or :code:`flush_interval` seconds have passed,
+    and all pending records are written when the Recorder is stopped.
+
+    :param results: :class:`.Results` object to record the data for
+    :param queue: queue from which the records are taken
+    :param buffered: toggles the buffered mode
+    :param flush_interval: maximum time in seconds that records are held
+                           before they are written in the buffered mode
+    :param flush_rows: maximum number of rows that are held before
+                       they are written in the buffered mode, where a
+                       block record counts with all its rows
+    :param kwargs: keyword arguments for the storage handlers or writers
     """
 
-    def __init__(self, results, queue, **kwargs):
+    def __init__(self, results, queue, buffered=False, flush_interval=0.5,
+                 flush_rows=1000, **kwargs):
         """ Constructs a Recorder to record the Procedure data into
         the file path, by waiting for data on the subscription port
         """
+        self.buffered = buffered
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+
         handlers = []
-        for filename in results.data_filenames:
-            fh = FileHandler(filename=filename, **kwargs)
-            fh.setFormatter(results.formatter)
-            fh.setLevel(logging.NOTSET)
-            handlers.append(fh)
+        self.writers = []
+        if buffered:
+            for storage in results.storages:
+                self.writers.append(storage.writer(results.formatter, **kwargs))
+        else:
+            for storage in results.storages:
+                fh = storage.handler(**kwargs)
+                fh.setFormatter(results.formatter)
+                fh.setLevel(logging.NOTSET)
+                handlers.append(fh)
 
         super().__init__(queue, *handlers)
 
+    def start(self):
+        if not self.buffered:
+            return super().start()
+        self._thread = Thread(target=self._record_batches)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _record_batches(self):
+        """ Drains the queue in batches and writes the pending records
+        according to the flush policy, until the sentinel is received
+        """
+        pending = []
+        rows = 0
+        deadline = time() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                record = self.queue.get(timeout=max(deadline - time(), 0))
+                while record is not self._sentinel:
+                    pending.append(record)
+                    rows += record_rows(record)
+                    if rows >= self.flush_rows:
+                        break
+                    record = self.queue.get_nowait()
+                else:
+                    stopping = True
+            except Empty:
+                pass
+
+            if stopping or rows >= self.flush_rows or time() >= deadline:
+                if pending:
+                    self.flush(pending)
+                    pending = []
+                    rows = 0
+                deadline = time() + self.flush_interval
+
+        for writer in self.writers:
+            writer.close()
+
+    def flush(self, records):
+        """ Writes a batch of records to all storages """
+        for writer in self.writers:
+            try:
+                writer.append(records)
+            except Exception:
+                log.exception("Recorder failed to write %d records", len(records))
+
     def stop(self):
         for handler in self.handlers:
             handler.close()
 
-        super().stop()
+        if self._thread is not None:
+            super().stop()
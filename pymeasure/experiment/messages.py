@@ -0,0 +1,210 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+"""
+Wire format of the messages which a :class:`.Worker` publishes over ZMQ.
+
+A message consists of the frames ``[topic, header, *buffers]``. The header
+holds a list of one or more records, which are encoded with msgpack (or
+JSON if msgpack is not installed). NumPy arrays, pandas Series and bytes are
+not included in the header, but are referenced by the index of the frame
+which carries their raw buffer, so that a subscriber can reconstruct the
+arrays with :func:`numpy.frombuffer` without copying. DataFrames are encoded
+as a dict of such column arrays.
+
+Objects which cannot be encoded this way are pickled with cloudpickle, but
+only if the publisher and the subscriber opt in, since unpickling data from
+an untrusted source is unsafe.
+"""
+
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+MSGPACK, JSON, PICKLE = b'm', b'j', b'p'
+PICKLE_PROTOCOL = b'\x80'  # First byte of the frame of a pickled record
+
+
+def _encode(value, buffers):
+    """ Returns the value in a form which can be packed, while appending
+    the buffers of arrays and bytes to the list of buffers
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and msgpack is not None:
+        if not -2**63 <= value < 2**64:
+            raise OverflowError("Integers beyond 64 bits can not be encoded")
+        return value
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        # e.g. complex or datetime scalars, which can not be packed
+        return _encode(value.item(), buffers)
+    if isinstance(value, pd.Series):
+        value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Arrays of objects can not be encoded")
+        array = np.ascontiguousarray(value)
+        buffers.append(array)
+        return {'__ndarray__': len(buffers) - 1, 'dtype': array.dtype.str,
+                'shape': list(array.shape)}
+    if isinstance(value, (bytes, bytearray)):
+        buffers.append(value)
+        return {'__bytes__': len(buffers) - 1}
+    if isinstance(value, pd.DataFrame):
+        return {'__dataframe__': [_encode(value[column], buffers) for column in value],
+                'columns': [_encode(column, buffers) for column in value.columns]}
+    if isinstance(value, dict):
+        return {key: _encode(item, buffers) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, buffers) for item in value]
+    raise TypeError("Objects of type %s can not be encoded" % type(value).__name__)
+
+
+def _buffer(frame):
+    return frame.buffer if hasattr(frame, 'buffer') else memoryview(frame)
+
+
+def _decode(value, frames):
+    """ Returns the value with the references to frames replaced by
+    arrays, bytes or DataFrames
+    """
+    if isinstance(value, dict):
+        if '__ndarray__' in value:
+            array = np.frombuffer(_buffer(frames[value['__ndarray__']]),
+                                  dtype=np.dtype(value['dtype']))
+            return array.reshape(value['shape'])
+        if '__bytes__' in value:
+            return bytes(_buffer(frames[value['__bytes__']]))
+        if '__dataframe__' in value:
+            columns = [_decode(column, frames) for column in value['columns']]
+            data = [_decode(column, frames) for column in value['__dataframe__']]
+            return pd.DataFrame(dict(zip(columns, data)), columns=columns)
+        return {key: _decode(item, frames) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item, frames) for item in value]
+    return value
+
+
+def _pack(records):
+    if msgpack is not None:
+        return MSGPACK + msgpack.packb(records, use_bin_type=True)
+    return JSON + json.dumps(records).encode()
+
+
+def _unpack(header):
+    header = bytes(_buffer(header))
+    if header[:1] == MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack is required to decode the message")
+        return msgpack.unpackb(header[1:], raw=False)
+    if header[:1] == JSON:
+        return json.loads(header[1:].decode())
+    raise ValueError("Unknown message format")
+
+
+class MessageBatch(object):
+    """ Collects records of a topic, which are sent as one message
+
+    :param topic: topic of the records
+    """
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.records = []
+        self.buffers = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        """ Adds a record to the batch
+
+        :raises TypeError: if the record can not be encoded
+        :raises OverflowError: if an integer of the record exceeds 64 bits
+        """
+        count = len(self.buffers)
+        try:
+            self.records.append(_encode(record, self.buffers))
+        except (TypeError, OverflowError):
+            del self.buffers[count:]
+            raise
+
+    def frames(self):
+        """ Returns the frames of the message """
+        return [self.topic.encode(), _pack(self.records)] + self.buffers
+
+
+def encode_message(topic, records, pickle_fallback=False):
+    """ Returns the frames of a message with a list of records
+
+    :param topic: topic of the message
+    :param records: list of records
+    :param pickle_fallback: pickle the records if they can not be encoded
+    :raises TypeError: if the records can not be encoded without pickling
+    :raises OverflowError: if an integer exceeds 64 bits and pickling is not allowed
+    """
+    batch = MessageBatch(topic)
+    try:
+        for record in records:
+            batch.add(record)
+    except (TypeError, OverflowError):
+        if not pickle_fallback or cloudpickle is None:
+            raise
+        return [topic.encode(), PICKLE, cloudpickle.dumps(list(records))]
+    return batch.frames()
+
+
+def decode_message(frames, allow_pickle=False):
+    """ Returns the topic and the list of records of a message. The arrays
+    of the records are read-only views of the frames.
+
+    :param frames: frames of the message (bytes or :class:`zmq.Frame`)
+    :param allow_pickle: accept pickled records, which is unsafe if the
+                         message may come from an untrusted source
+    :raises ValueError: if the message can not be decoded
+    """
+    topic = bytes(_buffer(frames[0])).decode()
+    header = bytes(_buffer(frames[1])[:1])
+    if header == PICKLE or header == PICKLE_PROTOCOL:
+        if not allow_pickle:
+            raise ValueError("Received a pickled message, which is not allowed")
+        if header == PICKLE:
+            return topic, cloudpickle.loads(_buffer(frames[2]))
+        return topic, [cloudpickle.loads(_buffer(frames[1]))]  # Single pickled record
+    return topic, _decode(_unpack(frames[1]), frames[2:])
@@ -51,9 +51,17 @@ class Procedure(object):
     
     If keyword arguments are provided, they are added to the object as
     attributes.
+
+    The RESOURCES attribute declares the instruments or other resources
+    (e.g. their addresses) which the procedure uses, so that a
+    :class:`.Manager` can run procedures with disjoint resources at the same
+    time. It defaults to None, which means that the procedure may use any
+    resource and is therefore run exclusively. Override :meth:`resources`
+    if the resources depend on the parameters.
     """
 
     DATA_COLUMNS = []
+    RESOURCES = None
     MEASURE = {}
     FINISHED, FAILED, ABORTED, QUEUED, RUNNING = 0, 1, 2, 3, 4
     STATUS_STRINGS = {
@@ -181,6 +189,12 @@ class Procedure(object):
                     raise NameError("Parameter '%s' does not belong to '%s'" % (
                         name, repr(self)))
 
+    def resources(self):
+        """ Returns the collection of resources which the procedure uses,
+        or None if it may use any resource. Returns RESOURCES by default.
+        """
+        return self.RESOURCES
+
     def startup(self):
         """ Executes the commands needed at the start-up of the measurement
         """
@@ -200,6 +214,18 @@ class Procedure(object):
         pass
 
     def emit(self, topic, record):
+        """ Emits a record of some topic, which is monkey patched by a worker.
+
+        For the :code:`'results'` topic, the record is either a dictionary
+        with the values of a single row, or a block of rows, given as a
+        :class:`pandas.DataFrame` or a dictionary of arrays (scalar values are
+        repeated for each row). A block is passed on and recorded as a whole,
+        which is much faster than emitting its rows one by one.
+
+        .. code-block:: python
+
+            self.emit('results', {'Time (s)': times, 'Voltage (V)': voltages})
+        """
         raise NotImplementedError('should be monkey patched by a worker')
 
     def should_stop(self):
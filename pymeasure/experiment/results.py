@@ -30,11 +30,20 @@ import sys
 from copy import deepcopy
 from importlib.machinery import SourceFileLoader
 from datetime import datetime
+from threading import Lock
 
+import numpy as np
 import pandas as pd
 
 from .procedure import Procedure, UnknownProcedure
 from .parameters import Parameter
+from .storage import CSVStorage, block_columns, is_block, storage_class
+
+import multiprocessing
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    shared_memory = None  # Python < 3.8
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -80,18 +89,356 @@ class CSVFormatter(logging.Formatter):
         self.delimiter = delimiter
 
     def format(self, record):
-        """Formats a record as csv.
+        """Formats a record as csv. A block of rows (a DataFrame or a dict
+        with array values) is formatted as one line per row.
 
         :param record: record to format.
         :type record: dict
         :return: a string
         """
+        if is_block(record):
+            columns = [column.tolist() for column in block_columns(record, self.columns)]
+            return '\n'.join(self.delimiter.join('{}'.format(value) for value in row)
+                             for row in zip(*columns))
         return self.delimiter.join('{}'.format(record[x]) for x in self.columns)
 
     def format_header(self):
         return self.delimiter.join(self.columns)
 
 
+class DataBuffer(object):
+    """ Preallocated columnar buffer which holds the data of a
+    :class:`.Results` object in memory. Rows are appended individually or in
+    blocks and the capacity is doubled whenever it is exhausted, so that
+    appending costs O(new rows) on average. Each column is stored in its own
+    array, which allows :meth:`frame` to return the filled part of the
+    buffer as a :class:`pandas.DataFrame` without copying.
+
+    The data type of each column is promoted as required by the appended
+    rows (e.g. from integers to floats, or to objects for a text column),
+    without affecting the other columns.
+
+    :param columns: list of column names
+    :param capacity: number of rows that are initially preallocated
+    """
+
+    def __init__(self, columns, capacity=1000):
+        self.columns = list(columns)
+        self.capacity = max(int(capacity), 1)
+        self._arrays = None
+        self._length = 0
+        self._lock = Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self):
+        return self._length
+
+    def _allocate(self, capacity, dtypes):
+        """ Returns new uninitialized column arrays for the given number of
+        rows and the data types of the columns
+        """
+        return [np.empty(capacity, dtype=dtype) for dtype in dtypes]
+
+    def _promote(self, dtypes):
+        """ Returns the data types of the columns which can hold both the
+        existing rows and rows of the given data types
+        """
+        if self._arrays is not None:
+            dtypes = [np.result_type(array.dtype, dtype)
+                      for array, dtype in zip(self._arrays, dtypes)]
+        return [dtype if np.dtype(dtype).kind in 'biufc' else np.dtype(object)
+                for dtype in dtypes]
+
+    def _reserve(self, length, dtypes):
+        """ Ensures that the buffer can hold the requested number of rows
+        with the requested data types, by reallocating it if necessary
+        """
+        if self._arrays is None:
+            self._arrays = self._allocate(max(self.capacity, length), dtypes)
+            return
+        capacity = len(self._arrays[0])
+        changed = any(array.dtype != dtype for array, dtype in zip(self._arrays, dtypes))
+        if changed or length > capacity:
+            while capacity < length:
+                capacity *= 2
+            arrays = self._allocate(capacity, dtypes)
+            for array, old in zip(arrays, self._arrays):
+                array[:self._length] = old[:self._length]
+            self._arrays = arrays
+
+    def _set_length(self, length):
+        self._length = length
+
+    def _values(self, data):
+        """ Returns the columns of a record, block or frame as 1D arrays """
+        if isinstance(data, pd.DataFrame):
+            return [data[column].to_numpy() for column in self.columns]
+        if is_block(data):
+            return block_columns(data, self.columns)
+        values = []
+        for column in self.columns:
+            value = np.array([data[column]])
+            if value.dtype.kind not in 'biufc':
+                value = np.array([data[column]], dtype=object)
+            values.append(value)
+        return values
+
+    def append(self, data):
+        """ Appends a row or a block of rows to the buffer
+
+        :param data: a dict of values (a row), a dict of arrays (a block) or
+                     a :class:`pandas.DataFrame`, containing (at least) the
+                     columns of the buffer
+        """
+        values = self._values(data)
+        count = len(values[0]) if values else 0
+        if count == 0:
+            return
+        with self._lock:
+            dtypes = self._promote([value.dtype for value in values])
+            length = self._length + count
+            self._reserve(length, dtypes)
+            for array, value in zip(self._arrays, values):
+                array[self._length:length] = value
+            self._set_length(length)
+
+    def clear(self):
+        """ Removes all rows, while keeping the allocated memory """
+        with self._lock:
+            self._set_length(0)
+
+    def column(self, name):
+        """ Returns a view of the filled rows of a column
+
+        :param name: name of the column
+        """
+        index = self.columns.index(name)
+        with self._lock:
+            if self._arrays is None:
+                return np.empty(0)
+            return self._arrays[index][:self._length]
+
+    @property
+    def array(self):
+        """ A copy of the filled rows of the buffer as a 2D array, whose data
+        type holds all the columns
+        """
+        with self._lock:
+            if self._arrays is None:
+                return np.empty((0, len(self.columns)))
+            return np.column_stack([array[:self._length] for array in self._arrays])
+
+    def frame(self):
+        """ Returns a :class:`pandas.DataFrame` which is a view of the
+        filled rows of the buffer
+        """
+        with self._lock:
+            if self._arrays is None:
+                return pd.DataFrame(columns=self.columns)
+            arrays = [array[:self._length] for array in self._arrays]
+        return pd.DataFrame(dict(zip(self.columns, arrays)), columns=self.columns,
+                            copy=False)
+
+    def close(self):
+        """ Releases the memory of the buffer """
+        pass
+
+
+class SharedDataBuffer(DataBuffer):
+    """ :class:`DataBuffer` whose rows are stored in shared memory (see
+    :mod:`multiprocessing.shared_memory`), so that the data can be read
+    without copying by other processes, such as an out-of-process plotter.
+
+    Pickling a shared buffer does not copy the data: the unpickled buffer
+    attaches to the shared memory of the original buffer and follows the
+    rows that are appended to it. Only the original buffer can append rows,
+    and it releases the shared memory when it is closed or garbage collected.
+
+    The memory is allocated in segments, which are replaced as the buffer
+    grows. A small control segment holds the number of filled rows, the
+    capacity and a generation counter, from which the name of the current
+    data segment is derived.
+
+    :param columns: list of column names
+    :param capacity: number of rows that are initially preallocated
+    :param dtype: numeric data type of all columns
+    """
+
+    def __init__(self, columns, capacity=1000, dtype=np.float64):
+        if shared_memory is None:
+            raise ImportError("SharedDataBuffer requires Python 3.8 or newer")
+        super().__init__(columns, capacity)
+        self.dtype = np.dtype(dtype)
+        self._array = None
+        if self.dtype.kind not in 'biufc':
+            raise TypeError("SharedDataBuffer only holds numeric data")
+        self._owner = True
+        self._pid = os.getpid()
+        self._control = shared_memory.SharedMemory(
+            create=True, size=3 * np.dtype(np.int64).itemsize)
+        self._segment = None
+        self._generation = 0
+        self._state = np.ndarray((3,), dtype=np.int64, buffer=self._control.buf)
+        self._state[:] = 0  # length, capacity, generation
+        self._name = self._control.name
+
+    @property
+    def name(self):
+        """ Name of the shared memory control segment """
+        return self._name
+
+    def __getstate__(self):
+        return {'name': self.name, 'pid': self._pid, 'columns': self.columns,
+                'capacity': self.capacity, 'dtype': self.dtype.str}
+
+    def __setstate__(self, state):
+        self.columns = state['columns']
+        self.capacity = state['capacity']
+        self.dtype = np.dtype(state['dtype'])
+        self._lock = Lock()
+        self._owner = False
+        self._pid = state['pid']
+        self._array = None
+        self._arrays = None
+        self._length = 0
+        self._segment = None
+        self._generation = 0
+        self._name = state['name']
+        self._control = None  # Attached on first use
+        self._state = None
+
+    def _attach(self, name):
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+        except TypeError:
+            segment = shared_memory.SharedMemory(name=name)
+        if os.getpid() != self._pid and multiprocessing.parent_process() is None:
+            # An unrelated process has its own resource tracker, which would
+            # otherwise unlink the segment when this process exits
+            try:
+                resource_tracker.unregister(segment._name, 'shared_memory')
+            except Exception:
+                pass
+        return segment
+
+    def _segment_name(self, generation):
+        return "%s_%d" % (self._name, generation)
+
+    def _promote(self, dtypes):
+        if any(np.dtype(dtype).kind not in 'biufc' for dtype in dtypes):
+            raise TypeError("SharedDataBuffer only holds numeric data")
+        return [self.dtype] * len(dtypes)
+
+    def _allocate(self, capacity, dtypes):
+        generation = self._generation + 1
+        segment = shared_memory.SharedMemory(
+            name=self._segment_name(generation), create=True,
+            size=max(capacity * len(self.columns) * self.dtype.itemsize, 1))
+        array = np.ndarray((capacity, len(self.columns)), dtype=self.dtype,
+                           buffer=segment.buf, order='F')
+        self._segment, self._generation = segment, generation
+        self._array = array
+        return self._split(array)
+
+    def _split(self, array):
+        """ Returns the columns of the 2D array as views """
+        return [array[:, i] for i in range(len(self.columns))]
+
+    def _reserve(self, length, dtypes):
+        if not self._owner:
+            raise RuntimeError("Only the original SharedDataBuffer can append rows")
+        segment = self._segment
+        super()._reserve(length, dtypes)
+        if segment is not self._segment:
+            self._state[1:] = len(self._array), self._generation
+            if segment is not None:
+                self._close_segment(segment)
+
+    def _set_length(self, length):
+        self._length = length
+        self._state[0] = length
+
+    def _close_segment(self, segment):
+        try:
+            segment.close()
+        except BufferError:
+            pass  # Views of the rows are still in use
+        if self._owner:
+            segment.unlink()
+
+    def _release(self):
+        if self._segment is not None:
+            self._array = self._arrays = None
+            self._close_segment(self._segment)
+            self._segment = None
+
+    def _follow(self):
+        """ Attaches to the current data segment of the original buffer """
+        if self._control is None:
+            self._control = self._attach(self._name)
+            self._state = np.ndarray((3,), dtype=np.int64, buffer=self._control.buf)
+        length, capacity, generation = (int(value) for value in self._state)
+        if generation != self._generation:
+            try:
+                segment = self._attach(self._segment_name(generation))
+                array = np.ndarray((capacity, len(self.columns)), dtype=self.dtype,
+                                   buffer=segment.buf, order='F')
+            except (OSError, TypeError):
+                return  # The buffer is being reallocated, so try again later
+            self._release()
+            self._segment, self._array = segment, array
+            self._arrays = self._split(array)
+            self._generation = generation
+        self._length = min(length, 0 if self._array is None else len(self._array))
+
+    def __len__(self):
+        if not self._owner:
+            with self._lock:
+                self._follow()
+        return self._length
+
+    @property
+    def array(self):
+        """ A view of the filled rows of the buffer as a 2D array """
+        with self._lock:
+            if not self._owner:
+                self._follow()
+            if self._array is None:
+                return np.empty((0, len(self.columns)), dtype=self.dtype)
+            return self._array[:self._length]
+
+    def column(self, name):
+        return self.array[:, self.columns.index(name)]
+
+    def frame(self):
+        return pd.DataFrame(self.array, columns=self.columns, copy=False)
+
+    def close(self):
+        """ Detaches from the shared memory, which is released if this is
+        the original buffer
+        """
+        with self._lock:
+            self._state = None
+            self._release()
+            if self._control is not None:
+                self._close_segment(self._control)
+                self._control = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
 class Results(object):
     """ The Results class provides a convenient interface to reading and
     writing data in connection with a :class:`.Procedure` object.
@@ -99,11 +446,19 @@ class Results(object):
     :cvar COMMENT: The character used to identify a comment (default: #)
     :cvar DELIMITER: The character used to delimit the data (default: ,)
     :cvar LINE_BREAK: The character used for line breaks (default \\n)
-    :cvar CHUNK_SIZE: The length of the data chuck that is read
+    :cvar CHUNK_SIZE: The number of rows initially preallocated for the data
 
     :param procedure: Procedure object
     :param data_filename: The data filename where the data is or should be
                           stored
+    :param storage: The storage class, which is constructed with each data
+                    filename and determines the file format. Defaults to
+                    :class:`.CSVStorage`, while :class:`.ColumnStorage`
+                    stores the data in binary form.
+    :param buffer: The class of the in-memory buffer of the data, which is
+                   constructed with the data columns and :attr:`CHUNK_SIZE`.
+                   Use :class:`.SharedDataBuffer` to share the data with
+                   other processes without copying.
     """
 
     COMMENT = '#'
@@ -111,13 +466,12 @@ class Results(object):
     LINE_BREAK = "\n"
     CHUNK_SIZE = 1000
 
-    def __init__(self, procedure, data_filename):
+    def __init__(self, procedure, data_filename, storage=CSVStorage, buffer=DataBuffer):
         if not isinstance(procedure, Procedure):
             raise ValueError("Results require a Procedure object")
         self.procedure = procedure
         self.procedure_class = procedure.__class__
         self.parameters = procedure.parameter_objects()
-        self._header_count = -1
 
         self.formatter = CSVFormatter(columns=self.procedure.DATA_COLUMNS)
 
@@ -129,16 +483,21 @@ class Results(object):
         self.data_filename = data_filename
         self.data_filenames = data_filenames
 
-        if os.path.exists(data_filename):  # Assume header is already written
+        self.storages = [storage(filename) for filename in data_filenames]
+        self.storage = self.storages[0]
+        self.buffer_class = buffer
+        self._buffer = None
+        self._live = False
+        self._lock = Lock()
+        self._read_error = None  # Message of the last failed read, logged once
+
+        if self.storage.exists():  # Assume header is already written
             self.reload()
             self.procedure.status = Procedure.FINISHED
             # TODO: Correctly store and retrieve status
         else:
-            for filename in self.data_filenames:
-                with open(filename, 'w') as f:
-                    f.write(self.header())
-                    f.write(self.labels())
-            self._data = None
+            for storage in self.storages:
+                storage.create(self.header(), self.procedure.DATA_COLUMNS)
 
     def __getstate__(self):
         # Get all information needed to reconstruct procedure
@@ -152,10 +511,12 @@ class Results(object):
         state = self.__dict__.copy()
         del state['procedure']
         del state['procedure_class']
+        del state['_lock']
         return state
 
     def __setstate__(self, state):
         self.__dict__.update(state)
+        self._lock = Lock()
 
         # Restore the procedure
         module = SourceFileLoader(self._module, self._file).load_module()
@@ -173,6 +534,10 @@ class Results(object):
         del self._module
         del self._file
 
+        if self._live and not isinstance(self._buffer, SharedDataBuffer):
+            # The rows appended in memory are not shared, so read the storage
+            self.reload()
+
     def header(self):
         """ Returns a text header to accompany a datafile so that the procedure
         can be reconstructed
@@ -185,7 +550,6 @@ class Results(object):
         for name, parameter in self.parameters.items():
             h.append("\t%s: %s" % (parameter.name, str(parameter).encode("unicode_escape").decode("utf-8")))
         h.append("Data:")
-        self._header_count = len(h)
         h = [Results.COMMENT + l for l in h]  # Comment each line
         return Results.LINE_BREAK.join(h) + Results.LINE_BREAK
 
@@ -270,73 +634,108 @@ class Results(object):
     @staticmethod
     def load(data_filename, procedure_class=None):
         """ Returns a Results object with the associated Procedure object and
-        data
+        data. The storage class is determined from the existing data.
         """
-        header = ""
-        header_read = False
-        header_count = 0
-        with open(data_filename, 'r') as f:
-            while not header_read:
-                line = f.readline()
-                if line.startswith(Results.COMMENT):
-                    header += line.strip() + Results.LINE_BREAK
-                    header_count += 1
-                else:
-                    header_read = True
-        procedure = Results.parse_header(header[:-1], procedure_class)
-        results = Results(procedure, data_filename)
-        results._header_count = header_count
+        storage = storage_class(data_filename)(data_filename)
+        header = storage.read_header()
+        procedure = Results.parse_header(header, procedure_class)
+        results = Results(procedure, storage.filename, storage=type(storage))
         return results
 
+    @property
+    def live(self):
+        """ True if the data is appended to memory by a running
+        :class:`.Worker`, in which case :attr:`data` does not read the storage
+        """
+        return self._live
+
+    @property
+    def buffer(self):
+        """ The in-memory buffer of the data, which is None until the data
+        columns are known
+        """
+        return self._buffer
+
     @property
     def data(self):
-        # Need to update header count for correct referencing
-        if self._header_count == -1:
-            self._header_count = len(
-                self.header()[-1].split(Results.LINE_BREAK))
-        if self._data is None or len(self._data) == 0:
-            # Data has not been read
-            try:
-                self.reload()
-            except Exception:
-                # Empty dataframe
-                self._data = pd.DataFrame(columns=self.procedure.DATA_COLUMNS)
-        else:  # Concatenate additional data, if any, to already loaded data
-            skiprows = len(self._data) + self._header_count
-            chunks = pd.read_csv(
-                self.data_filename,
-                comment=Results.COMMENT,
-                header=0,
-                names=self._data.columns,
-                chunksize=Results.CHUNK_SIZE, skiprows=skiprows, iterator=True
-            )
-            try:
-                tmp_frame = pd.concat(chunks, ignore_index=True)
-                # only append new data if there is any
-                # if no new data, tmp_frame dtype is object, which override's
-                # self._data's original dtype - this can cause problems plotting
-                # (e.g. if trying to plot int data on a log axis)
-                if len(tmp_frame) > 0:
-                    self._data = pd.concat([self._data, tmp_frame],
-                                           ignore_index=True)
-            except Exception:
-                pass  # All data is up to date
-        return self._data
+        """ A :class:`pandas.DataFrame` of the data. The returned frame is a
+        view of an in-memory buffer, which should not be modified. Only the
+        rows appended to the storage since the previous access are read,
+        unless the data is :attr:`live`, in which case no reading is required.
+        """
+        with self._lock:
+            if not self._live:
+                try:
+                    self._read_new_data()
+                except (OSError, ValueError) as exc:
+                    # Keep the data that is already loaded, e.g. while the
+                    # file is being written, but report lasting errors
+                    if str(exc) != self._read_error:
+                        log.warning("Could not read the new data of '%s': %s",
+                                    self.data_filename, exc)
+                    self._read_error = str(exc)
+                else:
+                    self._read_error = None
+        if self._buffer is None:
+            columns = self.storage.columns or self.procedure.DATA_COLUMNS
+            return pd.DataFrame(columns=columns)
+        return self._buffer.frame()
+
+    def _read_new_data(self):
+        """ Appends the rows which were written to the storage since the
+        previous read to the data buffer, which is rebuilt if the storage
+        was read again from the start
+        """
+        new_data = self.storage.read()
+        if getattr(self.storage, 'restarted', False) and self._buffer is not None:
+            # The rows read before were truncated or replaced
+            self._buffer.close()
+            self._buffer = None
+        if self._buffer is None and self.storage.columns is not None:
+            self._buffer = self.buffer_class(self.storage.columns, Results.CHUNK_SIZE)
+        if len(new_data) > 0:
+            self._buffer.append(new_data)
+
+    def start_live(self):
+        """ Reads the rows that are already stored, after which the data is
+        :attr:`live`: it is appended to memory as it is emitted and the
+        storage is no longer read. This is called by a :class:`.Worker`
+        before the procedure runs.
+        """
+        with self._lock:
+            if self._live:
+                return
+            self._read_new_data()
+            if self._buffer is None:
+                self._buffer = self.buffer_class(
+                    self.procedure.DATA_COLUMNS, Results.CHUNK_SIZE)
+            self._live = True
+
+    def append(self, record):
+        """ Appends a record of the 'results' topic, which is a row or a
+        block of rows, to the in-memory data. This is done by the
+        :class:`.Worker` as the record is emitted, while the storage remains
+        the durable copy of the data.
+
+        :param record: a dict of values, a dict of arrays or a
+                       :class:`pandas.DataFrame`
+        """
+        # The storage does not contain this record yet, since the Worker
+        # records it afterwards
+        self.start_live()
+        self._buffer.append(record)
 
     def reload(self):
         """ Preforms a full reloading of the file data, neglecting
         any changes in the comments
         """
-        chunks = pd.read_csv(
-            self.data_filename,
-            comment=Results.COMMENT,
-            chunksize=Results.CHUNK_SIZE,
-            iterator=True
-        )
-        try:
-            self._data = pd.concat(chunks, ignore_index=True)
-        except Exception:
-            self._data = chunks.read()
+        with self._lock:
+            self.storage.reset()
+            if self._buffer is not None:
+                self._buffer.close()
+            self._buffer = None
+            self._live = False
+            self._read_new_data()
 
     def __repr__(self):
         return "<{}(filename='{}',procedure={},shape={})>".format(
@@ -0,0 +1,464 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import io
+import json
+import locale
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+def is_block(record):
+    """ Returns True if a results record holds a block of rows, i.e. it is a
+    :class:`pandas.DataFrame` or a dictionary with array values, rather than
+    a dictionary with the values of a single row.
+    """
+    if isinstance(record, pd.DataFrame):
+        return True
+    return isinstance(record, dict) and any(
+        isinstance(value, (np.ndarray, pd.Series)) and np.ndim(value) > 0
+        for value in record.values()
+    )
+
+
+def block_columns(record, columns):
+    """ Returns the columns of a block record as 1D arrays of equal length,
+    where scalar values are repeated for each row.
+
+    :param record: block record, see :func:`is_block`
+    :param columns: list of column labels
+    """
+    return np.broadcast_arrays(*[np.asarray(record[c]) for c in columns])
+
+
+def record_rows(record):
+    """ Returns the number of rows which a results record holds, i.e. 1 for
+    a single row or the length of the arrays of a block
+
+    :param record: results record, see :func:`is_block`
+    """
+    if not is_block(record):
+        return 1
+    if isinstance(record, pd.DataFrame):
+        return len(record)
+    return max(len(value) for value in record.values() if np.ndim(value) > 0)
+
+
+class CSVTailReader(object):
+    """ Reads a CSV data file incrementally. The reader keeps track of the
+    byte offset up to which the file has been parsed, so that each call of
+    :meth:`read` only parses the lines which were appended since the previous
+    call, instead of scanning the file from the start. A partially written
+    last line is kept aside until it is completed.
+
+    Comment lines are skipped and the first uncommented line is taken
+    as the column labels. If the file was truncated or replaced, it is read
+    again from the start and :attr:`restarted` is set.
+
+    :param filename: path of the CSV file
+    :param delimiter: delimiter between columns
+    :param comment: character which identifies a comment line
+    """
+
+    def __init__(self, filename, delimiter=',', comment='#'):
+        self.filename = filename
+        self.delimiter = delimiter
+        self.comment = comment
+        self.restarted = False  # The last read started over
+        self.reset()
+
+    def reset(self):
+        """ Resets the reader to the start of the file """
+        self.columns = None
+        self.offset = 0
+        self._partial = b''
+
+    def read(self):
+        """ Parses the complete lines appended to the file since the
+        previous call
+
+        :returns: :class:`pandas.DataFrame` of the new rows, which is empty
+                  if no rows were appended, or of all rows if the file was
+                  truncated or replaced
+        """
+        self.restarted = False
+        with open(self.filename, 'rb') as f:
+            f.seek(0, io.SEEK_END)
+            if f.tell() < self.offset:  # The file was truncated or replaced
+                self.reset()
+                self.restarted = True
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+
+        chunk = self._partial + chunk
+        end = chunk.rfind(b'\n') + 1
+        chunk, self._partial = chunk[:end], chunk[end:]
+        if chunk.strip():
+            try:
+                data = pd.read_csv(
+                    io.BytesIO(chunk),
+                    sep=self.delimiter,
+                    comment=self.comment,
+                    header=0 if self.columns is None else None,
+                    names=self.columns,
+                )
+            except pd.errors.EmptyDataError:
+                pass  # Only comments have been written so far
+            else:
+                if self.columns is None:
+                    self.columns = list(data.columns)
+                return data
+        return pd.DataFrame(columns=self.columns)
+
+
+class StorageHandler(logging.Handler):
+    """ Logging handler which appends the records that it handles to
+    a storage backend, used by the :class:`.Recorder` for storages that
+    do not write text.
+
+    :param storage: storage object providing an :code:`append` method
+    """
+
+    def __init__(self, storage):
+        super().__init__()
+        self.storage = storage
+
+    def emit(self, record):
+        try:
+            self.storage.append([record])
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.storage.close()
+        super().close()
+
+
+class CSVWriter(object):
+    """ Writes batches of records to a CSV data file. Each batch is
+    formatted in one pass and written to the file with a single
+    unbuffered write, used by the :class:`.Recorder` in buffered mode.
+
+    :param filename: path of the data file
+    :param formatter: :class:`.CSVFormatter` which formats a record
+    :param line_break: character used for line breaks
+    :param encoding: text encoding of the file
+    """
+
+    def __init__(self, filename, formatter, line_break='\n', encoding=None):
+        self.formatter = formatter
+        self.line_break = line_break
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self._file = open(filename, 'ab', buffering=0)
+
+    def append(self, records):
+        """ Appends a batch of records to the file
+
+        :param records: list of dictionaries, which map the column labels
+                        to the values of a row, or blocks of rows
+        """
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.formatter.format(record) + self.line_break)
+            except Exception:
+                log.exception("Could not format record %r", record)
+        data = memoryview(''.join(lines).encode(self.encoding))
+        while data:
+            data = data[self._file.write(data):]
+
+    def close(self):
+        self._file.close()
+
+
+class CSVStorage(object):
+    """ Stores the data of a :class:`.Results` object in a text file of
+    comma-separated values, which starts with the commented header that
+    describes the procedure. This is the default storage.
+
+    :param filename: path of the data file
+    :param delimiter: delimiter between columns
+    :param comment: character which identifies a comment line
+    :param line_break: character used for line breaks
+    """
+
+    def __init__(self, filename, delimiter=',', comment='#', line_break='\n'):
+        self.filename = filename
+        self.delimiter = delimiter
+        self.comment = comment
+        self.line_break = line_break
+        self._reader = CSVTailReader(filename, delimiter, comment)
+
+    @staticmethod
+    def matches(filename):
+        """ Returns True if the path can be opened by this storage """
+        return os.path.isfile(filename)
+
+    def exists(self):
+        """ Returns True if the data file already exists """
+        return os.path.exists(self.filename)
+
+    @property
+    def columns(self):
+        """ The column labels found in the file, or None if they have
+        not been read yet """
+        return self._reader.columns
+
+    def create(self, header, columns):
+        """ Creates the data file and writes the header and column labels
+
+        :param header: text header, with each line commented out
+        :param columns: list of column labels
+        """
+        with open(self.filename, 'w') as f:
+            f.write(header)
+            f.write(self.delimiter.join(columns) + self.line_break)
+
+    def read_header(self):
+        """ Returns the commented header text of the data file """
+        header = []
+        with open(self.filename, 'r') as f:
+            for line in f:
+                if not line.startswith(self.comment):
+                    break
+                header.append(line.strip())
+        return self.line_break.join(header)
+
+    def read(self):
+        """ Returns a :class:`pandas.DataFrame` of the rows which were
+        written since the previous read, or of all rows if the file was
+        truncated or replaced (see :attr:`restarted`) """
+        return self._reader.read()
+
+    @property
+    def restarted(self):
+        """ True if the last :meth:`read` started over from the beginning of
+        the file, so that the rows read before are no longer valid """
+        return self._reader.restarted
+
+    def reset(self):
+        """ Resets reading to the start of the file """
+        self._reader.reset()
+
+    def handler(self, **kwargs):
+        """ Returns a logging handler which writes to the data file
+
+        :param kwargs: keyword arguments for :class:`logging.FileHandler`
+        """
+        return logging.FileHandler(filename=self.filename, **kwargs)
+
+    def writer(self, formatter, encoding=None, **kwargs):
+        """ Returns a :class:`.CSVWriter` which appends batches of records
+        to the data file
+
+        :param formatter: :class:`.CSVFormatter` which formats a record
+        :param encoding: text encoding of the file
+        """
+        return CSVWriter(self.filename, formatter, self.line_break, encoding)
+
+
+class ColumnStorage(object):
+    """ Stores the data of a :class:`.Results` object in binary form, to
+    avoid the cost of formatting and parsing text for high data rates.
+    The data filename refers to a directory, in which each column is
+    written to a separate file of raw values, to which new rows are
+    appended in chunks. A JSON sidecar file holds the header, which
+    describes the procedure in the same format as the :class:`.CSVStorage`
+    header, as well as the column labels and data types.
+
+    .. code-block:: python
+
+        results = Results(procedure, 'data.cols', storage=ColumnStorage)
+
+    A single column can be loaded without PyMeasure, using the
+    :code:`files` and :code:`dtypes` entries of the sidecar file and
+    :code:`numpy.fromfile`.
+
+    :param filename: path of the data directory, or of its sidecar file
+    :param dtype: NumPy data type of the columns, either a single type or
+                  a dictionary by column label (default: float64)
+    """
+
+    SIDECAR = 'metadata.json'
+
+    def __init__(self, filename, dtype=np.float64):
+        if os.path.basename(filename) == self.SIDECAR:
+            filename = os.path.dirname(filename)
+        self.filename = filename
+        self.dtype = dtype
+        self._metadata = None
+        self._rows = 0
+        self._files = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_files'] = None  # Open files are not transferable
+        return state
+
+    @classmethod
+    def matches(cls, filename):
+        """ Returns True if the path is a column storage directory,
+        or its sidecar file """
+        if os.path.basename(filename) == cls.SIDECAR:
+            return os.path.isfile(filename)
+        return os.path.isfile(os.path.join(filename, cls.SIDECAR))
+
+    def exists(self):
+        """ Returns True if the sidecar file already exists """
+        return os.path.exists(os.path.join(self.filename, self.SIDECAR))
+
+    @property
+    def metadata(self):
+        """ The content of the sidecar file """
+        if self._metadata is None:
+            with open(os.path.join(self.filename, self.SIDECAR), 'r') as f:
+                self._metadata = json.load(f)
+        return self._metadata
+
+    @property
+    def columns(self):
+        """ The column labels of the stored data """
+        return self.metadata['columns']
+
+    def create(self, header, columns):
+        """ Creates the data directory, with the sidecar file and an empty
+        file for each column
+
+        :param header: text header, with each line commented out
+        :param columns: list of column labels
+        """
+        if isinstance(self.dtype, dict):
+            dtypes = [np.dtype(self.dtype.get(c, np.float64)).str for c in columns]
+        else:
+            dtypes = [np.dtype(self.dtype).str for c in columns]
+        self._metadata = {
+            'header': header,
+            'columns': list(columns),
+            'dtypes': dtypes,
+            'files': ['column_%d.bin' % i for i in range(len(columns))],
+        }
+        os.makedirs(self.filename, exist_ok=True)
+        for name in self._metadata['files']:
+            open(os.path.join(self.filename, name), 'wb').close()
+        with open(os.path.join(self.filename, self.SIDECAR), 'w') as f:
+            json.dump(self._metadata, f, indent=2)
+
+    def read_header(self):
+        """ Returns the commented header text stored in the sidecar file """
+        return self.metadata['header'].rstrip('\n')
+
+    def _column_files(self):
+        metadata = self.metadata
+        for name, file, dtype in zip(metadata['columns'], metadata['files'],
+                                     metadata['dtypes']):
+            yield name, os.path.join(self.filename, file), np.dtype(dtype)
+
+    def read(self):
+        """ Returns a :class:`pandas.DataFrame` of the rows which were
+        written since the previous read. Rows for which not all columns
+        have been written yet are left for the next read.
+
+        :raises ValueError: if the column files hold fewer rows than were
+            read before, i.e. they were truncated or replaced
+        """
+        files = list(self._column_files())
+        rows = min(os.path.getsize(path) // dtype.itemsize
+                   for name, path, dtype in files)
+        count = rows - self._rows
+        if count < 0:
+            raise ValueError(
+                "The column files of '%s' hold %d rows, but %d rows were read "
+                "before; they were truncated or replaced, so call reset() to "
+                "read them again" % (self.filename, rows, self._rows))
+        data = {}
+        for name, path, dtype in files:
+            data[name] = np.fromfile(path, dtype=dtype, count=count,
+                                     offset=self._rows * dtype.itemsize)
+        self._rows = rows
+        return pd.DataFrame(data, columns=self.columns)
+
+    def reset(self):
+        """ Resets reading to the first row """
+        self._rows = 0
+
+    def append(self, records):
+        """ Appends rows to the column files, with a single unbuffered write
+        per column. All columns are converted before any is written, so
+        that a value which can not be converted leaves the files aligned.
+
+        :param records: list of dictionaries, which map the column labels
+                        to the values of a row, or blocks of rows
+        """
+        if any(map(is_block, records)):
+            blocks = [block_columns(record, self.columns) if is_block(record)
+                      else [[record[name]] for name in self.columns]
+                      for record in records]
+        else:
+            blocks = None
+        columns = []
+        for i, (name, path, dtype) in enumerate(self._column_files()):
+            if blocks is None:
+                values = np.array([record[name] for record in records], dtype=dtype)
+            else:
+                values = np.concatenate([np.asarray(block[i], dtype=dtype)
+                                         for block in blocks])
+            columns.append(values)
+        if self._files is None:
+            self._files = [open(path, 'ab', buffering=0) for name, path, dtype
+                           in self._column_files()]
+        for f, values in zip(self._files, columns):
+            data = memoryview(values.tobytes())
+            while data:
+                data = data[f.write(data):]
+
+    def close(self):
+        """ Closes the column files that were opened for writing """
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+    def handler(self, **kwargs):
+        """ Returns a logging handler which appends to the column files """
+        return StorageHandler(self)
+
+    def writer(self, formatter=None, **kwargs):
+        """ Returns the storage itself, which appends batches of records
+        to the column files """
+        return self
+
+
+def storage_class(filename):
+    """ Returns the storage class which is able to open an existing
+    data file or directory, defaulting to :class:`.CSVStorage` """
+    if ColumnStorage.matches(filename):
+        return ColumnStorage
+    return CSVStorage
@@ -28,24 +28,180 @@ import time
 import traceback
 from logging.handlers import QueueHandler
 from importlib.machinery import SourceFileLoader
-from queue import Queue
+from queue import Empty, Queue
+from threading import Condition, Thread
 
 from .listeners import Recorder
+from .messages import MessageBatch, encode_message
 from .procedure import Procedure, ProcedureWrapper
 from .results import Results
 from ..log import TopicQueueHandler
-from ..thread import StoppableThread
+from ..process import StoppableProcess, context
+from ..thread import InterruptableEvent, StoppableThread
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
 try:
     import zmq
-    import cloudpickle
 except ImportError:
     zmq = None
-    cloudpickle = None
-    log.warning("ZMQ and cloudpickle are required for TCP communication")
+    log.warning("ZMQ is required for TCP communication")
+
+
+class Publisher(object):
+    """ Publisher emits messages over a ZMQ TCP port through an XPUB
+    socket. Unlike a PUB socket, it receives the subscriptions of the
+    subscribers, so that it can wait until they are ready to receive
+    messages (see :meth:`wait_for_subscribers`), instead of waiting for a
+    fixed time after binding the port.
+
+    The records are encoded in the format of :mod:`pymeasure.experiment.messages`.
+    The records of each topic which are sent within `batch_interval` are
+    coalesced into one message per topic, which is sent by a flusher thread
+    when the interval has passed, or right away when `batch_size` records
+    are pending. The order of the records of a topic is kept, while records
+    of other topics, e.g. progress between results, do not break up a batch.
+
+    :param port: TCP port to publish on
+    :param batch_interval: maximum time in seconds that records are held
+                           before they are sent, or 0 to send every record
+                           immediately
+    :param batch_size: maximum number of records in one message
+    :param pickle_fallback: pickle records which can not be encoded otherwise,
+                            which requires subscribers that allow pickled
+                            messages
+    """
+
+    def __init__(self, port, batch_interval=0.01, batch_size=1000, pickle_fallback=False):
+        self.port = port
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.pickle_fallback = pickle_fallback
+        self.subscriptions = 0
+        self._batches = {}  # topic: MessageBatch pending
+        self._flusher = None
+        self._closing = False
+        self._lock = Condition()  # The flusher thread sends the batches
+        self.context = zmq.Context()
+        log.debug("Publisher ZMQ Context: %r" % self.context)
+        self.socket = self.context.socket(zmq.XPUB)
+        self.socket.setsockopt(zmq.XPUB_VERBOSE, 1)  # Pass every subscription
+        try:
+            self.socket.bind('tcp://*:%d' % port)
+        except Exception:
+            self.socket.close()
+            self.context.term()
+            raise
+        log.info("Publisher connected to tcp://*:%d" % port)
+
+    def _receive_subscriptions(self, timeout=0):
+        """ Counts the subscriptions received within the timeout in seconds """
+        with self._lock:
+            if not self.socket.poll(int(timeout * 1000), zmq.POLLIN):
+                return
+            while True:
+                try:
+                    message = self.socket.recv(zmq.NOBLOCK)
+                except zmq.Again:
+                    return
+                if message[:1] == b'\x01':
+                    self.subscriptions += 1
+                elif message[:1] == b'\x00':
+                    self.subscriptions = max(self.subscriptions - 1, 0)
+
+    def wait_for_subscribers(self, count=1, timeout=0.3):
+        """ Waits until at least the given number of subscriptions have been
+        received, which ensures that messages are delivered to subscribers
+        that connected before. Returns True if the subscriptions were
+        received, or False after the timeout.
+
+        :param count: number of subscriptions to wait for
+        :param timeout: maximum time to wait in seconds
+        """
+        deadline = time.monotonic() + timeout
+        self._receive_subscriptions()
+        while self.subscriptions < count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._receive_subscriptions(remaining)
+        return True
+
+    def send(self, topic, record):
+        """ Publishes a record on the topic, possibly in a batch with the
+        following records
+
+        :raises TypeError: if the record can not be encoded
+        :raises OverflowError: if an integer of the record exceeds 64 bits
+        """
+        with self._lock:
+            idle = not self._batches  # the flusher waits for a record
+            batch = self._batches.get(topic)
+            if batch is None:
+                batch = self._batches[topic] = MessageBatch(topic)
+            try:
+                batch.add(record)
+            except (TypeError, OverflowError):
+                if not self.pickle_fallback:
+                    raise
+                self._flush_topic(topic)
+                self.socket.send_multipart(
+                    encode_message(topic, [record], pickle_fallback=True))
+                return
+            if len(batch) >= self.batch_size or self.batch_interval <= 0:
+                self._flush_topic(topic)
+            elif self._flusher is None:
+                self._flusher = Thread(target=self._run_flusher, daemon=True,
+                                       name="Publisher flusher %d" % self.port)
+                self._flusher.start()
+            elif idle:
+                self._lock.notify()
+
+    def _run_flusher(self):
+        """ Sends the pending batches every `batch_interval` while there are any """
+        with self._lock:
+            while not self._closing:
+                if not self._batches:
+                    self._lock.wait()
+                    continue
+                self._lock.wait(self.batch_interval)
+                for topic in list(self._batches):
+                    count = len(self._batches[topic])
+                    try:
+                        self._flush_topic(topic)
+                    except Exception:
+                        # Keep the thread alive for the following records
+                        log.exception("Publisher dropped %d '%s' records which "
+                                      "could not be sent", count, topic)
+
+    def _flush_topic(self, topic):
+        batch = self._batches.pop(topic, None)
+        if batch is not None and len(batch) > 0:
+            self.socket.send_multipart(batch.frames(), copy=False)
+
+    def _flush(self):
+        for topic in list(self._batches):
+            self._flush_topic(topic)
+
+    def flush(self):
+        """ Sends the pending records """
+        with self._lock:
+            if not self.socket.closed:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if not self.socket.closed:
+                self._flush()
+            self._closing = True
+            self._lock.notify()
+            # For some reason, we need to close the socket before the
+            # context, otherwise context termination hangs.
+            self.socket.close()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.context.term()
 
 
 class Worker(StoppableThread):
@@ -54,21 +210,34 @@ class Worker(StoppableThread):
     thread, a Recorder is run to write the results to
     """
 
-    def __init__(self, results, log_queue=None, log_level=logging.INFO, port=None):
+    def __init__(self, results, log_queue=None, log_level=logging.INFO, port=None,
+                 recorder_kwargs=None, publisher_kwargs=None, subscribers=0):
         """ Constructs a Worker to perform the Procedure
         defined in the file at the filepath
+
+        :param recorder_kwargs: keyword arguments for the :class:`.Recorder`,
+            e.g. :code:`{'buffered': True}` to write the data in batches
+        :param publisher_kwargs: keyword arguments for the :class:`.Publisher`,
+            e.g. :code:`{'pickle_fallback': True}` to publish any object
+        :param subscribers: number of subscribers of the TCP port to wait for
+            (briefly) before the first messages are emitted, or 0 to emit at once
         """
         super().__init__()
+        self._setup(log_queue, log_level, port, recorder_kwargs, publisher_kwargs,
+                    subscribers)
+        self.results = self._prepare(results)
 
+    def _setup(self, log_queue, log_level, port, recorder_kwargs, publisher_kwargs,
+               subscribers):
         self.port = port
-        if not isinstance(results, Results):
-            raise ValueError("Invalid Results object during Worker construction")
-        self.results = results
-        self.results.procedure.check_parameters()
-        self.results.procedure.status = Procedure.QUEUED
+        self.subscribers = subscribers
+        self.recorder_kwargs = recorder_kwargs or {}
+        self.publisher_kwargs = publisher_kwargs or {}
+        self.procedure = None
 
         self.recorder = None
         self.recorder_queue = Queue()
+        self.results_queue = None  # Set to pass the results to another process
 
         self.monitor_queue = Queue()
         if log_queue is None:
@@ -83,21 +252,22 @@ class Worker(StoppableThread):
         # log.addHandler(TopicQueueHandler(self.monitor_queue))
         # log.addHandler(QueueHandler(self.log_queue))
 
-        self.context = None
         self.publisher = None
         if self.port is not None and zmq is not None:
             try:
-                self.context = zmq.Context()
-                log.debug("Worker ZMQ Context: %r" % self.context)
-                self.publisher = self.context.socket(zmq.PUB)
-                self.publisher.bind('tcp://*:%d' % self.port)
-                log.info("Worker connected to tcp://*:%d" % self.port)
-                time.sleep(0.3)  # wait so that the socket will be ready before starting to emit messages
+                self.publisher = Publisher(self.port, **self.publisher_kwargs)
             except Exception:
                 log.exception("Couldn't establish ZMQ publisher!")
-                self.context = None
                 self.publisher = None
 
+    def _prepare(self, results):
+        if not isinstance(results, Results):
+            raise ValueError("Invalid Results object during %s construction"
+                             % self.__class__.__name__)
+        results.procedure.check_parameters()
+        results.procedure.status = Procedure.QUEUED
+        return results
+
     def join(self, timeout=0):
         try:
             super().join(timeout)
@@ -106,19 +276,36 @@ class Worker(StoppableThread):
             self.stop()
             super().join(0)
 
+    def abort(self):
+        """ Aborts the procedure, which stops the Worker """
+        self.stop()
+
+    def should_abort(self):
+        """ Returns True if the running procedure should stop """
+        return self.should_stop()
+
     def emit(self, topic, record):
         """ Emits data of some topic over TCP """
         log.debug("Emitting message: %s %s", topic, record)
 
         try:
-            self.publisher.send_serialized(
-                record,
-                serialize=lambda rec: (topic.encode(), cloudpickle.dumps(rec)),
-            )
-        except (NameError, AttributeError):
-            pass  # No dumps defined
+            self.publisher.send(topic, record)
+        except AttributeError:
+            pass  # No publisher
+        except (TypeError, OverflowError):
+            log.exception("Worker could not publish a %r record", topic)
         if topic == 'results':
-            self.recorder.handle(record)
+            if self.results_queue is not None:
+                self.results_queue.put(record)
+            else:
+                try:
+                    self.results.append(record)
+                except Exception:
+                    log.exception("Worker could not append a record to the results")
+            if self.recorder.buffered:
+                self.recorder_queue.put(record)
+            else:
+                self.recorder.handle(record)
         elif topic == 'status' or topic == 'progress':
             self.monitor_queue.put((topic, record))
 
@@ -139,33 +326,41 @@ class Worker(StoppableThread):
     def shutdown(self):
         self.procedure.shutdown()
 
-        if self.should_stop() and self.procedure.status == Procedure.RUNNING:
+        if self.should_abort() and self.procedure.status == Procedure.RUNNING:
             self.update_status(Procedure.ABORTED)
         elif self.procedure.status == Procedure.RUNNING:
-            self.update_status(Procedure.FINISHED)
             self.emit('progress', 100.)
+            self.update_status(Procedure.FINISHED)
 
         self.recorder.stop()
+
+    def close(self):
+        """ Signals the end of the messages and closes the publisher """
         self.monitor_queue.put(None)
-        if self.context is not None:
-            # Cleanly close down ZMQ context and associated socket
-            # For some reason, we need to close the socket before the
-            # context, otherwise context termination hangs.
+        if self.publisher is not None:
             self.publisher.close()
-            self.context.term()
 
-    def run(self):
-        log.info("Worker thread started")
-
-        self.procedure = self.results.procedure
+    def wait_for_subscribers(self):
+        """ Waits briefly for the expected number of subscribers of the TCP
+        port to be ready before the first messages are emitted
+        """
+        if self.publisher is not None and self.subscribers > 0:
+            self.publisher.wait_for_subscribers(self.subscribers)
 
-        self.recorder = Recorder(self.results, self.recorder_queue)
-        self.recorder.start()
+    def run_procedure(self, results):
+        """ Runs the procedure of the Results object and records its data """
+        self.results = results
+        self.procedure = results.procedure
+        if self.results_queue is None:
+            self.results.start_live()
 
-        #locals()[self.procedures_file] = __import__(self.procedures_file)
+        self.recorder = Recorder(self.results, self.recorder_queue,
+                                 **self.recorder_kwargs)
+        if self.recorder.buffered:
+            self.recorder.start()  # Otherwise the records are handled directly
 
         # route Procedure methods & log
-        self.procedure.should_stop = self.should_stop
+        self.procedure.should_stop = self.should_abort
         self.procedure.emit = self.emit
 
         log.info("Worker started running an instance of %r", self.procedure.__class__.__name__)
@@ -181,6 +376,14 @@ class Worker(StoppableThread):
             self.handle_error()
         finally:
             self.shutdown()
+
+    def run(self):
+        log.info("Worker thread started")
+        self.wait_for_subscribers()
+        try:
+            self.run_procedure(self.results)
+        finally:
+            self.close()
             self.stop()
 
     def __repr__(self):
@@ -189,3 +392,232 @@ class Worker(StoppableThread):
             self.procedure.__class__.__name__,
             self.should_stop()
         )
+
+
+class PersistentWorker(Worker):
+    """ PersistentWorker keeps running and executes the procedures of the
+    Results objects which are submitted to it one after the other. Its
+    thread, publisher and monitor queue are reused for all procedures, which
+    avoids the setup cost of a :class:`.Worker` per procedure when many
+    short procedures are run in sequence.
+
+    The status and progress messages of all procedures are put on the same
+    :attr:`monitor_queue`, which ends with None when the worker stops.
+    :meth:`abort` only aborts the running procedure, while :meth:`stop`
+    also stops the worker.
+
+    .. code-block:: python
+
+        worker = PersistentWorker()
+        worker.start()
+        for results in sequence:
+            worker.submit(results)
+        worker.finish()
+    """
+
+    def __init__(self, log_queue=None, log_level=logging.INFO, port=None,
+                 recorder_kwargs=None, publisher_kwargs=None, subscribers=0):
+        StoppableThread.__init__(self)
+        self.daemon = True  # Do not prevent exiting while waiting for work
+        self._setup(log_queue, log_level, port, recorder_kwargs, publisher_kwargs,
+                    subscribers)
+        self.results = None
+        self.queue = Queue()
+        self._abort = InterruptableEvent()
+
+    def submit(self, results):
+        """ Queues the procedure of a Results object to be run """
+        self.queue.put(self._prepare(results))
+
+    def finish(self, timeout=None):
+        """ Waits until the submitted procedures have been run and stops
+        the worker
+
+        :param timeout: maximum time to wait in seconds, or None to wait
+                        until all procedures have been run
+        """
+        self.queue.put(None)
+        Thread.join(self, timeout)
+        self.stop()
+
+    def abort(self):
+        """ Aborts the running procedure, after which the next submitted
+        procedure is run
+        """
+        self._abort.set()
+
+    def should_abort(self):
+        return self._abort.is_set() or self.should_stop()
+
+    def run(self):
+        log.info("Worker thread started")
+        self.wait_for_subscribers()
+        try:
+            while not self.should_stop():
+                try:
+                    results = self.queue.get(timeout=0.1)
+                except Empty:
+                    continue
+                if results is None:
+                    break
+                self._abort.clear()
+                self.run_procedure(results)
+        finally:
+            self.close()
+            self.stop()
+
+
+class _Channel(object):
+    """ Queue-like object which puts the items on a shared queue along with
+    a topic, so that a single queue carries all messages of a process
+    """
+
+    def __init__(self, queue, topic):
+        self.queue = queue
+        self.topic = topic
+
+    def put(self, item, block=True, timeout=None):
+        self.queue.put((self.topic, item), block, timeout)
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+
+class ProcessWorker(StoppableProcess):
+    """ ProcessWorker runs the procedure in a child process, so that
+    CPU-intensive procedures do not compete with the main process (e.g.
+    the graphical interface) for the interpreter. In the child process, a
+    :class:`.Worker` runs the procedure, records the results to the storage
+    and emits over the ZMQ TCP port as usual.
+
+    The results, status, progress and log records are streamed back to the
+    main process over a single queue, from which they are dispatched by a
+    thread: the results are appended to the :class:`.Results` object, which
+    thereby is :attr:`live <.Results.live>`, the status and progress are put
+    on the :attr:`monitor_queue` and the log records are put on the
+    :attr:`log_queue`, or handled by the loggers of the main process if no
+    log queue is given.
+
+    The :class:`.Results` object is pickled to the child process if the
+    processes are spawned, which requires the procedure to be importable.
+    """
+
+    def __init__(self, results, log_queue=None, log_level=logging.INFO, port=None,
+                 recorder_kwargs=None, publisher_kwargs=None, subscribers=0):
+        """ Constructs a ProcessWorker to perform the Procedure
+
+        :param recorder_kwargs: keyword arguments for the :class:`.Recorder`,
+            e.g. :code:`{'buffered': True}` to write the data in batches
+        :param publisher_kwargs: keyword arguments for the :class:`.Publisher`
+        :param subscribers: number of subscribers of the TCP port to wait for
+            before the first messages are emitted, see :class:`.Worker`
+        """
+        super().__init__()
+
+        self.port = port
+        self.subscribers = subscribers
+        self.recorder_kwargs = recorder_kwargs or {}
+        self.publisher_kwargs = publisher_kwargs or {}
+        if not isinstance(results, Results):
+            raise ValueError("Invalid Results object during ProcessWorker construction")
+        self.results = results
+        self.results.procedure.check_parameters()
+        self.results.procedure.status = Procedure.QUEUED
+
+        self.monitor_queue = Queue()
+        self.log_queue = log_queue
+        self.log_level = log_level
+
+        self._channel = context.Queue()
+        self._receiver = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Only the child process needs the channel, not the local queues
+        state['monitor_queue'] = None
+        state['log_queue'] = None
+        state['_receiver'] = None
+        return state
+
+    def start(self):
+        self.results.start_live()
+        super().start()
+        self._receiver = Thread(target=self._receive, daemon=True)
+        self._receiver.start()
+
+    def _receive(self):
+        """ Dispatches the messages of the child process until it exits """
+        monitor_closed = False
+        while True:
+            try:
+                topic, item = self._channel.get(timeout=0.1)
+            except Empty:
+                if self.exitcode is None:
+                    continue
+                break  # The process exited without closing the channel
+            if topic is None:
+                break
+            elif topic == 'results':
+                try:
+                    self.results.append(item)
+                except Exception:
+                    log.exception("ProcessWorker could not append a record to the results")
+            elif topic == 'monitor':
+                if item is None:
+                    monitor_closed = True
+                elif item[0] == 'status':
+                    self.results.procedure.status = item[1]
+                self.monitor_queue.put(item)
+            elif topic == 'log':
+                if self.log_queue is not None:
+                    self.log_queue.put(item)
+                else:
+                    logging.getLogger(item.name).handle(item)
+        if not monitor_closed:
+            log.error("ProcessWorker child process exited with code %s", self.exitcode)
+            self.results.procedure.status = Procedure.FAILED
+            self.monitor_queue.put(('status', Procedure.FAILED))
+            self.monitor_queue.put(None)
+
+    def abort(self):
+        """ Aborts the procedure, which stops the ProcessWorker """
+        self.stop()
+
+    def join(self, timeout=0):
+        deadline = time.monotonic() + timeout
+        try:
+            super().join(timeout)
+        except (KeyboardInterrupt, SystemExit):
+            log.warning("User stopped ProcessWorker join prematurely")
+            self.stop()
+            super().join(0)
+        if self._receiver is not None:
+            # The child process exits shortly after its last message
+            self._receiver.join(max(deadline - time.monotonic(), 0))
+            if not self._receiver.is_alive():
+                context.Process.join(self, max(deadline - time.monotonic(), 0))
+
+    def run(self):
+        # Route the log records of the child process to the main process
+        logger = logging.getLogger()
+        logger.handlers = [QueueHandler(_Channel(self._channel, 'log'))]
+        logger.setLevel(self.log_level)
+
+        worker = Worker(self.results, log_level=self.log_level, port=self.port,
+                        recorder_kwargs=self.recorder_kwargs,
+                        publisher_kwargs=self.publisher_kwargs,
+                        subscribers=self.subscribers)
+        worker.monitor_queue = _Channel(self._channel, 'monitor')
+        worker.results_queue = _Channel(self._channel, 'results')
+        worker._should_stop = self._should_stop
+        try:
+            worker.run()
+        finally:
+            self._channel.put((None, None))
+
+    def __repr__(self):
+        return "<%s(port=%s,procedure=%s,should_stop=%s)>" % (
+            self.__class__.__name__, self.port,
+            self.results.procedure.__class__.__name__,
+            self.should_stop()
+        )
@@ -25,6 +25,7 @@
 from ..errors import RangeError, RangeException
 from .instrument import Instrument
 from .mock import Mock
+from .pool import SessionPool, sessions
 from .resources import list_resources
 from .validators import discreteTruncate
 
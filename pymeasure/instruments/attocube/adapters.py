@@ -23,40 +23,64 @@
 #
 
 import re
-import time
+import socket
 
-from pymeasure.adapters import TelnetAdapter
+from pymeasure.adapters import SocketAdapter
 
 
-class AttocubeConsoleAdapter(TelnetAdapter):
+class AttocubeConsoleAdapter(SocketAdapter):
     """ Adapter class for connecting to the Attocube Standard Console. This
     console is a Telnet prompt with password authentication.
 
+    Replies are read until the 'OK' or 'ERROR' line closing them, so that
+    queries return as soon as the console has answered.
+
     :param host: host address of the instrument
     :param port: TCPIP port
     :param passwd: password required to open the connection
-    :param kwargs: Any valid key-word argument for TelnetAdapter
+    :param query_delay: time in seconds without further data after which the
+        greeting of the console is considered complete
+    :param kwargs: Any valid key-word argument for SocketAdapter
     """
     # compiled regular expression for finding numerical values in reply strings
     _reg_value = re.compile(r"\w+\s+=\s+(\w+)")
 
-    def __init__(self, host, port, passwd, **kwargs):
-        self.read_termination = '\r\n'
-        self.write_termination = self.read_termination
+    def __init__(self, host, port, passwd, query_delay=0.05, **kwargs):
         kwargs.setdefault('preprocess_reply', self.extract_value)
-        super().__init__(host, port, **kwargs)
-        time.sleep(self.query_delay)
-        super().read()  # clear messages sent upon opening the connection
+        super().__init__(host, port, read_termination='\r\n', write_termination='\r\n',
+                         **kwargs)
+        self.query_delay = query_delay
+        self._read_greeting()  # clear messages sent upon opening the connection
         # send password and check authorization
         self.write(passwd, check_ack=False)
-        time.sleep(self.query_delay)
-        ret = super().read()
-        authmsg = ret.split(self.read_termination)[1]
+        authmsg = self._read_line()
+        while not authmsg.startswith('Authorization'):  # skip the echo
+            authmsg = self._read_line()
         if authmsg != 'Authorization success':
             raise Exception(f"Attocube authorization failed '{authmsg}'")
         # switch console echo off
         _ = self.ask('echo off')
 
+    def _read_greeting(self):
+        """ Reads the greeting of the console, which is not terminated. It is
+        complete once no data arrived for :attr:`query_delay`. """
+        timeout = self.connection.gettimeout()
+        self._received += self._receive()
+        self.connection.settimeout(self.query_delay)
+        try:
+            while True:
+                self._received += self.connection.recv(65536)
+        except socket.timeout:
+            pass
+        finally:
+            self.connection.settimeout(timeout)
+        self._received.clear()
+
+    def _read_line(self):
+        """ Reads one line of a reply. The console terminates lines with
+        '\\r\\n' or, because of a firmware bug, with '\\n' only. """
+        return self._read_until(b'\n').decode().rstrip('\r')
+
     def extract_value(self, reply):
         """ preprocess_reply function for the Attocube console. This function
         tries to extract <value> from 'name = <value> [unit]'. If <value> can
@@ -79,9 +103,10 @@ class AttocubeConsoleAdapter(TelnetAdapter):
         :param msg: optional message for the eventual error
         """
         if reply != 'OK':
-            if msg == "":  # clear buffer
+            if msg == "":  # read the rest of the error reply
                 msg = reply
-                super().read()
+                while reply != 'ERROR':
+                    reply = self._read_line()
             raise ValueError("AttocubeConsoleAdapter: Error after command "
                              f"{self.lastcommand} with message {msg}")
 
@@ -93,13 +118,13 @@ class AttocubeConsoleAdapter(TelnetAdapter):
 
         :returns: String ASCII response of the instrument.
         """
-        raw = super().read().strip(self.read_termination)
-        # one would want to use self.read_termination as 'sep' below, but this
-        # is not possible because of a firmware bug resulting in inconsistent
-        # line endings
-        ret, ack = raw.rsplit(sep='\n', maxsplit=1)
-        ret = ret.strip('\r')  # strip possible CR char
-        self.check_acknowledgement(ack, ret)
+        lines = []
+        line = self._read_line()
+        while line not in ('OK', 'ERROR'):
+            lines.append(line)
+            line = self._read_line()
+        ret = self.read_termination.join(lines)
+        self.check_acknowledgement(line, ret)
         return ret
 
     def write(self, command, check_ack=True):
@@ -111,11 +136,9 @@ class AttocubeConsoleAdapter(TelnetAdapter):
             and False otherwise.
         """
         self.lastcommand = command
-        super().write(command + self.write_termination)
+        super().write(command)
         if check_ack:
-            reply = self.connection.read_until(self.read_termination.encode())
-            msg = reply.decode().strip(self.read_termination)
-            self.check_acknowledgement(msg)
+            self.check_acknowledgement(self._read_line())
 
     def ask(self, command):
         """ Writes a command to the instrument and returns the resulting ASCII
@@ -125,5 +148,4 @@ class AttocubeConsoleAdapter(TelnetAdapter):
         :returns: String ASCII response of the instrument
         """
         self.write(command, check_ack=False)
-        time.sleep(self.query_delay)
         return self.read()
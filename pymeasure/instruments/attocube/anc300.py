@@ -208,8 +208,9 @@ class ANC300Controller(Instrument):
     :param axisnames: a list of axis names which will be used to create
                       properties with these names
     :param passwd: password for the attocube standard console
-    :param query_delay: delay between sending and reading (default 0.05 sec)
-    :param kwargs: Any valid key-word argument for TelnetAdapter
+    :param query_delay: time without further data after which the greeting of
+                        the console is complete (default 0.05 sec)
+    :param kwargs: Any valid key-word argument for SocketAdapter
     """
     version = Instrument.measurement(
            "ver", """ Version number and instrument identification """
@@ -0,0 +1,174 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import logging
+from concurrent.futures import Future
+from threading import current_thread
+
+from pymeasure.adapters.adapter import format_values
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class BatchFuture(Future):
+    """ Future for the reply to a query of a :class:`Batch`. Asking for the
+    result before the batch is sent sends it right away. """
+
+    def __init__(self, batch, parse):
+        super().__init__()
+        self._batch = batch
+        self._parse = parse
+
+    def result(self, timeout=None):
+        if not self.done():
+            self._batch.flush()
+        return super().result(timeout)
+
+    def exception(self, timeout=None):
+        if not self.done():
+            self._batch.flush()
+        return super().exception(timeout)
+
+    def _resolve(self, reply):
+        try:
+            result = self._parse(reply)
+        except Exception as exc:
+            self.set_exception(exc)
+        else:
+            self.set_result(result)
+
+
+class Batch(object):
+    """ Collects the commands of an instrument to send them as few compound
+    SCPI messages, see :meth:`Instrument.batch <pymeasure.instruments.Instrument.batch>`.
+
+    :param instrument: The :class:`Instrument <pymeasure.instruments.Instrument>`
+    :param max_length: Maximum number of characters of a message, longer
+        batches are split into several messages
+    :param separator: String joining the commands of a message and separating
+        the replies to its queries
+    """
+
+    def __init__(self, instrument, max_length=256, separator=';'):
+        self.instrument = instrument
+        self.max_length = max_length
+        self.separator = separator
+        self.thread = current_thread()
+        self._commands = []  # (command, future or None)
+
+    def write(self, command):
+        """ Adds a command to the batch
+
+        :param command: command string to be sent to the instrument
+        """
+        self._commands.append((command, None))
+
+    def ask(self, command):
+        """ Adds a query to the batch and returns a future of its reply
+
+        :param command: command string to be sent to the instrument
+        :returns: :class:`BatchFuture` of the reply string
+        """
+        return self._query(command, lambda reply: reply)
+
+    def values(self, command, **kwargs):
+        """ Adds a query to the batch and returns a future of its values,
+        like :meth:`Instrument.values <pymeasure.instruments.Instrument.values>`
+
+        :param command: command string to be sent to the instrument
+        :param kwargs: Key-word arguments of :meth:`Adapter.values <pymeasure.adapters.Adapter.values>`
+        :returns: :class:`BatchFuture` of the values
+        """
+        return self._query(command, lambda reply: self._values(reply, kwargs))
+
+    def get(self, name):
+        """ Adds the query of a :meth:`control <pymeasure.instruments.Instrument.control>`
+        or :meth:`measurement <pymeasure.instruments.Instrument.measurement>` property
+        to the batch and returns a future of its value. Other properties are
+        read right away, after sending the batch so far.
+
+        :param name: Name of the property
+        :returns: :class:`BatchFuture` of the value
+        """
+        query = self.instrument._query(name)
+        if query is None or self.instrument._overrides('values'):
+            self.flush()
+            future = BatchFuture(self, None)
+            future.set_result(getattr(self.instrument, name))
+            return future
+        if query.check_errors:
+            log.warning("Errors are not checked after getting '%s' in a batch", name)
+        return self._query(query.command(),
+                           lambda reply: query.process(self._values(reply, query.kwargs)))
+
+    def flush(self):
+        """ Sends the commands collected so far and resolves the futures of
+        their queries """
+        commands, self._commands = self._commands, []
+        message, futures, length = [], [], 0
+        for command, future in commands:
+            if message and length + len(self.separator) + len(command) > self.max_length:
+                self._send(message, futures)
+                message, futures, length = [], [], 0
+            length += len(command) + (len(self.separator) if message else 0)
+            message.append(command)
+            if future is not None:
+                futures.append(future)
+        if message:
+            self._send(message, futures)
+
+    def discard(self):
+        """ Drops the commands collected so far and cancels their futures """
+        commands, self._commands = self._commands, []
+        for command, future in commands:
+            if future is not None:
+                future.cancel()
+
+    def _query(self, command, parse):
+        future = BatchFuture(self, parse)
+        self._commands.append((command, future))
+        return future
+
+    def _values(self, reply, kwargs):
+        if not callable(kwargs.get('preprocess_reply')):
+            kwargs = dict(kwargs, preprocess_reply=self.instrument.adapter.preprocess_reply)
+        return format_values(reply, **kwargs)
+
+    def _send(self, message, futures):
+        message = self.separator.join(message)
+        if not futures:
+            self.instrument.adapter.write(message)
+            return
+        try:
+            replies = self.instrument.adapter.ask(message).strip().split(self.separator)
+            if len(replies) != len(futures):
+                raise ValueError("Expected %d replies to '%s', received %d"
+                                 % (len(futures), message, len(replies)))
+        except Exception as exc:
+            for future in futures:
+                future.set_exception(exc)
+            raise
+        for future, reply in zip(futures, replies):
+            future._resolve(reply.strip())
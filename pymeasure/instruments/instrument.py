@@ -24,15 +24,75 @@
 
 import logging
 import re
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from threading import current_thread
 
 import numpy as np
 
 from pymeasure.adapters import FakeAdapter
+from pymeasure.adapters.asynchronous import ThreadAdapter
 from pymeasure.adapters.visa import VISAAdapter
+from pymeasure.instruments.batch import Batch
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+# The command (a callable returning it), the key-word arguments of values,
+# the processing of the values and the error check of a property getter
+_Query = namedtuple('_Query', 'command kwargs process check_errors')
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses skipped_writes size')
+
+
+def _is_control(attribute):
+    """ Returns True for properties created by :meth:`Instrument.control` """
+    return (isinstance(attribute, property)
+            and hasattr(attribute.fget, 'query') and hasattr(attribute.fset, 'command'))
+
+
+def _cache_ttl(cache):
+    """ Returns the lifetime in seconds of cached values, None if unlimited """
+    if cache is True or not cache:
+        return None
+    return float(cache)
+
+
+def _invalidate_on_reset(instrument, command):
+    """ Clears the property cache of the instrument if the command resets it """
+    if instrument._cache and "*RST" in command.upper():
+        instrument.cache_clear()
+
+
+def _measured(accessor):
+    """ Wraps a property getter or setter to record its duration in the
+    :class:`Metrics <pymeasure.adapters.metrics.Metrics>` attached to the
+    instrument, if any """
+    @wraps(accessor)
+    def measured(self, *args):
+        metrics = self._metrics
+        if metrics is None:
+            return accessor(self, *args)
+        error = True
+        start = time.perf_counter()
+        try:
+            result = accessor(self, *args)
+            error = False
+            return result
+        finally:
+            metrics.record_property(self, measured, time.perf_counter() - start, error)
+    return measured
+
+
+def _equal(a, b):
+    """ Compares two property values, which may be arrays """
+    try:
+        return bool(a == b)
+    except ValueError:  # truth value of an array
+        return np.array_equal(a, b)
+
 
 class Instrument(object):
     """ This provides the base class for all Instruments, which is
@@ -45,6 +105,12 @@ class Instrument(object):
     :param includeSCPI: A boolean, which toggles the inclusion of standard SCPI commands
     """
 
+    _batch = None
+    _state = None  # values of the last snapshot or apply_state
+    _cache = None  # values of cached properties, see Instrument.control
+    _cache_hits = _cache_misses = _cache_skipped_writes = 0
+    _metrics = None  # see pymeasure.adapters.metrics.Metrics.attach
+
     # noinspection PyPep8Naming
     def __init__(self, adapter, name, includeSCPI=True, **kwargs):
         try:
@@ -89,35 +155,366 @@ class Instrument(object):
 
         :param command: command string to be sent to the instrument
         """
-        return self.adapter.ask(command)
+        self._flush_batch()
+        with self.adapter.lock:
+            return self.adapter.ask(command)
 
     def write(self, command):
-        """ Writes the command to the instrument through the adapter.
+        """ Writes the command to the instrument through the adapter, or adds
+        it to the current :meth:`batch`.
 
         :param command: command string to be sent to the instrument
         """
-        self.adapter.write(command)
+        _invalidate_on_reset(self, command)
+        batch = self._current_batch()
+        if batch is not None:
+            batch.write(command)
+        else:
+            with self.adapter.lock:
+                self.adapter.write(command)
 
     def read(self):
         """ Reads from the instrument through the adapter and returns the
         response.
         """
-        return self.adapter.read()
+        self._flush_batch()
+        with self.adapter.lock:
+            return self.adapter.read()
 
     def values(self, command, **kwargs):
         """ Reads a set of values from the instrument through the adapter,
         passing on any key-word arguments.
         """
-        return self.adapter.values(command, **kwargs)
+        self._flush_batch()
+        with self.adapter.lock:
+            return self.adapter.values(command, **kwargs)
 
     def binary_values(self, command, header_bytes=0, dtype=np.float32):
-        return self.adapter.binary_values(command, header_bytes, dtype)
+        self._flush_batch()
+        with self.adapter.lock:
+            return self.adapter.binary_values(command, header_bytes, dtype)
+
+    def read_binary_block(self, **kwargs):
+        """ Reads an IEEE 488.2 definite length arbitrary block from the instrument
+        through the adapter, passing on any key-word arguments.
+        """
+        self._flush_batch()
+        with self.adapter.lock:
+            return self.adapter.read_binary_block(**kwargs)
+
+    def locked(self):
+        """ Context manager giving the calling thread exclusive access to the
+        instrument, e.g. for a sequence of commands which must not be
+        interrupted by another thread polling the instrument meanwhile.
+
+        .. code-block:: python
+
+            with sourcemeter.locked():
+                sourcemeter.write(":INIT")
+                data = sourcemeter.values(":FETCH?")
+
+        Single commands, queries and property accesses hold the lock already.
+        It is the lock of the adapter, see :meth:`Adapter.transaction
+        <pymeasure.adapters.Adapter.transaction>`, which instruments sharing a
+        connection, e.g. a Prologix controller, share. Do not wait for
+        :meth:`wait_for_srq` inside.
+        """
+        return self.adapter.transaction()
+
+    def wait_for_srq(self, timeout=25, delay=0.1):
+        """ Blocks until the instrument requests service and returns its status
+        byte, see :meth:`Adapter.wait_for_srq <pymeasure.adapters.Adapter.wait_for_srq>`.
+        Which events request service is set with the :code:`*SRE` mask, and
+        for the standard events with the :code:`*ESE` mask.
+
+        :param timeout: Timeout duration in seconds
+        :param delay: Time delay between polls in seconds, for adapters which
+            can not wait for the service request event
+        :returns: The status byte
+        :raises TimeoutError: If there was no service request within the timeout
+        """
+        self._flush_batch()
+        return self.adapter.wait_for_srq(timeout=timeout, delay=delay)
+
+    def wait_for_operation_complete(self, timeout=25, delay=0.1):
+        """ Blocks until the operations started before are complete, which the
+        instrument signals by a service request instead of being polled.
+
+        It sets the event status enable mask (:code:`*ESE`) to the operation
+        complete event and the service request enable mask (:code:`*SRE`) to
+        the event status summary, replacing previous masks.
+
+        :param timeout: Timeout duration in seconds
+        :param delay: Time delay between polls in seconds, for adapters which
+            can not wait for the service request event
+        :raises TimeoutError: If the operations did not complete within the timeout
+        """
+        self.write("*ESE 1;*SRE 32;*OPC")
+        self.wait_for_srq(timeout=timeout, delay=delay)
+        self.ask("*ESR?")  # clears the operation complete event
+
+    @contextmanager
+    def batch(self, max_length=256, separator=';'):
+        """ Context manager collecting the commands written to the instrument,
+        including setting :meth:`control` and :meth:`setting` properties, and
+        sending them as few compound messages at the end, which saves a bus
+        transaction per command.
+
+        Queries added with the :class:`Batch <pymeasure.instruments.batch.Batch>`
+        methods are sent as part of a compound query and return futures, whose
+        results are available after the batch. Reading from the instrument in
+        any other way sends the commands collected so far first. If the block
+        raises an exception, the collected commands are dropped.
+
+        .. code-block:: python
+
+            with sourcemeter.batch() as batch:
+                sourcemeter.source_current = 1e-3
+                sourcemeter.compliance_voltage = 10
+                voltage = batch.get("voltage")
+            print(voltage.result())
+
+        Batches are meant for SCPI instruments, which accept several commands
+        separated by a semicolon. Commands of other threads are not collected.
+
+        :param max_length: Maximum number of characters of a message, longer
+            batches are split into several messages
+        :param separator: String joining the commands and separating the replies
+        :returns: The :class:`Batch <pymeasure.instruments.batch.Batch>`
+        """
+        batch = self._current_batch()
+        if batch is not None:  # nested in another batch
+            yield batch
+            return
+        batch = self._batch = Batch(self, max_length=max_length, separator=separator)
+        try:
+            yield batch
+        except BaseException:
+            batch.discard()
+            self.cache_clear()  # cached values of the dropped commands are wrong
+            raise
+        else:
+            batch.flush()
+        finally:
+            self._batch = None
+
+    def _current_batch(self):
+        """ Returns the batch collecting the commands of the calling thread or None """
+        batch = self._batch
+        if batch is not None and batch.thread is current_thread():
+            return batch
+        return None
+
+    def _flush_batch(self):
+        batch = self._current_batch()
+        if batch is not None:
+            batch.flush()
+
+    # Reading and restoring the configuration
+    @classmethod
+    def controls(cls):
+        """ Returns the names of the :meth:`control` properties of the class,
+        in the order of their definition, base classes first.
+        """
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name, attribute in vars(klass).items():
+                if name not in names and _is_control(attribute):
+                    names.append(name)
+        return [name for name in names if _is_control(getattr(cls, name, None))]
+
+    def snapshot(self, names=None, max_length=256):
+        """ Reads the values of :meth:`control` properties, sending their
+        queries in as few compound messages as possible, and returns them as
+        a dictionary. The values are kept for :meth:`apply_state`.
+
+        .. code-block:: python
+
+            state = sourcemeter.snapshot()
+            ...  # another procedure changes the configuration
+            sourcemeter.apply_state(state)
+
+        :param names: Names of the properties to read, all :meth:`controls` if None
+        :param max_length: Maximum number of characters of a message, 0 sends
+            each query by itself for instruments not supporting compound messages
+        :returns: Dictionary of the property names and values
+        """
+        if names is None:
+            names = self.controls()
+        with self.batch(max_length=max_length) as batch:
+            futures = [(name, batch.get(name)) for name in names]
+        state = {name: future.result() for name, future in futures}
+        self._state = dict(self._state or {}, **state)
+        return state
+
+    def apply_state(self, state, max_length=256):
+        """ Sets the properties of a state, e.g. one returned by :meth:`snapshot`,
+        in as few compound messages as possible. Properties whose value equals
+        the one of the last :meth:`snapshot` or :meth:`apply_state` are not set,
+        so take a new snapshot after changing the instrument in other ways.
+
+        :param state: Dictionary of property names and values
+        :param max_length: Maximum number of characters of a message, 0 sends
+            each command by itself for instruments not supporting compound messages
+        :returns: List of the names of the properties set
+        """
+        known = self._state or {}
+        changed = [name for name, value in state.items()
+                   if name not in known or not _equal(known[name], value)]
+        for name in changed:
+            if getattr(getattr(type(self), name, None), 'fset', None) is None:
+                raise AttributeError("'%s' is not a settable property of %s"
+                                     % (name, type(self).__name__))
+        with self.batch(max_length=max_length):
+            for name in changed:
+                setattr(self, name, state[name])
+        self._state = dict(known, **state)
+        return changed
+
+    # Cache of property values, see the cache argument of Instrument.control
+    def cache_info(self):
+        """ Returns the statistics of the property cache as a named tuple of
+        the cache ``hits`` and ``misses`` of reading properties, the number of
+        ``skipped_writes`` of unchanged values, and the ``size`` of the cache.
+        """
+        return CacheInfo(self._cache_hits, self._cache_misses,
+                         self._cache_skipped_writes, len(self._cache or {}))
+
+    def cache_clear(self, *names):
+        """ Drops the cached values of the properties, such that they are read
+        from and written to the instrument the next time. The cache is cleared
+        by :meth:`reset`, :meth:`clear`, and writing a ``*RST`` command.
+
+        :param names: Names of the properties, all properties if none is given
+        """
+        if not names:
+            self._cache = None
+            return
+        for name in names:
+            fset = getattr(getattr(type(self), name, None), 'fset', None)
+            (self._cache or {}).pop(getattr(fset, 'command', None), None)
+
+    def uncached(self, name):
+        """ Reads the value of a property from the instrument, bypassing and
+        updating its cached value.
+
+        :param name: Name of the property
+        """
+        self.cache_clear(name)
+        return getattr(self, name)
+
+    def _cache_lookup(self, key, ttl):
+        """ Returns True and the cached value, or False and None if it is
+        missing or older than ttl seconds """
+        entry = (self._cache or {}).get(key)
+        if entry is None or (ttl is not None and time.monotonic() - entry[1] > ttl):
+            return False, None
+        return True, entry[0]
+
+    def _cache_store(self, key, value):
+        if self._cache is None:
+            self._cache = {}
+        self._cache[key] = (value, time.monotonic())
+
+    # Coroutine versions for use with asyncio
+    @property
+    def async_adapter(self):
+        """ The :class:`AsyncAdapter <pymeasure.adapters.AsyncAdapter>` used by the
+        coroutine methods, e.g. :meth:`aask` and :meth:`aget`. Unless another one
+        is assigned, it is a :class:`ThreadAdapter <pymeasure.adapters.ThreadAdapter>`
+        running the calls of :attr:`adapter` in a thread.
+        """
+        if getattr(self, '_async_adapter', None) is None:
+            self._async_adapter = ThreadAdapter(self.adapter)
+        return self._async_adapter
+
+    @async_adapter.setter
+    def async_adapter(self, adapter):
+        self._async_adapter = adapter
+
+    async def aask(self, command):
+        """ Writes the command to the instrument through the async adapter
+        and returns the read response.
+
+        :param command: command string to be sent to the instrument
+        """
+        return await self.async_adapter.ask(command)
+
+    async def awrite(self, command):
+        """ Writes the command to the instrument through the async adapter.
+
+        :param command: command string to be sent to the instrument
+        """
+        _invalidate_on_reset(self, command)
+        await self.async_adapter.write(command)
+
+    async def aread(self):
+        """ Reads from the instrument through the async adapter and returns the
+        response.
+        """
+        return await self.async_adapter.read()
+
+    async def avalues(self, command, **kwargs):
+        """ Reads a set of values from the instrument through the async adapter,
+        passing on any key-word arguments.
+        """
+        return await self.async_adapter.values(command, **kwargs)
+
+    async def acheck_errors(self):
+        """ Runs :meth:`check_errors` in a thread of the async adapter """
+        return await self.async_adapter.run(self.check_errors)
+
+    async def aget(self, name):
+        """ Returns the value of a property, e.g. a :meth:`control` or
+        :meth:`measurement`, without blocking the event loop.
+
+        .. code-block:: python
+
+            voltages = await asyncio.gather(*(smu.aget("voltage") for smu in smus))
+
+        Properties of other kinds, and those of instruments overriding
+        :meth:`values`, are read in a thread of the async adapter.
+
+        :param name: Name of the property
+        """
+        query = self._query(name)
+        if query is None or self._overrides('values'):
+            return await self.async_adapter.run(getattr, self, name)
+        vals = await self.avalues(query.command(), **query.kwargs)
+        if query.check_errors:
+            await self.acheck_errors()
+        return query.process(vals)
+
+    async def aset(self, name, value):
+        """ Sets the value of a property, e.g. a :meth:`control` or
+        :meth:`setting`, without blocking the event loop.
+
+        :param name: Name of the property
+        :param value: The value to set
+        """
+        fset = getattr(getattr(type(self), name, None), 'fset', None)
+        if not hasattr(fset, 'command') or self._overrides('write'):
+            return await self.async_adapter.run(setattr, self, name, value)
+        self.cache_clear(name)
+        await self.awrite(fset.command(value))
+        if fset.check_errors:
+            await self.acheck_errors()
+
+    def _overrides(self, method):
+        """ Returns True if the instrument class overrides the :class:`Instrument` method """
+        return getattr(type(self), method) is not getattr(Instrument, method)
+
+    def _query(self, name):
+        """ Returns the query of a :meth:`control` or :meth:`measurement`
+        property, or None for other attributes """
+        fget = getattr(getattr(type(self), name, None), 'fget', None)
+        return getattr(fget, 'query', None)
 
     @staticmethod
     def control(get_command, set_command, docs,
                 validator=lambda v, vs: v, values=(), map_values=False,
                 get_process=lambda v: v, set_process=lambda v: v,
-                check_set_errors=False, check_get_errors=False,
+                check_set_errors=False, check_get_errors=False, cache=False,
                 **kwargs):
         """Returns a property for the class based on the supplied
         commands. This property may be set and read from the
@@ -138,16 +535,22 @@ class Instrument(object):
                             before value mapping, returning the processed value
         :param check_set_errors: Toggles checking errors after setting
         :param check_get_errors: Toggles checking errors after getting
+        :param cache: Keeps the value set or read, such that reading the property
+                      returns it without asking the instrument and setting it to
+                      the same value again is skipped. False disables the cache,
+                      True keeps values until :meth:`cache_clear`, and a number
+                      keeps them for as many seconds. Only cache properties
+                      which the instrument does not change by itself.
+        :param kwargs: Key-word arguments passed on to :meth:`.values`, e.g.
+                       :code:`container=np.ndarray` to get long numeric replies as array
         """
 
         if map_values and isinstance(values, dict):
             # Prepare the inverse values for performance
             inverse = {v: k for k, v in values.items()}
+        ttl = _cache_ttl(cache)
 
-        def fget(self):
-            vals = self.values(get_command, **kwargs)
-            if check_get_errors:
-                self.check_errors()
+        def get_value(vals):
             if len(vals) == 1:
                 value = get_process(vals[0])
                 if not map_values:
@@ -165,8 +568,27 @@ class Instrument(object):
                 vals = get_process(vals)
                 return vals
 
-        def fset(self, value):
-            value = set_process(validator(value, values))
+        def fget(self):
+            if cache:
+                hit, value = self._cache_lookup(set_command_for, ttl)
+                if hit:
+                    self._cache_hits += 1
+                    return value
+                self._cache_misses += 1
+            with self.adapter.lock:
+                vals = self.values(get_command, **kwargs)
+                if check_get_errors:
+                    self.check_errors()
+            value = get_value(vals)
+            if cache:
+                self._cache_store(set_command_for, value)
+            return value
+
+        def set_command_for(value):
+            return command_for_valid(validator(value, values))
+
+        def command_for_valid(value):
+            value = set_process(value)
             if not map_values:
                 pass
             elif isinstance(values, (list, tuple, range)):
@@ -178,14 +600,31 @@ class Instrument(object):
                     'Values of type `{}` are not allowed '
                     'for Instrument.control'.format(type(values))
                 )
-            self.write(set_command % value)
-            if check_set_errors:
-                self.check_errors()
+            return set_command % value
+
+        def fset(self, value):
+            value = validator(value, values)
+            if cache:
+                hit, cached = self._cache_lookup(set_command_for, ttl)
+                if hit and _equal(cached, value):
+                    self._cache_skipped_writes += 1
+                    return
+            with self.adapter.lock:
+                self.write(command_for_valid(value))
+                if cache:
+                    self._cache_store(set_command_for, value)
+                if check_set_errors:
+                    self.check_errors()
 
         # Add the specified document string to the getter
         fget.__doc__ = docs
+        # Expose the commands, e.g. for Instrument.aget and Instrument.batch,
+        # which registers the property for Instrument.controls
+        fget.query = _Query(lambda: get_command, kwargs, get_value, check_get_errors)
+        fset.command = set_command_for
+        fset.check_errors = check_set_errors
 
-        return property(fget, fset)
+        return property(_measured(fget), _measured(fset))
 
     @staticmethod
     def measurement(get_command, docs, values=(), map_values=None,
@@ -206,16 +645,15 @@ class Instrument(object):
         :param command_process: A function that take a command and allows processing
                             before executing the command, for both getting and setting
         :param check_get_errors: Toggles checking errors after getting
+        :param kwargs: Key-word arguments passed on to :meth:`.values`, e.g.
+                       :code:`container=np.ndarray` to get long numeric replies as array
         """
 
         if map_values and isinstance(values, dict):
             # Prepare the inverse values for performance
             inverse = {v: k for k, v in values.items()}
 
-        def fget(self):
-            vals = self.values(command_process(get_command), **kwargs)
-            if check_get_errors:
-                self.check_errors()
+        def get_value(vals):
             if len(vals) == 1:
                 value = get_process(vals[0])
                 if not map_values:
@@ -232,16 +670,25 @@ class Instrument(object):
             else:
                 return get_process(vals)
 
+        def fget(self):
+            with self.adapter.lock:
+                vals = self.values(command_process(get_command), **kwargs)
+                if check_get_errors:
+                    self.check_errors()
+            return get_value(vals)
+
         # Add the specified document string to the getter
         fget.__doc__ = docs
+        fget.query = _Query(lambda: command_process(get_command), kwargs, get_value,
+                            check_get_errors)
 
-        return property(fget)
+        return property(_measured(fget))
 
     @staticmethod
     def setting(set_command, docs,
                 validator=lambda x, y: x, values=(), map_values=False,
                 set_process=lambda v: v,
-                check_set_errors=False,
+                check_set_errors=False, cache=False,
                 **kwargs):
         """Returns a property for the class based on the supplied
         commands. This property may be set, but raises an exception
@@ -258,17 +705,25 @@ class Instrument(object):
         :param set_process: A function that takes a value and allows processing
                             before value mapping, returning the processed value
         :param check_set_errors: Toggles checking errors after setting
+        :param cache: Skips setting the value again, if it did not change since
+                      setting it last. False disables the cache, True keeps
+                      values until :meth:`cache_clear`, and a number keeps them
+                      for as many seconds.
         """
 
         if map_values and isinstance(values, dict):
             # Prepare the inverse values for performance
             inverse = {v: k for k, v in values.items()}
+        ttl = _cache_ttl(cache)
 
         def fget(self):
             raise LookupError("Instrument.setting properties can not be read.")
 
-        def fset(self, value):
-            value = set_process(validator(value, values))
+        def set_command_for(value):
+            return command_for_valid(validator(value, values))
+
+        def command_for_valid(value):
+            value = set_process(value)
             if not map_values:
                 pass
             elif isinstance(values, (list, tuple, range)):
@@ -280,25 +735,41 @@ class Instrument(object):
                     'Values of type `{}` are not allowed '
                     'for Instrument.control'.format(type(values))
                 )
-            self.write(set_command % value)
-            if check_set_errors:
-                self.check_errors()
+            return set_command % value
+
+        def fset(self, value):
+            value = validator(value, values)
+            if cache:
+                hit, cached = self._cache_lookup(set_command_for, ttl)
+                if hit and _equal(cached, value):
+                    self._cache_skipped_writes += 1
+                    return
+            with self.adapter.lock:
+                self.write(command_for_valid(value))
+                if cache:
+                    self._cache_store(set_command_for, value)
+                if check_set_errors:
+                    self.check_errors()
 
         # Add the specified document string to the getter
         fget.__doc__ = docs
+        fset.command = set_command_for
+        fset.check_errors = check_set_errors
 
-        return property(fget, fset)
+        return property(_measured(fget), _measured(fset))
 
     # TODO: Determine case basis for the addition of this method
     def clear(self):
-        """ Clears the instrument status byte
+        """ Clears the instrument status byte and the property cache
         """
         self.write("*CLS")
+        self.cache_clear()
 
     # TODO: Determine case basis for the addition of this method
     def reset(self):
-        """ Resets the instrument. """
+        """ Resets the instrument and clears the property cache. """
         self.write("*RST")
+        self.cache_clear()
 
     def shutdown(self):
         """Brings the instrument to a safe and stable state"""
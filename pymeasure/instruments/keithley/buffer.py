@@ -31,7 +31,7 @@ from pymeasure.instruments.validators import truncated_range
 from pymeasure.adapters import PrologixAdapter
 
 import numpy as np
-from time import sleep, time
+from time import time
 
 
 class KeithleyBuffer(object):
@@ -72,29 +72,34 @@ class KeithleyBuffer(object):
 
     def wait_for_buffer(self, should_stop=lambda: False,
                         timeout=60, interval=0.1):
-        """ Blocks the program, waiting for a full buffer. This function 
-        returns early if the :code:`should_stop` function returns True or
-        the timeout is reached before the buffer is full.
+        """ Blocks the program, waiting for a full buffer, which the
+        instrument signals by a service request as set up by
+        :meth:`config_buffer`. This function returns early if the
+        :code:`should_stop` function returns True or the timeout is
+        reached before the buffer is full.
 
         :param should_stop: A function that returns True when this function should return early
         :param timeout: A time in seconds after which this function should return early
-        :param interval: A time in seconds for how often to check if the buffer is full
+        :param interval: A time in seconds for how often to call :code:`should_stop`
         """
-        # TODO: Use SRQ initially instead of constant polling
-        #self.adapter.wait_for_srq()
         t = time()
-        while not self.is_buffer_full():
-            sleep(interval)
-            if should_stop():
-                return
-            if (time()-t)>timeout:
-                raise Exception("Timed out waiting for Keithley buffer to fill.")
+        while True:
+            try:
+                status = self.wait_for_srq(timeout=interval, delay=interval)
+            except TimeoutError:
+                if should_stop():
+                    return
+                if (time()-t)>timeout:
+                    raise Exception("Timed out waiting for Keithley buffer to fill.")
+            else:
+                if status & 1:  # measurement summary bit of the buffer full event
+                    return
 
     @property
     def buffer_data(self):
         """ Returns a numpy array of values from the buffer. """
         self.write(":FORM:DATA ASCII")
-        return np.array(self.values(":TRAC:DATA?"), dtype=np.float64)
+        return np.array(self.values(":TRAC:DATA?", container=np.ndarray), dtype=np.float64)
 
     def start_buffer(self):
         """ Starts the buffer. """
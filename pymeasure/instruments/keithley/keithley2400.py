@@ -419,10 +419,16 @@ class Keithley2400(Instrument, KeithleyBuffer):
             self.current_range = current
         self.check_errors()
 
-    def auto_range_source(self):
+    def auto_range_source(self, source_mode=None):
         """ Configures the source to use an automatic range.
+
+        :param source_mode: The source mode to configure, either 'current'
+                            or 'voltage'. Defaults to the present
+                            :attr:`~.Keithley2400.source_mode`.
         """
-        if self.source_mode == 'current':
+        if source_mode is None:
+            source_mode = self.source_mode
+        if source_mode == 'current':
             self.write(":SOUR:CURR:RANG:AUTO 1")
         else:
             self.write(":SOUR:VOLT:RANG:AUTO 1")
@@ -438,12 +444,13 @@ class Keithley2400(Instrument, KeithleyBuffer):
         :param current_range: A :attr:`~.Keithley2400.current_range` value or None
         """
         log.info("%s is sourcing current." % self.name)
-        self.source_mode = 'current'
-        if current_range is None:
-            self.auto_range_source()
-        else:
-            self.source_current_range = current_range
-        self.compliance_voltage = compliance_voltage
+        with self.batch():
+            self.source_mode = 'current'
+            if current_range is None:
+                self.auto_range_source('current')
+            else:
+                self.source_current_range = current_range
+            self.compliance_voltage = compliance_voltage
         self.check_errors()
 
     def apply_voltage(self, voltage_range=None,
@@ -457,12 +464,13 @@ class Keithley2400(Instrument, KeithleyBuffer):
         :param voltage_range: A :attr:`~.Keithley2400.voltage_range` value or None
         """
         log.info("%s is sourcing voltage." % self.name)
-        self.source_mode = 'voltage'
-        if voltage_range is None:
-            self.auto_range_source()
-        else:
-            self.source_voltage_range = voltage_range
-        self.compliance_current = compliance_current
+        with self.batch():
+            self.source_mode = 'voltage'
+            if voltage_range is None:
+                self.auto_range_source('voltage')
+            else:
+                self.source_voltage_range = voltage_range
+            self.compliance_current = compliance_current
         self.check_errors()
 
     def beep(self, frequency, duration):
@@ -694,25 +702,26 @@ class Keithley2400(Instrument, KeithleyBuffer):
     def RvsI(self, startI, stopI, stepI, compliance, delay=10.0e-3, backward=False):
         num = int(float(stopI - startI) / float(stepI)) + 1
         currRange = 1.2 * max(abs(stopI), abs(startI))
-        # self.write(":SOUR:CURR 0.0")
-        self.write(":SENS:VOLT:PROT %g" % compliance)
-        self.write(":SOUR:DEL %g" % delay)
-        self.write(":SOUR:CURR:RANG %g" % currRange)
-        self.write(":SOUR:SWE:RANG FIX")
-        self.write(":SOUR:CURR:MODE SWE")
-        self.write(":SOUR:SWE:SPAC LIN")
-        self.write(":SOUR:CURR:STAR %g" % startI)
-        self.write(":SOUR:CURR:STOP %g" % stopI)
-        self.write(":SOUR:CURR:STEP %g" % stepI)
-        self.write(":TRIG:COUN %d" % num)
-        if backward:
-            currents = np.linspace(stopI, startI, num)
-            self.write(":SOUR:SWE:DIR DOWN")
-        else:
-            currents = np.linspace(startI, stopI, num)
-            self.write(":SOUR:SWE:DIR UP")
-        self.connection.timeout = 30.0
-        self.enable_source()
+        with self.batch():
+            # self.write(":SOUR:CURR 0.0")
+            self.write(":SENS:VOLT:PROT %g" % compliance)
+            self.write(":SOUR:DEL %g" % delay)
+            self.write(":SOUR:CURR:RANG %g" % currRange)
+            self.write(":SOUR:SWE:RANG FIX")
+            self.write(":SOUR:CURR:MODE SWE")
+            self.write(":SOUR:SWE:SPAC LIN")
+            self.write(":SOUR:CURR:STAR %g" % startI)
+            self.write(":SOUR:CURR:STOP %g" % stopI)
+            self.write(":SOUR:CURR:STEP %g" % stepI)
+            self.write(":TRIG:COUN %d" % num)
+            if backward:
+                currents = np.linspace(stopI, startI, num)
+                self.write(":SOUR:SWE:DIR DOWN")
+            else:
+                currents = np.linspace(startI, stopI, num)
+                self.write(":SOUR:SWE:DIR UP")
+            self.connection.timeout = 30.0
+            self.enable_source()
         data = self.values(":READ?")
 
         self.check_errors()
@@ -470,8 +470,8 @@ class KeysightDSOX1102G(Instrument):
         :param color_palette: "color" or "grayscale"
         """
         query = f":DISPlay:DATA? {format_}, {color_palette}"
-        # Using binary_values query because default interface does not support binary transfer
-        img = self.binary_values(query, header_bytes=10, dtype=np.uint8)
+        self.write(query)
+        img = self.read_binary_block(dtype=np.uint8)
         return bytearray(img)
 
     def download_data(self, source, points=62500):
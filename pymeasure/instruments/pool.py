@@ -0,0 +1,164 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import logging
+import time
+from threading import RLock
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class SessionPool(object):
+    """ Keeps instruments and adapters open for reuse, e.g. by the procedures
+    of a sequence, which then do not connect to and set up their instruments
+    for each run.
+
+    Objects are cached by their class, resource name and key-word arguments.
+    An object obtained from the pool is in use until it is :meth:`released
+    <release>`. Objects not in use for :code:`idle_timeout` seconds are
+    closed and dropped from the pool.
+
+    .. code-block:: python
+
+        from pymeasure.instruments import sessions
+
+        class IVProcedure(Procedure):
+
+            def startup(self):
+                self.sourcemeter = sessions.instrument(Keithley2400, "GPIB::4")
+
+            def shutdown(self):
+                self.sourcemeter.shutdown()
+                sessions.release(self.sourcemeter)
+
+    :param idle_timeout: Time in seconds after which an object not in use is
+        closed, None keeps objects until :meth:`clear`
+    """
+
+    def __init__(self, idle_timeout=None):
+        self.idle_timeout = idle_timeout
+        self._entries = {}  # key: _Session
+        self._lock = RLock()
+
+    def instrument(self, cls, resource_name, **kwargs):
+        """ Returns an open instrument of the pool or a new one, created by
+        :code:`cls(resource_name, **kwargs)`, and marks it as in use.
+
+        :param cls: The :class:`Instrument <pymeasure.instruments.Instrument>` class
+        :param resource_name: The resource name or adapter of the instrument
+        :param kwargs: Key-word arguments of the instrument
+        """
+        return self._acquire((cls, resource_name, _frozen(kwargs)),
+                             lambda: cls(resource_name, **kwargs))
+
+    def adapter(self, resource_name, cls=None, **kwargs):
+        """ Returns an open adapter of the pool or a new one, created by
+        :code:`cls(resource_name, **kwargs)`, and marks it as in use.
+
+        :param resource_name: The resource name of the adapter
+        :param cls: The :class:`Adapter <pymeasure.adapters.Adapter>` class,
+            by default the :class:`VISAAdapter <pymeasure.adapters.VISAAdapter>`
+        :param kwargs: Key-word arguments of the adapter
+        """
+        if cls is None:
+            from pymeasure.adapters import VISAAdapter
+            cls = VISAAdapter
+        return self._acquire((cls, resource_name, _frozen(kwargs)),
+                             lambda: cls(resource_name, **kwargs))
+
+    def release(self, obj):
+        """ Marks an instrument or adapter as no longer in use by the caller,
+        which starts its idle time.
+
+        :param obj: An object returned by :meth:`instrument` or :meth:`adapter`
+        """
+        with self._lock:
+            for session in self._entries.values():
+                if session.obj is obj:
+                    session.users = max(0, session.users - 1)
+                    session.last_used = time.monotonic()
+                    break
+            else:
+                raise ValueError("%r is not part of the session pool" % obj)
+            self.evict_idle()
+
+    def evict_idle(self):
+        """ Closes and drops the objects which were not in use for
+        :attr:`idle_timeout` seconds """
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, session in list(self._entries.items()):
+                if session.users == 0 and now - session.last_used > self.idle_timeout:
+                    del self._entries[key]
+                    session.close()
+
+    def clear(self):
+        """ Closes and drops all objects of the pool, including those in use """
+        with self._lock:
+            sessions, self._entries = list(self._entries.values()), {}
+        for session in sessions:
+            session.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _acquire(self, key, create):
+        with self._lock:
+            self.evict_idle()
+            session = self._entries.get(key)
+            if session is None:
+                log.info("Opening a session of %s", key[1])
+                session = self._entries[key] = _Session(create())
+            session.users += 1
+            session.last_used = time.monotonic()
+            return session.obj
+
+
+class _Session(object):
+    """ An object of a :class:`SessionPool` and its use """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.users = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        adapter = getattr(self.obj, 'adapter', self.obj)
+        log.info("Closing the session of %r", adapter)
+        try:
+            adapter.close()  # Keeps connections shared with other adapters open
+        except Exception:
+            log.exception("Closing the session of %r failed", adapter)
+
+
+def _frozen(kwargs):
+    """ Returns a hashable representation of key-word arguments """
+    return tuple(sorted((key, repr(value)) for key, value in kwargs.items()))
+
+
+#: The session pool of the process
+sessions = SessionPool()
@@ -24,6 +24,8 @@
 
 import pyvisa
 
+from pymeasure.adapters.visa import resource_manager
+
 
 def list_resources():
     """
@@ -38,7 +40,7 @@ def list_resources():
         dmm = Agilent34410(resources[0])
     
     """
-    rm = pyvisa.ResourceManager()
+    rm = resource_manager()  # shared with the adapters, so it is not closed
     instrs = rm.list_resources()
     for n, instr in enumerate(instrs):
         # trying to catch errors in comunication
@@ -56,5 +58,4 @@ def list_resources():
         except pyvisa.VisaIOError as e:
             print(n, ":", instr, ":", "Visa IO Error: check connections")
             print(e)
-    rm.close()
     return instrs
@@ -47,6 +47,7 @@ setup(
         'matplotlib': ['matplotlib >= 2.0.2'],
         'tcp': [
             'pyzmq >= 16.0.2',
+            'msgpack >= 1.0',
             'cloudpickle >= 0.3.1'
         ],
         'python-vxi11': ['python-vxi11 >= 0.9']
@@ -23,8 +23,13 @@
 #
 
 import logging
+import time
+from threading import Event, Thread
 
-from pymeasure.adapters import FakeAdapter
+import numpy as np
+import pytest
+
+from pymeasure.adapters import Adapter, FakeAdapter, parse_binary_block
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -47,3 +52,118 @@ def test_adapter_preprocess_reply():
     assert a.values("15", preprocess_reply=lambda v: v) == [15]
     a = FakeAdapter()
     assert a.values("V 3.4", preprocess_reply=lambda v: v.split()[1]) == [3.4]
+
+
+def test_parse_binary_block():
+    values = np.linspace(0, 1, 50)
+    data = b"CURV #3400" + values.tobytes() + b"\n"
+    block = parse_binary_block(data, dtype=np.float64)
+    assert np.array_equal(block, values)
+    assert not block.flags.writeable  # a view of the received bytes
+
+    big = b"#14" + np.array([1, 2], dtype=">u2").tobytes()
+    assert list(parse_binary_block(big, dtype=np.uint16, is_big_endian=True)) == [1, 2]
+    assert list(parse_binary_block(big, dtype=">u2")) == [1, 2]
+    out = np.zeros(4, dtype=np.uint16)
+    parse_binary_block(big, is_big_endian=True, out=out)
+    assert list(out) == [1, 2, 0, 0]
+
+
+@pytest.mark.parametrize("data", [b"1,2,3", b"#0\x01\x02\n", b"#15\x01\x02", b"#13\x01\x02\x03"])
+def test_parse_binary_block_invalid(data):
+    with pytest.raises(ValueError):
+        parse_binary_block(data, dtype=np.uint16)
+
+
+def test_adapter_values_ndarray():
+    a = FakeAdapter()
+    values = a.values("1.5,-2,3e3", container=np.ndarray)
+    assert isinstance(values, np.ndarray)
+    assert list(values) == [1.5, -2, 3000]
+    assert a.values("1;2", separator=';', cast=int, container=np.ndarray).dtype == np.int64
+    assert list(a.values("0,1,0.5", cast=bool, container=np.ndarray)) == [False, True, True]
+    assert list(a.values(" 1e-3, +2 ,nan,-INF\n", container=np.ndarray))[:2] == [1e-3, 2]
+
+
+@pytest.mark.parametrize("reply,cast,expected", [
+    ("1,X,3", float, [1, 'X', 3]),
+    ("1,,3", float, [1, '', 3]),
+    ("1,2.5", int, [1, '2.5']),
+    ("OK", float, ['OK']),
+    ("1.5V", float, ['1.5V']),
+    ("1,2.5V", float, [1, '2.5V']),
+    ("1;2", float, ['1;2']),
+    ("1 2", float, ['1 2']),
+    ("1,2 3", int, [1, '2 3']),
+])
+def test_adapter_values_ndarray_fallback(reply, cast, expected):
+    a = FakeAdapter()
+    assert a.values(reply, cast=cast, container=np.ndarray) == expected
+
+
+class StatusAdapter(Adapter):
+    """ Replies to :code:`*STB?` with the given status bytes in turn """
+
+    def __init__(self, statuses):
+        super().__init__()
+        self.statuses = list(statuses)
+
+    def ask(self, command):
+        assert command == "*STB?"
+        return "%d\n" % self.statuses.pop(0)
+
+
+def test_adapter_wait_for_srq_polls():
+    assert StatusAdapter([0, 1, 65]).wait_for_srq(delay=0) == 65
+    with pytest.raises(TimeoutError):
+        StatusAdapter([0] * 100).wait_for_srq(timeout=0.01, delay=0.005)
+
+
+class SlowEchoAdapter(Adapter):
+    """ Replies with the last command, taking a moment to do so """
+
+    def write(self, command):
+        self.last = command
+
+    def read(self):
+        time.sleep(0.001)
+        return self.last
+
+
+def test_adapter_ask_threads():
+    adapter = SlowEchoAdapter()
+    errors = []
+
+    def ask(name):
+        for i in range(20):
+            command = "%s%d" % (name, i)
+            if adapter.ask(command) != command:
+                errors.append(command)
+
+    threads = [Thread(target=ask, args=(name,)) for name in "ABC"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_adapter_transaction():
+    adapter = SlowEchoAdapter()
+    started = Event()
+
+    def ask():
+        started.set()
+        adapter.ask("B")
+
+    with adapter.transaction():
+        thread = Thread(target=ask)
+        thread.start()
+        assert started.wait(5)
+        adapter.write("A")
+        thread.join(0.05)
+        assert thread.is_alive()  # blocked by the lock
+        assert adapter.read() == "A"
+    thread.join(5)
+    assert not thread.is_alive()
+    assert adapter.last == "B"
@@ -0,0 +1,149 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from pymeasure.adapters import (AsyncSerialAdapter, AsyncSocketAdapter, FakeAdapter,
+                                ThreadAdapter)
+
+
+async def echo(reader, writer, delay=0.):
+    """ Serves a fake instrument replying to each line with its values doubled """
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        await asyncio.sleep(delay)
+        values = [2 * float(v) for v in line.decode().strip().split(',')]
+        writer.write((",".join(str(v) for v in values) + "\n").encode())
+    writer.close()
+
+
+def test_socket_adapter_concurrent():
+    async def main():
+        server = await asyncio.start_server(lambda r, w: echo(r, w, 0.1), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        adapters = [AsyncSocketAdapter('127.0.0.1', port) for _ in range(5)]
+        start = time.perf_counter()
+        replies = await asyncio.gather(*(a.values("%d,1" % i) for i, a in enumerate(adapters)))
+        elapsed = time.perf_counter() - start
+        # Several exchanges on one adapter do not mix up their replies
+        ordered = await asyncio.gather(*(adapters[0].ask(str(i)) for i in range(5)))
+        assert await adapters[0].values("1,2,3", container=np.ndarray) == pytest.approx([2, 4, 6])
+        for adapter in adapters:
+            await adapter.close()
+        server.close()
+        return replies, ordered, elapsed
+
+    replies, ordered, elapsed = asyncio.run(main())
+    assert replies == [[2 * i, 2] for i in range(5)]
+    assert ordered == [str(2. * i) for i in range(5)]
+    assert elapsed < 0.4  # five delayed replies served concurrently
+
+
+def test_socket_adapter_timeout():
+    async def main():
+        server = await asyncio.start_server(lambda r, w: asyncio.sleep(1), '127.0.0.1', 0)
+        adapter = AsyncSocketAdapter('127.0.0.1', server.sockets[0].getsockname()[1],
+                                     timeout=0.1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await adapter.ask("*IDN?")
+        finally:
+            await adapter.close()
+            server.close()
+
+    asyncio.run(main())
+
+
+def test_socket_adapter_discards_partial_reply_after_timeout():
+    async def partial(reader, writer):
+        """ Replies to SLOW with a fragment only and echoes other lines """
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            writer.write(b"PART" if line == b"SLOW\n" else line)
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(partial, '127.0.0.1', 0)
+        adapter = AsyncSocketAdapter('127.0.0.1', server.sockets[0].getsockname()[1],
+                                     timeout=0.1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await adapter.ask("SLOW")
+            return await adapter.ask("FAST")
+        finally:
+            await adapter.close()
+            server.close()
+
+    assert asyncio.run(main()) == "FAST"
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Requires a pseudo terminal')
+def test_serial_adapter():
+    serial = pytest.importorskip('serial')
+    controller, device = os.openpty()
+    adapter = AsyncSerialAdapter(serial.Serial(os.ttyname(device)), write_termination="\n")
+
+    async def instrument():
+        request = b""
+        loop = asyncio.get_event_loop()
+        while not request.endswith(b"\n"):
+            request += await loop.run_in_executor(None, os.read, controller, 100)
+        assert request == b"MEAS?\n"
+        await asyncio.sleep(0.05)
+        os.write(controller, b"1.5,")
+        await asyncio.sleep(0.05)
+        os.write(controller, b"2.5\r\nNEXT\n")
+
+    async def main():
+        _, values = await asyncio.gather(instrument(), adapter.values("MEAS?"))
+        return values, await adapter.read()
+
+    try:
+        assert asyncio.run(main()) == ([1.5, 2.5], "NEXT")
+    finally:
+        asyncio.run(adapter.close())
+        os.close(controller)
+        os.close(device)
+
+
+def test_thread_adapter():
+    async def main():
+        adapter = ThreadAdapter(FakeAdapter())
+        await adapter.write("5,6")
+        first = await adapter.read()
+        values = await adapter.values("1,2", cast=int)
+        await adapter.close()
+        return first, values
+
+    assert asyncio.run(main()) == ("5,6", [1, 2])
@@ -0,0 +1,95 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import json
+
+import pytest
+
+from pymeasure.adapters import FakeAdapter
+from pymeasure.adapters.metrics import Metrics
+from pymeasure.instruments import Instrument
+from pymeasure.instruments.instrument import FakeInstrument
+
+
+class Fake(FakeInstrument):
+    x = Instrument.control("", "%d", "")
+
+
+def test_metrics_adapter_calls():
+    adapter = FakeAdapter()
+    metrics = Metrics()
+    metrics.attach(adapter)
+    adapter.write("VOLT 5")
+    assert adapter.read() == "VOLT 5"
+    assert adapter.values("1,2,3") == [1, 2, 3]  # nested ask, write and read
+    calls = metrics.calls
+    assert set(calls) == {(repr(adapter), 'write', 'VOLT'), (repr(adapter), 'read', ''),
+                          (repr(adapter), 'values', '1,2,3')}
+    assert calls[(repr(adapter), 'read', '')].bytes_in == 6
+    write = calls[(repr(adapter), 'write', 'VOLT')]
+    assert (write.count, write.bytes_out, write.bytes_in) == (1, 6, 0)
+    values = calls[(repr(adapter), 'values', '1,2,3')]
+    assert (values.count, values.bytes_out, values.bytes_in) == (1, 5, 5)
+    assert sum(values.buckets) == 1
+    metrics.detach(adapter)
+    adapter.write("VOLT 6")
+    assert calls[(repr(adapter), 'write', 'VOLT')].count == 1
+    assert 'write' not in vars(adapter)
+
+
+def test_metrics_properties():
+    fake = Fake()
+    metrics = Metrics()
+    metrics.attach(fake)
+    fake.x = 5
+    assert fake.x == 5
+    with pytest.raises(TypeError):
+        fake.x = "A"
+    assert {key: s.count for key, s in metrics.properties.items()} == {
+        ("Fake Instrument", "x", "set"): 2, ("Fake Instrument", "x", "get"): 1}
+    assert metrics.properties[("Fake Instrument", "x", "set")].errors == 1
+    metrics.detach(fake)
+    fake.x = 6
+    assert metrics.properties[("Fake Instrument", "x", "set")].count == 2
+
+
+def test_metrics_export(tmp_path):
+    fake = Fake()
+    metrics = Metrics()
+    metrics.attach(fake)
+    fake.x = 5
+    text = metrics.to_prometheus()
+    assert '# TYPE pymeasure_adapter_seconds histogram' in text
+    assert 'pymeasure_property_seconds_count{instrument="Fake Instrument",property="x",' \
+           'kind="set"} 1' in text
+    assert 'le="+Inf"} 1' in text
+    filename = str(tmp_path / "metrics.json")
+    metrics.export(filename)
+    with open(filename) as file:
+        data = json.load(file)
+    assert data['properties'][0]['property'] == "x"
+    assert data['calls'][0]['operation'] == "write"
+    assert "x" in metrics.summary()
+    metrics.clear()
+    assert metrics.calls == metrics.properties == {}
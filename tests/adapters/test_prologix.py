@@ -22,10 +22,14 @@
 # THE SOFTWARE.
 #
 
+import re
+import time
+from threading import Thread
+
 import pytest
 import serial
 
-from pymeasure.adapters import PrologixAdapter
+from pymeasure.adapters import PrologixAdapter, PrologixController
 
 prefix="\n".join(["++auto 0", "++eoi 1", "++eos 2"])+"\n"
 
@@ -47,3 +51,144 @@ def test_adapter_write_binary_values(test_input, expected):
     adapter.write_binary_values("OUTP", test_input, datatype='B')
     # Add 10 bytes more, just to check that no extra bytes are present
     assert(adapter.connection.read(len(expected)+10) == expected)
+
+
+def test_adapter_read_termination():
+    adapter = PrologixAdapter(serial.serial_for_url("loop://"), serial_timeout=1,
+                              read_termination="\n")
+    adapter.connection.read(len(prefix))
+    # The loop returns the written command as reply, followed by "++read eoi"
+    start = time.perf_counter()
+    assert adapter.ask("*IDN?") == "*IDN?"
+    assert time.perf_counter() - start < 0.5
+    assert adapter.read_bytes(11) == b"++read eoi\n"  # kept from the last read
+    assert adapter.gpib(5)._received is adapter._received
+
+
+class FakeController(serial.SerialBase):
+    """ Emulates a Prologix controller whose instruments reply with the last
+    command they received """
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.commands = {}
+        self.address = None
+        self.output = b""
+        self.status = {}  # GPIB address: status byte
+
+    def write(self, data):
+        for line in data.decode().splitlines():
+            self.lines.append(line)
+            if line.startswith("++addr"):
+                self.address = int(line.split()[1])
+            elif line == "++srq":
+                self.output += b"1\n" if any(s & 64 for s in self.status.values()) else b"0\n"
+            elif line.startswith("++spoll"):
+                address = int(line.split()[1])
+                status = self.status.get(address, 0)
+                self.status[address] = status & ~64  # polling clears the request
+                self.output += b"%d\n" % status
+            elif line == "++read eoi":
+                time.sleep(0.001)  # give other threads a chance to interfere
+                self.output += (self.commands.get(self.address, "") + "\n").encode()
+            elif not line.startswith("++"):
+                self.commands[self.address] = line
+        return len(data)
+
+    def read(self, size=1):
+        data, self.output = self.output[:size], self.output[size:]
+        return data
+
+    @property
+    def in_waiting(self):
+        return len(self.output)
+
+
+def test_controller_address_caching():
+    connection = FakeController()
+    adapter = PrologixAdapter(connection, read_termination="\n")
+    first, second = adapter.gpib(1), adapter.gpib(2)
+    assert first.controller is second.controller is PrologixController.of(connection)
+    connection.lines.clear()
+    assert first.ask("A") == "A"
+    assert first.ask("B") == "B"
+    assert second.ask("C") == "C"
+    assert first.ask("D") == "D"
+    assert [line for line in connection.lines if line.startswith("++addr")] == [
+        "++addr 1", "++addr 2", "++addr 1"]
+
+
+def test_controller_threads():
+    connection = FakeController()
+    adapter = PrologixAdapter(connection, read_termination="\n")
+    errors = []
+
+    def poll(address):
+        instrument = adapter.gpib(address)
+        for i in range(20):
+            reply = instrument.ask("%d:%d" % (address, i))
+            if reply != "%d:%d" % (address, i):
+                errors.append(reply)
+
+    threads = [Thread(target=poll, args=(address,)) for address in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_adapter_escape_large_block():
+    adapter = make_adapter(timeout=0.2)
+    data = bytes(range(256)) * 4096  # 1 MB with every special character
+    start = time.perf_counter()
+    block = adapter._format_binary_values(data, datatype='B', header_fmt="empty")
+    assert time.perf_counter() - start < 2  # linear in the size of the block
+    assert len(block) == len(data) + 4 * 4096
+    assert re.sub(b'\x1b(.)', b'\\1', block, flags=re.DOTALL) == data
+
+
+def wait_until(condition, timeout=2):
+    """ Polls the condition until it holds or the timeout has passed """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_controller_srq():
+    connection = FakeController()
+    adapter = PrologixAdapter(connection, read_termination="\n")
+    first, second = adapter.gpib(1), adapter.gpib(2)
+    results = {}
+
+    def wait(instrument):
+        results[instrument.address] = instrument.wait_for_srq(timeout=2, delay=0.01)
+
+    threads = [Thread(target=wait, args=(instrument,)) for instrument in (first, second)]
+    for thread in threads:
+        thread.start()
+    controller = adapter.controller
+    assert wait_until(lambda: set(controller._requests) == {1, 2})
+    watcher = controller._watcher
+    assert first.ask("A") == "A"  # the bus is free while waiting
+    connection.status[2] = 64 + 16
+    threads[1].join(1)
+    assert results == {2: 80}
+    connection.status[1] = 64 + 1
+    threads[0].join(1)
+    assert results == {1: 65, 2: 80}
+    assert "++spoll 3" not in connection.lines
+    watcher.join(1)  # exits without waiting requests
+    assert not watcher.is_alive()
+    assert controller._watcher is None
+
+
+def test_controller_srq_timeout():
+    adapter = PrologixAdapter(FakeController(), address=1, read_termination="\n")
+    with pytest.raises(TimeoutError):
+        adapter.wait_for_srq(timeout=0.05, delay=0.01)
+    assert adapter.controller._requests == {}
@@ -0,0 +1,124 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import time
+
+import numpy as np
+import pytest
+
+from pymeasure.adapters import FakeAdapter, RecordingAdapter, ReplayAdapter
+from pymeasure.instruments import Instrument
+
+
+class SlowAdapter(FakeAdapter):
+    """ Bounces back commands after a moment and reads binary data """
+
+    def read(self):
+        time.sleep(0.02)
+        return super().read()
+
+    def read_binary_block(self, **kwargs):
+        return np.arange(4, dtype=np.float32)
+
+    def wait_for_srq(self, timeout=25, delay=0.1):
+        raise TimeoutError("No service request")
+
+
+class Source(Instrument):
+    voltage = Instrument.control("VOLT?", "%g", "")
+
+    def __init__(self, adapter):
+        super().__init__(adapter, "Source", includeSCPI=False)
+
+
+def record(filename):
+    adapter = RecordingAdapter(SlowAdapter(), filename)
+    source = Source(adapter)
+    source.voltage = 1.5
+    assert source.values("") == [1.5]
+    assert source.ask("A") == "A"
+    assert list(source.read_binary_block()) == [0, 1, 2, 3]
+    with pytest.raises(TimeoutError):
+        adapter.wait_for_srq()
+    adapter.close()
+
+
+def replay(source):
+    source.voltage = 1.5
+    assert source.values("") == [1.5]
+    assert source.ask("A") == "A"
+    assert list(source.read_binary_block()) == [0, 1, 2, 3]
+    with pytest.raises(TimeoutError):
+        source.adapter.wait_for_srq()
+
+
+def test_record_and_replay(tmp_path):
+    filename = str(tmp_path / "transcript.jsonl")
+    record(filename)
+    adapter = ReplayAdapter(filename)
+    assert adapter.remaining == 5
+    start = time.perf_counter()
+    replay(Source(adapter))
+    assert time.perf_counter() - start < 0.02
+    assert adapter.remaining == 0
+    with pytest.raises(ConnectionError):
+        adapter.read()
+
+
+def test_replay_latency(tmp_path):
+    filename = str(tmp_path / "transcript.jsonl")
+    record(filename)
+    start = time.perf_counter()
+    replay(Source(ReplayAdapter(filename, latency=2)))
+    assert time.perf_counter() - start >= 0.08  # 2 queries of 20 ms, twice as long
+
+
+def test_replay_mismatch(tmp_path):
+    filename = str(tmp_path / "transcript.jsonl")
+    record(filename)
+    adapter = ReplayAdapter(filename)
+    with pytest.raises(ValueError):
+        adapter.write("2.5")
+    adapter = ReplayAdapter(filename, strict=False)
+    adapter.write("2.5")
+    assert adapter.remaining == 4
+
+
+def test_transcript_is_flushed_and_arrays_keep_their_shape(tmp_path):
+    filename = str(tmp_path / "transcript.jsonl")
+    wrapped = SlowAdapter()
+    wrapped.binary_values = lambda *args: np.arange(6, dtype='>i2').reshape(2, 3)
+    adapter = RecordingAdapter(wrapped, filename)
+    adapter.write("A")
+    with open(filename) as f:
+        assert len(f.readlines()) == 2  # written before the adapter is closed
+    values = adapter.binary_values("CURV?")
+    adapter.close()
+
+    replay = ReplayAdapter(filename)
+    replay.write("A")
+    replayed = replay.binary_values("CURV?")
+    assert replayed.shape == (2, 3)
+    assert replayed.dtype == values.dtype
+    assert np.array_equal(replayed, values)
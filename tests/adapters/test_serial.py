@@ -22,6 +22,9 @@
 # THE SOFTWARE.
 #
 
+import time
+
+import numpy as np
 import pytest
 import serial
 
@@ -45,3 +48,51 @@ def test_adapter_write_binary_values(test_input, expected):
     # Add 10 bytes more, just to check that no extra bytes are present
     assert(adapter.connection.read(len(expected)+10) == expected)
 
+
+
+@pytest.mark.parametrize("is_big_endian", [False, True])
+def test_adapter_read_binary_block(is_big_endian):
+    adapter = make_adapter(timeout=0.2)
+    values = np.arange(300, dtype=np.int16)
+    data = values.astype(">i2" if is_big_endian else "<i2").tobytes()
+    adapter.connection.write(b" #3600" + data + b"\r\nNEXT\n")
+    block = adapter.read_binary_block(dtype=np.int16, is_big_endian=is_big_endian)
+    assert block.dtype == np.int16
+    assert np.array_equal(block, values)
+    assert adapter.read() == "NEXT\n"
+
+
+def test_adapter_read_binary_block_into_buffer():
+    adapter = make_adapter(timeout=0.2)
+    out = np.zeros(10, dtype=np.float32)
+    adapter.connection.write(b"#18" + np.array([1.5, -2], dtype=np.float32).tobytes())
+    block = adapter.read_binary_block(out=out, expect_termination=False)
+    assert np.shares_memory(block, out)
+    assert list(out[:3]) == [1.5, -2, 0]
+
+
+def test_adapter_read_binary_block_timeout():
+    adapter = make_adapter(timeout=0.05)
+    adapter.connection.write(b"#210\x00\x01")
+    with pytest.raises(ConnectionError):
+        adapter.read_binary_block(dtype=np.uint8)
+
+
+def test_adapter_read_termination():
+    adapter = SerialAdapter(serial.serial_for_url("loop://", timeout=1), read_termination="\r\n")
+    adapter.connection.write(b"1.5,2\r\nOK\r\nAB#14\x01\x02\x03\x04")
+    start = time.perf_counter()
+    assert adapter.values("") == [1.5, 2]  # the empty command is written, too
+    assert adapter.read() == "OK"
+    assert time.perf_counter() - start < 0.5  # no wait for the timeout
+    assert adapter.read_bytes(2) == b"AB"
+    assert list(adapter.read_binary_block(dtype=np.uint8, expect_termination=False)) == [1, 2, 3, 4]
+
+
+def test_adapter_read_termination_timeout():
+    adapter = SerialAdapter(serial.serial_for_url("loop://", timeout=0.05), read_termination="\n")
+    adapter.connection.write(b"partial")
+    with pytest.raises(ConnectionError):
+        adapter.read()
+    adapter.connection.write(b"next\n")
+    assert adapter.read() == "next"
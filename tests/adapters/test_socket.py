@@ -0,0 +1,93 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from pymeasure.adapters import SocketAdapter
+
+
+@pytest.fixture
+def server():
+    """ Returns a listening socket and a list collecting what the server's
+    handler returns """
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    yield listener
+    listener.close()
+
+
+def serve(listener, handler):
+    def run():
+        connection, _ = listener.accept()
+        with connection:
+            handler(connection)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_socket_adapter_ask(server):
+    def handler(connection):
+        assert connection.recv(100) == b"*IDN?\n"
+        connection.sendall(b"SCPI,")  # fragmented reply
+        time.sleep(0.05)
+        connection.sendall(b"FAKE\n1.5,2.5\n")
+        assert connection.recv(100) == b"MEAS?\n"
+
+    thread = serve(server, handler)
+    adapter = SocketAdapter(*server.getsockname(), timeout=1)
+    assert adapter.connection.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+    assert adapter.ask("*IDN?") == "SCPI,FAKE"
+    start = time.perf_counter()
+    assert adapter.values("MEAS?") == [1.5, 2.5]  # already received
+    assert time.perf_counter() - start < 0.5
+    thread.join()
+
+
+def test_socket_adapter_binary_block(server):
+    values = np.arange(100000, dtype=np.float32)
+
+    def handler(connection):
+        connection.recv(100)
+        connection.sendall(b"#6400000" + values.tobytes() + b"\nOK\n")
+
+    serve(server, handler)
+    adapter = SocketAdapter(*server.getsockname(), timeout=1)
+    adapter.write("CURV?")
+    assert np.array_equal(adapter.read_binary_block(), values)
+    assert adapter.read() == "OK"
+
+
+def test_socket_adapter_timeout(server):
+    serve(server, lambda connection: time.sleep(0.5))
+    adapter = SocketAdapter(*server.getsockname(), timeout=0.1, keepalive=True)
+    assert adapter.connection.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+    with pytest.raises(ConnectionError):
+        adapter.ask("*IDN?")
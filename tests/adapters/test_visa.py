@@ -24,6 +24,7 @@
 import importlib.util
 
 import pytest
+import pyvisa
 from pytest import approx
 
 from pymeasure.adapters import VISAAdapter
@@ -69,3 +70,43 @@ def test_visa_adapter_ask_values():
 def test_visa_adapter_write_binary_values():
     adapter = make_visa_adapter()
     adapter.write_binary_values("OUTP", [1], datatype='B')
+
+
+class EventConnection(object):
+    """ Stands in for a VISA resource whose status byte requests service after
+    a number of event waits, or never for None """
+
+    def __init__(self, waits):
+        self.waits = waits
+        self.enabled = False
+
+    def enable_event(self, event, mechanism):
+        self.enabled = True
+
+    def disable_event(self, event, mechanism):
+        self.enabled = False
+
+    def discard_events(self, event, mechanism):
+        pass
+
+    def wait_on_event(self, event, timeout):
+        assert self.enabled
+        if self.waits is None or self.waits == 0:
+            raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+        self.waits -= 1
+
+    def read_stb(self):
+        return 65 if self.waits == 0 else 0
+
+    def close(self):
+        pass
+
+
+def test_visa_wait_for_srq():
+    adapter = make_visa_adapter()
+    adapter.connection = EventConnection(waits=2)
+    assert adapter.wait_for_srq(timeout=1) == 65
+    assert not adapter.connection.enabled
+    adapter.connection = EventConnection(waits=None)
+    with pytest.raises(TimeoutError):
+        adapter.wait_for_srq(timeout=0.01)
@@ -0,0 +1,121 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import logging
+import os
+from time import sleep
+from unittest import mock
+
+from pymeasure.display.manager import Experiment, ImageManager, Manager
+from pymeasure.experiment import Procedure, Results, IntegerParameter
+
+
+class SleepProcedure(Procedure):
+    iterations = IntegerParameter('Iterations', default=20)
+    DATA_COLUMNS = ['Iteration']
+
+    def execute(self):
+        for i in range(self.iterations):
+            self.emit('results', {'Iteration': i})
+            sleep(0.01)
+            if self.should_stop():
+                break
+
+
+def make_experiment(tmpdir, name, resources):
+    procedure = SleepProcedure()
+    procedure.RESOURCES = resources
+    results = Results(procedure, os.path.join(str(tmpdir), name + '.csv'))
+    return Experiment(results, mock.MagicMock(), mock.MagicMock())
+
+
+def test_manager_runs_experiments_with_disjoint_resources_concurrently(qtbot, tmpdir):
+    manager = Manager(mock.MagicMock(), mock.MagicMock(), port=None, max_concurrent=2)
+    first = make_experiment(tmpdir, 'first', ['probe station 1'])
+    second = make_experiment(tmpdir, 'second', ['probe station 2'])
+    third = make_experiment(tmpdir, 'third', ['probe station 1'])
+    fourth = make_experiment(tmpdir, 'fourth', ['probe station 2'])
+    for experiment in (first, second, third, fourth):
+        manager.queue(experiment)
+
+    assert manager.running_experiments() == [first, second]
+    assert manager.running_experiment() is first
+    qtbot.waitUntil(lambda: third in manager.running_experiments(), timeout=5000)
+    qtbot.waitUntil(lambda: not manager.is_running(), timeout=5000)
+    for experiment in (first, second, third, fourth):
+        assert experiment.procedure.status == Procedure.FINISHED
+        assert experiment.results.data.shape == (20, 1)
+
+
+def test_manager_runs_undeclared_resources_exclusively(qtbot, tmpdir):
+    manager = Manager(mock.MagicMock(), mock.MagicMock(), port=None, max_concurrent=2)
+    first = make_experiment(tmpdir, 'first', ['probe station 1'])
+    second = make_experiment(tmpdir, 'second', None)
+    third = make_experiment(tmpdir, 'third', ['probe station 2'])
+    for experiment in (first, second, third):
+        manager.queue(experiment)
+
+    # The third experiment may not overtake the second one
+    assert manager.running_experiments() == [first]
+    qtbot.waitUntil(lambda: second in manager.running_experiments(), timeout=5000)
+    assert manager.running_experiments() == [second]
+    qtbot.waitUntil(lambda: not manager.is_running(), timeout=5000)
+    assert third.procedure.status == Procedure.FINISHED
+
+
+def test_manager_reuses_persistent_workers(qtbot, tmpdir):
+    manager = Manager(mock.MagicMock(), mock.MagicMock(), port=None, persistent=True)
+    experiments = [make_experiment(tmpdir, 'run%d' % i, None) for i in range(3)]
+    for experiment in experiments:
+        manager.queue(experiment)
+
+    qtbot.waitUntil(lambda: all(experiment.procedure.status == Procedure.FINISHED
+                                for experiment in experiments), timeout=5000)
+    qtbot.waitUntil(lambda: not manager.is_running(), timeout=5000)
+    assert len(manager._persistent_workers) == 1
+    for experiment in experiments:
+        experiment.browser_item.setProgress.assert_called_with(100.)
+        assert experiment.results.data.shape == (20, 1)
+    manager.close()
+
+
+def test_manager_does_not_start_experiments_twice(tmpdir):
+    manager = Manager(mock.MagicMock(), mock.MagicMock(), port=None, max_concurrent=2)
+    first = make_experiment(tmpdir, 'first', [])
+    second = make_experiment(tmpdir, 'second', [])
+    for experiment in (first, second):
+        experiment.procedure.status = Procedure.QUEUED
+        manager.experiments.append(experiment)
+    # The worker of the first experiment has not reported it as running yet
+    manager._running_experiments.append(first)
+    assert manager._startable_experiments() == [second]
+
+
+def test_image_manager_forwards_options():
+    manager = ImageManager(mock.MagicMock(), mock.MagicMock(), mock.MagicMock(), port=None,
+                           log_level=logging.DEBUG, max_concurrent=3, persistent=True)
+    assert manager.port is None
+    assert manager.log_level == logging.DEBUG
+    assert manager.max_concurrent == 3
+    assert manager.persistent
@@ -22,9 +22,12 @@
 # THE SOFTWARE.
 #
 
+import os
 import time
 from queue import Queue
 
+import numpy as np
+
 from pymeasure.experiment.listeners import Listener, Recorder
 from pymeasure.experiment.results import Results
 
@@ -38,3 +41,88 @@ def test_recorder_stop():
     r = Recorder(d, q)
     r.
 """
+
+
+def wait_until(condition, timeout=5):
+    """ Polls the condition until it holds or the timeout has passed """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_buffered_recorder_flushes_by_rows_and_on_stop(tmpdir):
+    from data.procedure_for_testing import RandomProcedure
+    filename = os.path.join(str(tmpdir), 'buffered.csv')
+    results = Results(RandomProcedure(), filename)
+    q = Queue()
+    recorder = Recorder(results, q, buffered=True, flush_interval=60, flush_rows=5)
+    recorder.start()
+
+    for i in range(7):
+        q.put({'Iteration': i, 'Random Number': 0.5})
+    assert wait_until(lambda: len(results.data) == 5)  # one batch has been written
+    assert len(results.data) == 5
+
+    recorder.stop()
+    assert not recorder.is_alive()
+    assert list(results.data['Iteration']) == list(range(7))
+
+
+def test_buffered_recorder_counts_the_rows_of_blocks(tmpdir):
+    from data.procedure_for_testing import RandomProcedure
+    filename = os.path.join(str(tmpdir), 'buffered.csv')
+    results = Results(RandomProcedure(), filename)
+    q = Queue()
+    recorder = Recorder(results, q, buffered=True, flush_interval=60, flush_rows=5)
+    recorder.start()
+
+    q.put({'Iteration': np.arange(3), 'Random Number': 0.5})
+    q.put({'Iteration': np.arange(3, 6), 'Random Number': 0.5})
+    assert wait_until(lambda: len(results.data) == 6)  # written before the stop
+    recorder.stop()
+    assert list(results.data['Iteration']) == list(range(6))
+
+
+def test_buffered_recorder_flushes_by_time(tmpdir):
+    from data.procedure_for_testing import RandomProcedure
+    filename = os.path.join(str(tmpdir), 'buffered.csv')
+    results = Results(RandomProcedure(), filename)
+    q = Queue()
+    recorder = Recorder(results, q, buffered=True, flush_interval=0.05, flush_rows=1000)
+    recorder.start()
+
+    q.put({'Iteration': 1, 'Random Number': 0.5})
+    assert wait_until(lambda: len(results.data) == 1)
+    recorder.stop()
+
+
+class CollectingListener(Listener):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = Queue()
+
+    def handle(self, topic, record):
+        self.received.put((topic, record))
+
+
+def test_listener_handles_messages_until_stopped():
+    from pymeasure.experiment.workers import Publisher
+    publisher = Publisher(5891)
+    listener = CollectingListener(port=5891, topic='results')
+    try:
+        listener.start()
+        assert publisher.wait_for_subscribers(timeout=5)
+        publisher.send('progress', 50.)
+        publisher.send('results', {'x': 1})
+        assert listener.received.get(timeout=5) == ('results', {'x': 1})
+
+        start = time.perf_counter()
+        listener.close()  # Stops the listener
+        assert not listener.is_alive()
+        assert time.perf_counter() - start < 1
+        assert listener.received.empty()
+    finally:
+        publisher.close()
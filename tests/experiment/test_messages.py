@@ -0,0 +1,158 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pymeasure.experiment import messages
+from pymeasure.experiment.messages import decode_message, encode_message
+
+tcp_libs_available = bool(importlib.util.find_spec('zmq'))
+
+
+@pytest.mark.parametrize('packer', ['msgpack', 'json'])
+def test_encode_decode_message(monkeypatch, packer):
+    if packer == 'json':
+        monkeypatch.setattr(messages, 'msgpack', None)
+    elif messages.msgpack is None:
+        pytest.skip('msgpack is not installed')
+    records = [
+        {'x': 1, 'y': np.float64(2.5), 'z': np.int32(3), 'name': 'abc', 'flag': True},
+        {'x': np.arange(6, dtype=np.int16).reshape(2, 3), 'raw': b'\x00\x01'},
+        pd.DataFrame({'a': [1., 2.], 'b': [3, 4]}),
+    ]
+    frames = encode_message('results', records)
+    assert len(frames) == 2 + 4  # topic, header and the buffers
+    topic, decoded = decode_message(frames)
+    assert topic == 'results'
+    assert decoded[0] == {'x': 1, 'y': 2.5, 'z': 3, 'name': 'abc', 'flag': True}
+    assert decoded[1]['x'].dtype == np.int16
+    assert np.array_equal(decoded[1]['x'], records[1]['x'])
+    assert np.shares_memory(decoded[1]['x'], frames[2])
+    assert decoded[1]['raw'] == b'\x00\x01'
+    assert decoded[2].equals(records[2])
+
+
+def test_pickle_fallback_is_opt_in():
+    records = [{'x': object}]
+    with pytest.raises(TypeError):
+        encode_message('results', records)
+    frames = encode_message('results', records, pickle_fallback=True)
+    with pytest.raises(ValueError):
+        decode_message(frames)
+    assert decode_message(frames, allow_pickle=True) == ('results', records)
+
+
+def test_large_integers():
+    if messages.msgpack is None:
+        pytest.skip("JSON encodes integers of any size")
+    batch = messages.MessageBatch('results')
+    with pytest.raises(OverflowError):
+        batch.add({'x': 2**70, 'y': np.zeros(2)})
+    assert len(batch) == 0 and batch.buffers == []
+    frames = encode_message('results', [{'x': 2**70}], pickle_fallback=True)
+    assert decode_message(frames, allow_pickle=True) == ('results', [{'x': 2**70}])
+
+
+@pytest.mark.skipif(not tcp_libs_available,
+                    reason='TCP communication packages not installed')
+def test_publisher_batches_records():
+    from pymeasure.experiment.listeners import Listener
+    from pymeasure.experiment.workers import Publisher
+    publisher = Publisher(5893, batch_interval=1, batch_size=100)
+    listener = Listener(port=5893, timeout=5)
+    try:
+        assert publisher.wait_for_subscribers(timeout=5)
+        for i in range(150):
+            publisher.send('results', {'i': i})
+        publisher.send('progress', 50.)  # flushes the pending results
+        publisher.flush()
+        received = []
+        while len(received) < 151 and listener.message_waiting():
+            received.append(listener.receive())
+        assert received[:150] == [('results', {'i': i}) for i in range(150)]
+        assert received[150] == ('progress', 50.)
+        assert not listener.message_waiting(timeout=0.1)
+    finally:
+        listener.close()
+        publisher.close()
+
+
+@pytest.mark.skipif(not tcp_libs_available,
+                    reason='TCP communication packages not installed')
+def test_publisher_batches_interleaved_topics():
+    from pymeasure.experiment.listeners import Listener
+    from pymeasure.experiment.workers import Publisher
+    publisher = Publisher(5894, batch_interval=0.05, batch_size=1000)
+    listener = Listener(port=5894, timeout=5)
+    try:
+        assert publisher.wait_for_subscribers(timeout=5)
+        for i in range(200):  # as emitted by a procedure loop
+            publisher.send('results', {'i': i})
+            publisher.send('progress', i / 2.)
+        records = {'results': [], 'progress': []}
+        messages_received = 0
+        while len(records['results']) + len(records['progress']) < 400:
+            assert listener.subscriber.poll(2000)
+            topic, received = decode_message(listener.subscriber.recv_multipart())
+            records[topic].extend(received)
+            messages_received += 1
+        assert messages_received < 40
+        assert records['results'] == [{'i': i} for i in range(200)]
+        assert records['progress'] == [i / 2. for i in range(200)]
+    finally:
+        listener.close()
+        publisher.close()
+
+
+@pytest.mark.skipif(not tcp_libs_available,
+                    reason='TCP communication packages not installed')
+def test_publisher_survives_records_which_can_not_be_sent(monkeypatch):
+    from pymeasure.experiment.listeners import Listener
+    from pymeasure.experiment.workers import Publisher
+    publisher = Publisher(5895, batch_interval=0.01)
+    listener = Listener(port=5895, timeout=5)
+    try:
+        assert publisher.wait_for_subscribers(timeout=5)
+        with pytest.raises(TypeError):
+            publisher.send('results', {'z': np.complex128(1 + 2j)})
+        publisher.send('results', {'i': 1})
+        assert listener.message_waiting()
+        assert listener.receive() == ('results', {'i': 1})
+
+        # A batch which fails to be packed is dropped by the flusher thread
+        frames = messages.MessageBatch.frames
+        monkeypatch.setattr(messages.MessageBatch, 'frames', lambda batch: 1 / 0)
+        publisher.send('results', {'i': 2})
+        assert not listener.message_waiting(timeout=0.1)
+        monkeypatch.setattr(messages.MessageBatch, 'frames', frames)
+        publisher.send('results', {'i': 3})
+        assert listener.message_waiting()
+        assert listener.receive() == ('results', {'i': 3})
+    finally:
+        listener.close()
+        publisher.close()
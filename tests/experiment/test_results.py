@@ -23,7 +23,6 @@
 #
 
 import pytest
-from unittest import mock
 
 import os
 import tempfile
@@ -31,7 +30,7 @@ import pickle
 from importlib.machinery import SourceFileLoader
 import pandas as pd
 import numpy as np
-from pymeasure.experiment.results import Results, CSVFormatter
+from pymeasure.experiment.results import Results, CSVFormatter, DataBuffer, SharedDataBuffer
 from pymeasure.experiment.procedure import Procedure, Parameter
 from pymeasure.experiment import BooleanParameter
 
@@ -64,6 +63,62 @@ def test_csv_formatter_format():
     assert formatter.format(data) == '1,-1,2,3.0,abc'
 
 
+def test_data_buffer_append():
+    buffer = DataBuffer(['x', 'y'], capacity=2)
+    buffer.append(pd.DataFrame({'x': [1, 2], 'y': [3, 4]}))
+    assert buffer.frame()['x'].dtype == np.int64
+    buffer.append(pd.DataFrame({'y': [5.5, 6.5, 7.5], 'x': [3, 4, 5]}))
+    frame = buffer.frame()
+    assert len(buffer) == 5
+    assert frame['x'].dtype == np.int64
+    assert frame['y'].dtype == np.float64
+    assert list(frame['y']) == [3, 4, 5.5, 6.5, 7.5]
+    assert np.shares_memory(frame['x'].to_numpy(), buffer.column('x'))
+
+
+def test_data_buffer_append_rows():
+    buffer = DataBuffer(['x', 'y'], capacity=1)
+    buffer.append({'x': 1, 'y': 2})
+    buffer.append({'x': 2, 'y': 2.5, 'z': 'ignored'})
+    buffer.append({'x': np.arange(3), 'y': 0.5})
+    assert list(buffer.frame()['y']) == [2, 2.5, 0.5, 0.5, 0.5]
+    buffer.append({'x': 'abc', 'y': 3})
+    frame = buffer.frame()
+    assert frame['x'].tolist() == [1, 2, 0, 1, 2, 'abc']
+    assert frame['x'].dtype == object
+    assert frame['y'].dtype == np.float64
+    assert frame['y'].tolist() == [2, 2.5, 0.5, 0.5, 0.5, 3]
+    buffer.append(pd.DataFrame({'x': ['d', 'e'], 'y': [4, 5]}))
+    assert buffer.frame()['y'].dtype == np.float64
+
+
+def test_shared_data_buffer_is_followed_when_pickled():
+    buffer = SharedDataBuffer(['x', 'y'], capacity=2)
+    try:
+        reader = pickle.loads(pickle.dumps(buffer))
+        assert len(reader) == 0
+        buffer.append({'x': 1, 'y': 2})
+        assert reader.array.tolist() == [[1, 2]]
+        buffer.append({'x': np.arange(5), 'y': np.ones(5)})  # reallocates
+        assert len(reader) == 6
+        assert reader.frame()['x'].tolist() == [1, 0, 1, 2, 3, 4]
+        with pytest.raises(RuntimeError):
+            reader.append({'x': 1, 'y': 2})
+        with pytest.raises(TypeError):
+            buffer.append({'x': 'abc', 'y': 2})
+        reader.close()
+    finally:
+        buffer.close()
+
+
+def test_csv_formatter_format_block():
+    """Tests CSVFormatter.format() method with a block of rows."""
+    formatter = CSVFormatter(columns=['x', 'y', 'z'])
+    data = {'x': np.array([1, 2, 3]), 'y': np.array([0.5, 1.5, 2.5]), 'z': 'abc'}
+    assert formatter.format(data) == '1,0.5,abc\n2,1.5,abc\n3,2.5,abc'
+    assert formatter.format(pd.DataFrame(data)) == formatter.format(data)
+
+
 def test_procedure_wrapper():
     assert RandomProcedure.iterations.value == 100
     procedure = RandomProcedure()
@@ -80,29 +135,75 @@ def test_procedure_wrapper():
 class TestResults:
     # TODO: add a full set of Results tests
 
-    @mock.patch('pymeasure.experiment.results.open', mock.mock_open(), create=True)
-    @mock.patch('os.path.exists', return_value=True)
-    @mock.patch('pymeasure.experiment.results.pd.read_csv')
-    def test_regression_attr_data_when_up_to_date_should_retain_dtype(self,
-            read_csv_mock, path_exists_mock):
-        procedure_mock = mock.MagicMock(spec=Procedure)
-        result = Results(procedure_mock, 'test.csv')
-
-        read_csv_mock.return_value = [pd.DataFrame(data={
-                'A': [1,2,3,4,5,6,7],
-                'B': [2,3,4,5,6,7,8]
-            })]
+    def test_regression_attr_data_when_up_to_date_should_retain_dtype(self, tmpdir):
+        procedure = RandomProcedure()
+        filename = os.path.join(str(tmpdir), 'dtype_test.csv')
+        result = Results(procedure, filename)
+        with open(filename, 'a') as f:
+            f.write("".join("%d,%d\n" % (i, i + 1) for i in range(1, 8)))
         first_data = result.data
 
-        # if no updates, read_csv returns a zero-row dataframe
-        read_csv_mock.return_value = [pd.DataFrame(data={
-            'A': [], 'B': []
-            }, dtype=object)]
+        # if no updates, no rows are appended to the data
         second_data = result.data
 
         assert second_data.iloc[:,0].dtype is not object
         assert first_data.iloc[:,0].dtype is second_data.iloc[:,0].dtype
-        
+
+    def test_data_is_read_incrementally(self, tmpdir):
+        procedure = RandomProcedure()
+        filename = os.path.join(str(tmpdir), 'incremental_test.csv')
+        result = Results(procedure, filename)
+        assert list(result.data.columns) == RandomProcedure.DATA_COLUMNS
+        assert len(result.data) == 0
+
+        with open(filename, 'a') as f:
+            f.write("0,0.5\n1,0.")  # last line is only partially written
+        assert result.data.shape == (1, 2)
+        offset = result.storage._reader.offset
+
+        with open(filename, 'a') as f:
+            f.write("25\n2,0.75\n")
+        data = result.data
+        assert result.storage._reader.offset > offset
+        assert data.shape == (3, 2)
+        assert list(data['Random Number']) == [0.5, 0.25, 0.75]
+
+        result.reload()
+        assert result.data.equals(data)
+
+    def test_data_is_reread_when_file_is_truncated(self, tmpdir):
+        procedure = RandomProcedure()
+        filename = os.path.join(str(tmpdir), 'truncated_test.csv')
+        result = Results(procedure, filename)
+        with open(filename, 'a') as f:
+            f.write("0,0.5\n1,0.25\n")
+        assert result.data.shape == (2, 2)
+
+        with open(filename, 'w') as f:  # replaced by a shorter file
+            f.write("Iteration,Random Number\n7,0.125\n")
+        data = result.data
+        assert data.shape == (1, 2)
+        assert list(data['Iteration']) == [7]
+
+    def test_live_data_is_not_read_from_storage(self, tmpdir):
+        procedure = RandomProcedure()
+        filename = os.path.join(str(tmpdir), 'live_test.csv')
+        result = Results(procedure, filename)
+        with open(filename, 'a') as f:
+            f.write("0,0.5\n")
+        result.append({'Iteration': 1, 'Random Number': 0.25})
+        assert result.live
+        with open(filename, 'a') as f:
+            f.write("1,0.25\n")
+        data = result.data
+        assert list(data['Random Number']) == [0.5, 0.25]
+        assert np.shares_memory(data['Iteration'].to_numpy(),
+                                result.buffer.column('Iteration'))
+
+        new_result = pickle.loads(pickle.dumps(result))
+        assert not new_result.live
+        assert new_result.data.equals(data)
+
     def test_regression_param_str_should_not_include_newlines(self, tmpdir):
         class DummyProcedure(Procedure):
             par = Parameter('Generic Parameter with newline chars')           
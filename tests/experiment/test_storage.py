@@ -0,0 +1,126 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import logging
+import os
+
+import numpy as np
+import pytest
+
+from pymeasure.experiment.results import Results
+from pymeasure.experiment.storage import CSVStorage, ColumnStorage, storage_class
+from pymeasure.experiment.workers import Worker
+
+from data.procedure_for_testing import RandomProcedure
+
+
+def test_storage_class(tmpdir):
+    directory = os.path.join(str(tmpdir), 'data.cols')
+    Results(RandomProcedure(), directory, storage=ColumnStorage)
+    assert storage_class(directory) is ColumnStorage
+    assert storage_class(os.path.join(directory, ColumnStorage.SIDECAR)) is ColumnStorage
+
+    filename = os.path.join(str(tmpdir), 'data.csv')
+    Results(RandomProcedure(), filename)
+    assert storage_class(filename) is CSVStorage
+
+
+def test_column_storage_append_and_read(tmpdir):
+    storage = ColumnStorage(os.path.join(str(tmpdir), 'data.cols'),
+                            dtype={'x': np.int32})
+    storage.create("#Procedure: <Test>", ['x', 'y'])
+    assert storage.read().shape == (0, 2)
+
+    storage.append([{'x': 1, 'y': 0.5}, {'x': 2, 'y': 0.25}])
+    data = storage.read()
+    assert list(data['x']) == [1, 2]
+    assert data['x'].dtype == np.int32
+    assert data['y'].dtype == np.float64
+
+    storage.append([{'x': 3, 'y': 0.125}])
+    assert list(storage.read()['y']) == [0.125]
+    storage.close()
+
+    storage.reset()
+    assert storage.read().shape == (3, 2)
+    assert storage.read_header() == "#Procedure: <Test>"
+
+
+def test_column_storage_read_truncated_files(tmpdir):
+    storage = ColumnStorage(os.path.join(str(tmpdir), 'data.cols'))
+    storage.create("#Procedure: <Test>", ['x', 'y'])
+    storage.append([{'x': 1, 'y': 0.5}, {'x': 2, 'y': 0.25}])
+    storage.close()
+    assert len(storage.read()) == 2
+
+    storage.create("#Procedure: <Test>", ['x', 'y'])  # replaces the column files
+    with pytest.raises(ValueError, match="truncated or replaced"):
+        storage.read()
+    storage.reset()
+    assert storage.read().shape == (0, 2)
+
+
+def test_column_storage_results_round_trip(tmpdir):
+    procedure = RandomProcedure()
+    procedure.iterations = 50
+    directory = os.path.join(str(tmpdir), 'data.cols')
+    results = Results(procedure, directory, storage=ColumnStorage)
+    worker = Worker(results)
+    worker.start()
+    worker.join(timeout=5)
+    assert results.data.shape == (50, 2)
+
+    new_results = Results.load(os.path.join(directory, ColumnStorage.SIDECAR),
+                               procedure_class=RandomProcedure)
+    assert isinstance(new_results.storage, ColumnStorage)
+    assert new_results.procedure.iterations == 50
+    # The column files hold floats, while the live buffer kept the integers
+    assert np.allclose(new_results.data, results.data)
+    assert list(new_results.data['Iteration']) == list(range(50))
+
+
+def test_column_storage_append_converts_all_columns_first(tmpdir):
+    storage = ColumnStorage(os.path.join(str(tmpdir), 'data.cols'))
+    storage.create("#Procedure: <Test>", ['x', 'y'])
+    with pytest.raises(ValueError):
+        storage.append([{'x': 1, 'y': 'abc'}])
+    storage.append([{'x': 2, 'y': 0.5}])
+    storage.close()
+    data = storage.read()
+    assert list(data['x']) == [2]
+    assert list(data['y']) == [0.5]
+
+
+def test_results_log_shrinking_column_files(tmpdir, caplog):
+    procedure = RandomProcedure()
+    directory = os.path.join(str(tmpdir), 'data.cols')
+    results = Results(procedure, directory, storage=ColumnStorage)
+    results.storage.append([{'Iteration': 1, 'Random Number': 0.5}])
+    assert len(results.data) == 1
+
+    results.storage.create(results.header(), procedure.DATA_COLUMNS)
+    with caplog.at_level(logging.WARNING):
+        assert len(results.data) == 1  # the loaded data is kept
+        assert len(results.data) == 1
+    assert [r.message.count("truncated or replaced") for r in caplog.records] == [1]
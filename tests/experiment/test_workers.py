@@ -26,13 +26,16 @@ import logging
 
 import pytest
 import os
+import numpy as np
+import pandas as pd
 import tempfile
-from time import sleep
+from time import monotonic, sleep
 from importlib.machinery import SourceFileLoader
 
 from pymeasure.experiment import Listener, Procedure
-from pymeasure.experiment.workers import Worker
+from pymeasure.experiment.workers import Worker, PersistentWorker, ProcessWorker, Publisher
 from pymeasure.experiment.results import Results
+from pymeasure.experiment.storage import CSVStorage, ColumnStorage
 
 tcp_libs_available = bool(importlib.util.find_spec('cloudpickle')
                           and importlib.util.find_spec('zmq'))
@@ -127,10 +130,9 @@ def test_zmq_topic_filtering_works(caplog):
     file = tempfile.mktemp()
     results = Results(procedure, file)
     received = []
-    worker = Worker(results, port=5888, log_level=logging.DEBUG)
+    worker = Worker(results, port=5888, log_level=logging.DEBUG, subscribers=1)
     listener = Listener(port=5888, topic='results', timeout=0.1)
-    sleep(0.5)  # leave time for subscriber and publisher to establish a connection
-    worker.start()
+    worker.start()  # waits for the subscription of the listener
     while True:
         if not listener.message_waiting():
             break
@@ -140,3 +142,166 @@ def test_zmq_topic_filtering_works(caplog):
     assert procedure.status == procedure.FINISHED
     assert len(received) == 3
     assert all([item[0] == 'results' for item in received])
+
+@pytest.mark.skipif(not tcp_libs_available,
+                    reason='TCP communication packages not installed')
+def test_worker_does_not_wait_without_subscribers():
+    procedure = RandomProcedure()
+    results = Results(procedure, tempfile.mktemp())
+    worker = Worker(results, port=5889)
+    try:
+        start = monotonic()
+        worker.wait_for_subscribers()
+        assert monotonic() - start < 0.1
+    finally:
+        worker.close()
+
+
+def test_worker_buffered_recording():
+    procedure = RandomProcedure()
+    procedure.iterations = 100
+    procedure.delay = 0.001
+    file = tempfile.mktemp()
+    results = Results(procedure, file)
+    worker = Worker(results, recorder_kwargs={'buffered': True, 'flush_interval': 60})
+    worker.start()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    new_results = Results.load(file, procedure_class=RandomProcedure)
+    assert new_results.data.shape == (100, 2)
+    assert results.live
+    assert np.allclose(results.data.to_numpy(), new_results.data.to_numpy())
+
+class BlockProcedure(Procedure):
+    DATA_COLUMNS = ['Time', 'Voltage', 'Channel']
+
+    def execute(self):
+        times = np.arange(500) * 1e-3
+        self.emit('results', {'Time': times, 'Voltage': np.sin(times), 'Channel': 1})
+        self.emit('results', {'Time': 0.5, 'Voltage': 0., 'Channel': 2})
+        self.emit('results', pd.DataFrame({'Time': times[:10], 'Voltage': times[:10],
+                                           'Channel': 3}))
+
+
+@pytest.mark.parametrize('storage', [CSVStorage, ColumnStorage])
+@pytest.mark.parametrize('buffered', [False, True])
+def test_worker_records_blocks(tmpdir, storage, buffered):
+    procedure = BlockProcedure()
+    file = os.path.join(str(tmpdir), 'blocks')
+    results = Results(procedure, file, storage=storage)
+    worker = Worker(results, recorder_kwargs={'buffered': buffered})
+    worker.start()
+    worker.join(timeout=5)
+
+    data = Results.load(file, procedure_class=BlockProcedure).data
+    assert data.shape == (511, 3)
+    assert list(data['Channel'].iloc[[0, 499, 500, 501]]) == [1, 1, 2, 3]
+    assert np.allclose(data['Voltage'][:500], np.sin(np.arange(500) * 1e-3))
+
+
+def test_process_worker_streams_results():
+    procedure = RandomProcedure()
+    procedure.iterations = 50
+    file = tempfile.mktemp()
+    results = Results(procedure, file)
+    worker = ProcessWorker(results)
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive()
+    assert worker.exitcode == 0
+    assert results.procedure.status == Procedure.FINISHED
+    assert results.live
+    assert results.data.shape == (50, 2)
+    messages = []
+    while not worker.monitor_queue.empty():
+        messages.append(worker.monitor_queue.get())
+    assert ('status', Procedure.FINISHED) in messages
+    assert messages[-1] is None
+    new_results = Results.load(file, procedure_class=RandomProcedure)
+    assert np.allclose(new_results.data.to_numpy(), results.data.to_numpy())
+
+
+def test_process_worker_stop():
+    procedure = RandomProcedure()
+    procedure.iterations = 10000
+    procedure.delay = 0.01
+    file = tempfile.mktemp()
+    results = Results(procedure, file)
+    worker = ProcessWorker(results)
+    worker.start()
+    assert wait_for_status(results.procedure, Procedure.RUNNING)
+    worker.stop()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert results.procedure.status == Procedure.ABORTED
+
+
+def test_persistent_worker_runs_submitted_results():
+    worker = PersistentWorker()
+    worker.start()
+    results = []
+    for i in range(3):
+        procedure = RandomProcedure()
+        procedure.iterations = 10 + i
+        results.append(Results(procedure, tempfile.mktemp()))
+        worker.submit(results[-1])
+    worker.finish(timeout=10)
+
+    assert not worker.is_alive()
+    for i, result in enumerate(results):
+        assert result.procedure.status == Procedure.FINISHED
+        assert result.data.shape == (10 + i, 2)
+        stored = Results.load(result.data_filename, procedure_class=RandomProcedure)
+        assert stored.data.shape == (10 + i, 2)
+    messages = []
+    while not worker.monitor_queue.empty():
+        messages.append(worker.monitor_queue.get())
+    assert messages.count(('status', Procedure.FINISHED)) == 3
+    assert messages[-1] is None
+
+
+def wait_for_status(procedure, status, timeout=10):
+    """ Polls the status of the procedure until it is reached or the
+    timeout has passed """
+    deadline = monotonic() + timeout
+    while procedure.status != status:
+        if monotonic() > deadline:
+            return False
+        sleep(0.01)
+    return True
+
+
+def test_persistent_worker_abort_continues_with_next_results():
+    worker = PersistentWorker()
+    worker.start()
+    slow = RandomProcedure()
+    slow.iterations = 10000
+    slow.delay = 0.01
+    fast = RandomProcedure()
+    slow_results = Results(slow, tempfile.mktemp())
+    fast_results = Results(fast, tempfile.mktemp())
+    worker.submit(slow_results)
+    worker.submit(fast_results)
+    assert wait_for_status(slow, Procedure.RUNNING)
+    worker.abort()
+    worker.finish(timeout=10)
+
+    assert slow.status == Procedure.ABORTED
+    assert fast.status == Procedure.FINISHED
+
+
+@pytest.mark.skipif(not tcp_libs_available,
+                    reason='TCP communication packages not installed')
+def test_publisher_waits_for_subscribers():
+    publisher = Publisher(5889)
+    try:
+        assert not publisher.wait_for_subscribers(timeout=0.1)
+        listener = Listener(port=5889, topic='results', timeout=1)
+        assert publisher.wait_for_subscribers(timeout=5)
+        publisher.send('results', {'x': 1})
+        assert listener.message_waiting()
+        assert listener.receive() == ('results', {'x': 1})
+    finally:
+        publisher.close()
@@ -0,0 +1,76 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import socket
+import threading
+
+import pytest
+
+from pymeasure.instruments.attocube import AttocubeConsoleAdapter
+
+REPLIES = {
+    "echo off": "OK\r\n",
+    "getv 1": "voltage = 10.000000 V\r\nOK\n",  # inconsistent line endings
+    "setv 1 5": "OK\r\n",
+    "setv 1 500": "Parameter out of range\r\nERROR\r\n",
+    "getm 1": "Wrong axis\r\nERROR\r\n",
+}
+
+
+def console(listener):
+    """ Serves a fake Attocube standard console """
+    connection, _ = listener.accept()
+    with connection, connection.makefile('rb') as lines:
+        connection.sendall(b"attocube ANC300\r\nAuthorization code: ")
+        passwd = lines.readline().strip()
+        reply = "success" if passwd == b"123456" else "failed"
+        connection.sendall(b"\r\nAuthorization %s\r\n" % reply.encode())
+        for line in lines:
+            connection.sendall(REPLIES[line.decode().strip()].encode())
+
+
+@pytest.fixture
+def console_address():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    threading.Thread(target=console, args=(listener,), daemon=True).start()
+    yield listener.getsockname()
+    listener.close()
+
+
+def test_console(console_address):
+    adapter = AttocubeConsoleAdapter(*console_address, passwd="123456", timeout=1)
+    assert adapter.values("getv 1") == [10]
+    adapter.write("setv 1 5")
+    with pytest.raises(ValueError, match="out of range"):
+        adapter.write("setv 1 500")
+    with pytest.raises(ValueError, match="Wrong axis"):
+        adapter.ask("getm 1")
+    assert adapter.ask("getv 1") == "voltage = 10.000000 V"
+
+
+def test_console_authorization(console_address):
+    with pytest.raises(Exception, match="authorization failed"):
+        AttocubeConsoleAdapter(*console_address, passwd="wrong", timeout=1)
@@ -0,0 +1,64 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+
+from pymeasure.adapters import Adapter
+from pymeasure.instruments.keithley import Keithley2400
+
+
+class RecordingAdapter(Adapter):
+    """ Records the messages written to the instrument, which reports
+    no errors """
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def write(self, command):
+        self.messages.append(command)
+
+    def read(self):
+        return '0,"No error"\n'
+
+
+def test_apply_current_auto_range():
+    sourcemeter = Keithley2400(RecordingAdapter())
+    sourcemeter.apply_current(compliance_voltage=10)
+    assert sourcemeter.adapter.messages == [
+        ":SOUR:FUNC CURR;:SOUR:CURR:RANG:AUTO 1;:SENS:VOLT:PROT 10",
+        ":system:error?"]
+
+
+def test_apply_voltage_auto_range():
+    sourcemeter = Keithley2400(RecordingAdapter())
+    sourcemeter.apply_voltage(compliance_current=0.01)
+    assert sourcemeter.adapter.messages == [
+        ":SOUR:FUNC VOLT;:SOUR:VOLT:RANG:AUTO 1;:SENS:CURR:PROT 0.01",
+        ":system:error?"]
+
+
+def test_auto_range_source_mode():
+    sourcemeter = Keithley2400(RecordingAdapter())
+    sourcemeter.auto_range_source('voltage')
+    assert sourcemeter.adapter.messages == [":SOUR:VOLT:RANG:AUTO 1"]
@@ -0,0 +1,151 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+from concurrent.futures import CancelledError
+from threading import Thread
+
+import pytest
+
+from pymeasure.adapters import Adapter
+from pymeasure.instruments import Instrument
+
+
+class ScpiAdapter(Adapter):
+    """ Records the messages and answers the queries of compound messages """
+
+    def __init__(self, replies):
+        super().__init__()
+        self.replies = replies
+        self.messages = []
+
+    def write(self, command):
+        self.messages.append(command)
+
+    def ask(self, command):
+        self.messages.append(command)
+        return ";".join(self.replies[c] for c in command.split(";") if c.endswith("?")) + "\n"
+
+
+class Meter(Instrument):
+    current = Instrument.control(":SOUR:CURR?", ":SOUR:CURR %g", "")
+    mode = Instrument.control(":SOUR:FUNC?", ":SOUR:FUNC %s", "",
+                              values={'current': 'CURR', 'voltage': 'VOLT'}, map_values=True)
+    voltage = Instrument.measurement(":MEAS:VOLT?", "")
+
+    def __init__(self, replies):
+        super().__init__(ScpiAdapter(replies), "Meter", includeSCPI=False)
+
+
+def test_batch_writes():
+    meter = Meter({})
+    with meter.batch():
+        meter.mode = 'current'
+        meter.current = 1e-3
+        meter.write(":OUTP ON")
+        assert meter.adapter.messages == []
+    assert meter.adapter.messages == [":SOUR:FUNC CURR;:SOUR:CURR 0.001;:OUTP ON"]
+
+
+def test_batch_queries():
+    meter = Meter({":SOUR:FUNC?": "VOLT", ":MEAS:VOLT?": "1.5,2.5", "*IDN?": "Meter"})
+    with meter.batch() as batch:
+        meter.current = 1e-3
+        mode = batch.get('mode')
+        voltage = batch.get('voltage')
+        idn = batch.ask("*IDN?")
+        values = batch.values(":MEAS:VOLT?", cast=str)
+    assert meter.adapter.messages == [":SOUR:CURR 0.001;:SOUR:FUNC?;:MEAS:VOLT?;*IDN?;:MEAS:VOLT?"]
+    assert mode.result() == 'voltage'
+    assert voltage.result() == [1.5, 2.5]
+    assert idn.result() == "Meter"
+    assert values.result() == ["1.5", "2.5"]
+
+
+def test_batch_max_length():
+    meter = Meter({})
+    with meter.batch(max_length=30):
+        for i in range(5):
+            meter.write(":CMD %d" % i)  # 6 characters
+    assert meter.adapter.messages == [":CMD 0;:CMD 1;:CMD 2;:CMD 3", ":CMD 4"]
+
+
+def test_batch_result_sends():
+    meter = Meter({":MEAS:VOLT?": "3"})
+    with meter.batch() as batch:
+        meter.write(":INIT")
+        assert batch.get('voltage').result() == 3
+        meter.write(":ABOR")
+        assert meter.voltage == 3  # reading directly sends the batch, too
+        assert meter.adapter.messages == [":INIT;:MEAS:VOLT?", ":ABOR", ":MEAS:VOLT?"]
+
+
+def test_batch_exception_discards():
+    meter = Meter({":MEAS:VOLT?": "3"})
+    with pytest.raises(ZeroDivisionError):
+        with meter.batch() as batch:
+            meter.write(":INIT")
+            voltage = batch.get('voltage')
+            1 / 0
+    assert meter.adapter.messages == []
+    with pytest.raises(CancelledError):
+        voltage.result()
+
+
+def test_batch_other_threads():
+    meter = Meter({})
+    with meter.batch():
+        meter.write(":A")
+        thread = Thread(target=meter.write, args=(":B",))
+        thread.start()
+        thread.join()
+    assert meter.adapter.messages == [":B", ":A"]
+
+
+def test_controls():
+    class Source(Meter):
+        level = Instrument.control(":LEV?", ":LEV %g", "")
+        current = Instrument.measurement(":MEAS:CURR?", "")  # no longer a control
+
+    assert Meter.controls() == ['current', 'mode']
+    assert Source.controls() == ['mode', 'level']
+
+
+def test_snapshot():
+    meter = Meter({":SOUR:CURR?": "0.001", ":SOUR:FUNC?": "CURR"})
+    assert meter.snapshot() == {'current': 1e-3, 'mode': 'current'}
+    assert meter.adapter.messages == [":SOUR:CURR?;:SOUR:FUNC?"]
+    assert meter.snapshot(['mode'], max_length=0) == {'mode': 'current'}
+
+
+def test_apply_state():
+    meter = Meter({":SOUR:CURR?": "0.001", ":SOUR:FUNC?": "CURR"})
+    assert meter.apply_state({'current': 1e-3, 'mode': 'voltage'}) == ['current', 'mode']
+    assert meter.adapter.messages == [":SOUR:CURR 0.001;:SOUR:FUNC VOLT"]
+    meter.adapter.messages.clear()
+    meter.snapshot()
+    meter.adapter.messages.clear()
+    assert meter.apply_state({'current': 2e-3, 'mode': 'current'}) == ['current']
+    assert meter.adapter.messages == [":SOUR:CURR 0.002"]
+    with pytest.raises(AttributeError):
+        meter.apply_state({'voltage': 1})
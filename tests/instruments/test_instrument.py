@@ -22,8 +22,15 @@
 # THE SOFTWARE.
 #
 
+import asyncio
+import time
+from threading import Event, Thread
+from types import SimpleNamespace
+
+import numpy as np
 import pytest
 from pymeasure.adapters import FakeAdapter
+from pymeasure.instruments import instrument as instrument_module
 from pymeasure.instruments.instrument import Instrument, FakeInstrument
 from pymeasure.instruments.validators import strict_discrete_set, strict_range
 
@@ -234,6 +241,40 @@ def test_control_multivalue():
     assert fake.read() == '5,6'
 
 
+def test_measurement_container():
+    class Fake(FakeInstrument):
+        trace = Instrument.measurement(
+            "1.5,2.5,3.5", "", container=np.ndarray,
+        )
+
+    fake = Fake()
+    trace = fake.trace  # FakeAdapter bounces the command back
+    assert isinstance(trace, np.ndarray)
+    assert list(trace) == [1.5, 2.5, 3.5]
+
+
+def test_async_control():
+    class Fake(FakeInstrument):
+        x = Instrument.control(
+            "", "%d", "",
+            values={'A': 1, 'B': 2}, map_values=True,
+        )
+        y = Instrument.setting("%d", "")
+
+    async def main(fake):
+        await fake.aset('x', 'B')
+        assert await fake.aget('x') == 'B'
+        await fake.aset('y', 7)
+        assert await fake.aread() == '7'
+        assert await fake.aask('4') == '4'
+        assert await fake.avalues('4,5') == [4, 5]
+        assert await fake.aget('id') == "Warning: Property not implemented."
+
+    fake = Fake()
+    assert fake.async_adapter.adapter is fake.adapter
+    asyncio.run(main(fake))
+
+
 @pytest.mark.parametrize(
     'set_command, given, expected',
     [("%d", 5, 5),
@@ -250,3 +291,71 @@ def test_fakeinstrument_control(set_command, given, expected):
     fake = Fake()
     fake.x = given
     assert fake.x == expected
+
+
+def test_control_cache():
+    class Fake(FakeInstrument):
+        x = Instrument.control("", "%d", "", cache=True)
+        y = Instrument.setting("%d", "", cache=True)
+
+    fake = Fake()
+    fake.x = 5
+    fake.x = 5  # skipped
+    assert fake.read() == "5"
+    assert fake.x == 5  # from the cache
+    fake.y = 3
+    fake.y = 3
+    assert fake.read() == "3"
+    assert fake.cache_info() == (1, 0, 2, 2)
+    fake.write("7")
+    assert fake.uncached('x') == 7
+    assert fake.x == 7
+    assert fake.cache_info() == (2, 1, 2, 2)
+    fake.reset()
+    assert fake.cache_info().size == 0
+    fake.x = 8
+    fake.write("*rst")
+    assert fake.cache_info().size == 0
+
+
+def test_control_cache_ttl(monkeypatch):
+    clock = SimpleNamespace(now=0.)
+    monkeypatch.setattr(instrument_module, 'time', SimpleNamespace(
+        monotonic=lambda: clock.now, perf_counter=time.perf_counter))
+
+    class Fake(FakeInstrument):
+        x = Instrument.control("", "%d", "", cache=0.05)
+
+    fake = Fake()
+    fake.x = 5
+    assert fake.read() == "5"
+    clock.now = 0.05
+    assert fake.x == 5
+    clock.now = 0.1
+    fake.write("6")
+    assert fake.x == 6
+    assert fake.cache_info()[:2] == (1, 1)
+    fake.cache_clear('x')
+    fake.x = 6  # not skipped
+    assert fake.read() == "6"
+
+
+def test_instrument_locked():
+    fake = FakeInstrument()
+    started = Event()
+
+    def write():
+        started.set()
+        fake.write("B")
+
+    with fake.locked():
+        thread = Thread(target=write)
+        thread.start()
+        assert started.wait(5)
+        fake.write("A")
+        thread.join(0.05)
+        assert thread.is_alive()  # blocked by the lock
+        assert fake.read() == "A"
+    thread.join(5)
+    assert not thread.is_alive()
+    assert fake.read() == "B"
@@ -0,0 +1,104 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2021 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+import serial
+
+from pymeasure.adapters import PrologixAdapter
+from pymeasure.instruments import SessionPool, pool as pool_module
+from pymeasure.instruments.instrument import FakeInstrument
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ Replaces the clock of the session pool by one which is advanced by hand """
+    clock = SimpleNamespace(now=0.)
+    monkeypatch.setattr(pool_module, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_pool_reuses_instruments():
+    pool = SessionPool()
+    first = pool.instrument(FakeInstrument, "A", name="Fake")
+    assert pool.instrument(FakeInstrument, "A", name="Fake") is first
+    assert pool.instrument(FakeInstrument, "A", name="Other") is not first
+    assert pool.instrument(FakeInstrument, "B", name="Fake") is not first
+    assert len(pool) == 3
+    pool.clear()
+    assert len(pool) == 0
+    assert pool.instrument(FakeInstrument, "A", name="Fake") is not first
+
+
+def test_pool_idle_timeout(clock):
+    pool = SessionPool(idle_timeout=0.05)
+    instrument = pool.instrument(FakeInstrument, "A")
+    clock.now = 0.1
+    pool.evict_idle()
+    assert len(pool) == 1  # still in use
+    pool.release(instrument)
+    clock.now = 0.15
+    assert pool.instrument(FakeInstrument, "A") is instrument
+    pool.release(instrument)
+    clock.now = 0.25
+    pool.evict_idle()
+    assert len(pool) == 0
+    with pytest.raises(ValueError):
+        pool.release(instrument)
+
+
+@pytest.mark.skipif(not importlib.util.find_spec('pyvisa_sim'),
+                    reason='requires the pyvisa-sim library')
+def test_pool_adapters():
+    pool = SessionPool()
+    adapter = pool.adapter('ASRL2::INSTR', visa_library='@sim')
+    assert pool.adapter('ASRL2::INSTR', visa_library='@sim') is adapter
+    other = pool.adapter('ASRL1::INSTR', visa_library='@sim')
+    assert other.manager is adapter.manager
+    pool.clear()
+    assert adapter.connection is None
+
+
+def test_pool_keeps_shared_prologix_connection_open(clock):
+    connection = serial.serial_for_url("loop://", timeout=0.2)
+    pool = SessionPool(idle_timeout=1)
+    first = pool.adapter(connection, cls=PrologixAdapter, address=5)
+    second = pool.adapter(connection, cls=PrologixAdapter, address=6)
+    assert first.controller is second.controller
+    pool.release(first)
+    clock.now = 2
+    pool.evict_idle()
+    assert len(pool) == 1
+    assert first.connection is None
+    assert connection.is_open
+    connection.reset_input_buffer()  # the set up of the adapters
+    second.write("*IDN?")  # the sibling still works
+    assert connection.read(1000) == b"*IDN?\n"
+
+    pool.release(second)
+    clock.now = 4
+    pool.evict_idle()
+    assert not connection.is_open  # closed with the last adapter